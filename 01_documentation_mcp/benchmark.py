@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+Benchmark the Documentation MCP Service against a synthetic markdown corpus.
+
+Generates a corpus with a configurable document count, size, tag distribution
+and category mix, then runs index build, cold search, warm search, listing,
+get and concurrent update+search scenarios against the tool functions in
+mcp_server.py. Results (throughput, latency percentiles, index size) are
+printed and optionally written as JSON so runs can be compared over time.
+
+Usage:
+    python benchmark.py run --docs 5000 --output results.json
+    python benchmark.py generate --docs 1000 --out /tmp/corpus
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import frontmatter
+
+DEFAULT_CATEGORIES = "guides=4,api=3,services=2,projects=2,knowledge=2,whitepapers=1"
+SYLLABLES = ["ka", "lo", "mi", "ne", "ru", "ta", "vi", "so", "pe", "da", "zu", "fo", "gri", "tan", "mel", "dor"]
+
+def parse_mix(spec):
+    """Parse 'guides=4,api=3' into a {category: weight} dict"""
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+def make_vocabulary(rng, size):
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+def zipf_weights(count, skew):
+    """Cumulative weights for rank-frequency sampling"""
+    total, cumulative = 0.0, []
+    for rank in range(1, count + 1):
+        total += 1.0 / rank ** skew
+        cumulative.append(total)
+    return cumulative
+
+def generate_corpus(root, docs, words, vocabulary, tags, tags_per_doc, tag_skew, categories, seed):
+    """Write `docs` markdown files with frontmatter under root/<category>/.
+
+    Words and tags follow a Zipf distribution so posting lists have a
+    realistic mix of very common and rare terms. Returns the vocabulary,
+    ordered from most to least frequent, and the generated document IDs.
+    """
+    rng = random.Random(seed)
+    vocab = make_vocabulary(rng, vocabulary)
+    vocab_weights = zipf_weights(len(vocab), 1.0)
+    tag_names = [f"tag{i}" for i in range(tags)]
+    tag_weights = zipf_weights(len(tag_names), tag_skew)
+    names, weights = list(categories), list(categories.values())
+    started = datetime(2024, 1, 1)
+
+    doc_ids = []
+    for n in range(docs):
+        category = rng.choices(names, weights)[0]
+        doc_id = f"{n:012x}"
+        title = " ".join(rng.choices(vocab, cum_weights=vocab_weights, k=4)).title()
+        body, remaining, section = [f"# {title}"], words, 0
+        while remaining > 0:
+            section += 1
+            body.append(f"\n## Section {section} {rng.choice(vocab)}\n")
+            paragraph = min(remaining, rng.randint(40, 160))
+            body.append(" ".join(rng.choices(vocab, cum_weights=vocab_weights, k=paragraph)))
+            remaining -= paragraph
+        timestamp = (started + timedelta(minutes=n)).isoformat()
+        post = frontmatter.Post(
+            "\n".join(body),
+            id=doc_id,
+            title=title,
+            category=category,
+            tags=sorted(set(rng.choices(tag_names, cum_weights=tag_weights, k=tags_per_doc))),
+            created=timestamp,
+            modified=timestamp,
+            author="benchmark",
+            version="1.0"
+        )
+        path = Path(root) / category / f"{doc_id}.md"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(frontmatter.dumps(post))
+        doc_ids.append(doc_id)
+    return vocab, doc_ids
+
+def make_queries(rng, vocab, count):
+    """Mix of common terms, rare terms and two-term queries"""
+    head, tail = vocab[:max(1, len(vocab) // 20)], vocab[len(vocab) // 2:] or vocab
+    queries = set()
+    while len(queries) < count:
+        kind = rng.random()
+        if kind < 0.4:
+            queries.add(rng.choice(head))
+        elif kind < 0.7:
+            queries.add(rng.choice(tail))
+        else:
+            queries.add(f"{rng.choice(head)} {rng.choice(vocab)}")
+    return sorted(queries)
+
+def summarize(latencies, elapsed=None):
+    """Latency percentiles in milliseconds plus throughput"""
+    ordered = sorted(latencies)
+    def percentile(p):
+        return round(ordered[min(int(len(ordered) * p), len(ordered) - 1)] * 1000, 3) if ordered else 0.0
+    elapsed = elapsed if elapsed is not None else sum(ordered)
+    return {
+        "ops": len(ordered),
+        "ops_per_sec": round(len(ordered) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": percentile(0.50),
+        "p95_ms": percentile(0.95),
+        "p99_ms": percentile(0.99),
+        "max_ms": round(ordered[-1] * 1000, 3) if ordered else 0.0
+    }
+
+async def timed(call):
+    started = time.perf_counter()
+    result = await call
+    if isinstance(result, dict) and "error" in result:
+        raise RuntimeError(result["error"])
+    return time.perf_counter() - started
+
+async def run_sequential(calls):
+    started = time.perf_counter()
+    latencies = [await timed(call) for call in calls]
+    return summarize(latencies, time.perf_counter() - started)
+
+def directory_size(path):
+    return sum(f.stat().st_size for f in Path(path).rglob("*") if f.is_file())
+
+async def run_benchmark(args):
+    workdir = Path(args.workdir or tempfile.mkdtemp(prefix="docs-bench-"))
+    docs_root, index_path = workdir / "docs", workdir / "search_index"
+    os.environ.update({
+        "DOCS_ROOT": str(docs_root),
+        "INDEX_PATH": str(index_path),
+        "VERSIONS_ROOT": str(workdir / "versions"),
+        "REQUIRE_APPROVAL": "false",
+        "DOCS_WATCH_ENABLED": "false"
+    })
+    docs_root.mkdir(parents=True, exist_ok=True)
+
+    # Import against an empty tree so the index build below is measured on its own
+    sys.path.insert(0, str(Path(__file__).parent))
+    import mcp_server as server
+    logging.getLogger().setLevel(logging.WARNING)
+
+    rng = random.Random(args.seed)
+    started = time.perf_counter()
+    vocab, doc_ids = generate_corpus(
+        docs_root, args.docs, args.words, args.vocabulary, args.tags,
+        args.tags_per_doc, args.tag_skew, parse_mix(args.categories), args.seed
+    )
+    results = {
+        "config": {key: value for key, value in vars(args).items() if key not in ("command", "output")},
+        "corpus": {
+            "documents": args.docs,
+            "generate_sec": round(time.perf_counter() - started, 3),
+            "bytes": directory_size(docs_root)
+        }
+    }
+
+    started = time.perf_counter()
+    indexed = await server.write_pool.run(server.reindex_all_documents)
+    elapsed = time.perf_counter() - started
+    results["index_build"] = {
+        "documents": indexed,
+        "seconds": round(elapsed, 3),
+        "docs_per_sec": round(indexed / elapsed, 1) if elapsed else 0.0,
+        "index_bytes": directory_size(index_path)
+    }
+
+    queries = make_queries(rng, vocab, args.queries)
+    search = lambda query: server.search_docs(query, page_size=args.page_size, mode=args.mode)
+    server.search_cache.clear()
+    results["cold_search"] = await run_sequential(search(query) for query in queries)
+    results["warm_search"] = await run_sequential(search(query) for query in queries)
+
+    categories = list(parse_mix(args.categories))
+    results["list"] = await run_sequential(
+        server.list_documents(category=rng.choice(categories + [None]), limit=50)
+        for _ in range(args.queries)
+    )
+    results["get"] = await run_sequential(
+        server.get_document(rng.choice(doc_ids)) for _ in range(args.queries)
+    )
+
+    # Writers and readers share the service's thread pools, as under real load
+    update_latencies, search_latencies = [], []
+    async def worker(worker_rng):
+        for _ in range(args.mixed_ops // args.concurrency):
+            if worker_rng.random() < args.update_ratio:
+                doc_id = worker_rng.choice(doc_ids)
+                content = " ".join(worker_rng.choices(vocab, k=args.words))
+                update_latencies.append(await timed(server.update_document(doc_id, content, "benchmark")))
+            else:
+                search_latencies.append(await timed(search(worker_rng.choice(vocab))))
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(random.Random(args.seed + n)) for n in range(args.concurrency)))
+    elapsed = time.perf_counter() - started
+    results["concurrent_update_search"] = {
+        "concurrency": args.concurrency,
+        "ops_per_sec": round((len(update_latencies) + len(search_latencies)) / elapsed, 1),
+        "updates": summarize(update_latencies, elapsed),
+        "searches": summarize(search_latencies, elapsed),
+        "write_batches": server.metrics["write_batches"]
+    }
+    results["index_bytes_after"] = directory_size(index_path)
+    results["workdir"] = str(workdir)
+    return results
+
+def print_report(results):
+    print(f"Corpus: {results['corpus']['documents']} documents, {results['corpus']['bytes']} bytes")
+    build = results["index_build"]
+    print(f"Index build: {build['seconds']}s ({build['docs_per_sec']} docs/s), index {build['index_bytes']} bytes")
+    rows = [(name, results[name]) for name in ("cold_search", "warm_search", "list", "get")]
+    mixed = results["concurrent_update_search"]
+    rows += [("mixed: updates", mixed["updates"]), ("mixed: searches", mixed["searches"])]
+    print(f"{'scenario':<18}{'ops':>8}{'ops/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name, stats in rows:
+        print(f"{name:<18}{stats['ops']:>8}{stats['ops_per_sec']:>10}{stats['p50_ms']:>10}{stats['p95_ms']:>10}{stats['p99_ms']:>10}")
+    print(f"Mixed throughput: {mixed['ops_per_sec']} ops/s at concurrency {mixed['concurrency']}")
+
+def add_corpus_arguments(parser):
+    parser.add_argument("--docs", type=int, default=1000, help="Number of documents")
+    parser.add_argument("--words", type=int, default=400, help="Words per document")
+    parser.add_argument("--vocabulary", type=int, default=5000, help="Distinct words in the corpus")
+    parser.add_argument("--tags", type=int, default=50, help="Distinct tags")
+    parser.add_argument("--tags-per-doc", type=int, default=3)
+    parser.add_argument("--tag-skew", type=float, default=1.1, help="Zipf exponent of tag popularity")
+    parser.add_argument("--categories", default=DEFAULT_CATEGORIES, help="Category mix as name=weight pairs")
+    parser.add_argument("--seed", type=int, default=42)
+
+def main():
+    parser = argparse.ArgumentParser(description="Documentation MCP Service benchmark")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    generate = commands.add_parser("generate", help="Only write a synthetic corpus")
+    add_corpus_arguments(generate)
+    generate.add_argument("--out", required=True, help="Directory to write the corpus to")
+
+    run = commands.add_parser("run", help="Generate a corpus and run all scenarios")
+    add_corpus_arguments(run)
+    run.add_argument("--queries", type=int, default=200, help="Distinct queries per search scenario")
+    run.add_argument("--page-size", type=int, default=20)
+    run.add_argument("--mode", choices=["keyword", "hybrid"], default="keyword")
+    run.add_argument("--mixed-ops", type=int, default=400, help="Operations in the concurrent scenario")
+    run.add_argument("--concurrency", type=int, default=8)
+    run.add_argument("--update-ratio", type=float, default=0.2)
+    run.add_argument("--workdir", help="Directory for the corpus and index (default: a new temp dir)")
+    run.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    if args.command == "generate":
+        _, doc_ids = generate_corpus(
+            args.out, args.docs, args.words, args.vocabulary, args.tags,
+            args.tags_per_doc, args.tag_skew, parse_mix(args.categories), args.seed
+        )
+        print(f"Wrote {len(doc_ids)} documents to {args.out}")
+        return
+
+    results = asyncio.run(run_benchmark(args))
+    print_report(results)
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+        print(f"Results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -16,5 +16,10 @@ for category in projects services whitepapers guides api knowledge; do
     mkdir -p "${DOCS_ROOT:-/workspace/docs}/$category"
 done
 
+# Seed sample documentation once, if requested
+if [ "${INIT_SAMPLE_DOCS:-false}" = "true" ]; then
+    python mcp_server.py --init-samples
+fi
+
 # Start the MCP server
 exec python mcp_server.py
\ No newline at end of file
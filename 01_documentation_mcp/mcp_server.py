@@ -1,19 +1,56 @@
 import os
+import sys
+import asyncio
+import atexit
 import logging
-from typing import Optional, List, Dict, Any
+import queue
+import threading
+import time
+import uuid
+from typing import Optional, List, Dict, Any, Set
 import json
+import re
 from datetime import datetime as dt
 from pathlib import Path
 import hashlib
 import difflib
+import zlib
+import heapq
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
 import frontmatter
 from whoosh import index
-from whoosh.fields import Schema, TEXT, ID, DATETIME, KEYWORD
+from whoosh.fields import Schema, TEXT, ID, DATETIME, KEYWORD, NUMERIC
+from whoosh.highlight import PinpointFragmenter
 from whoosh.qparser import QueryParser, MultifieldParser
 from whoosh.query import And, Or, Term
 
 from mcp.server.fastmcp import FastMCP
 
+try:
+    from prometheus_client import CollectorRegistry, Counter, generate_latest, CONTENT_TYPE_LATEST
+except ImportError:
+    CollectorRegistry = None
+    Counter = None
+    generate_latest = None
+
+# Optional: local embeddings for hybrid search
+try:
+    import numpy as np
+    from sentence_transformers import SentenceTransformer
+except ImportError:
+    np = None
+    SentenceTransformer = None
+
+# Optional: inotify-based change notifications for DOCS_ROOT
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+except ImportError:
+    Observer = None
+    FileSystemEventHandler = object
+
 # JSON Formatter Class
 class JSONFormatter(logging.Formatter):
     def __init__(self, service_name, *args, **kwargs):
@@ -50,7 +87,41 @@ logger = logging.getLogger(__name__)
 MCP_PORT = int(os.getenv("MCP_PORT", 8001))
 DOCS_ROOT = Path(os.getenv("DOCS_ROOT", "/workspace/docs"))
 REQUIRE_APPROVAL = os.getenv("REQUIRE_APPROVAL", "true").lower() == "true"
-INDEX_PATH = Path("/workspace/search_index")
+INDEX_PATH = Path(os.getenv("INDEX_PATH", "/workspace/search_index"))
+PASSAGE_INDEX_PATH = INDEX_PATH / "passages"
+VERSIONS_ROOT = Path(os.getenv("VERSIONS_ROOT", "/workspace/versions"))
+VERSION_SNAPSHOT_INTERVAL = int(os.getenv("VERSION_SNAPSHOT_INTERVAL", 10))
+WRITE_JOURNAL_PATH = Path(os.getenv("WRITE_JOURNAL_PATH", str(INDEX_PATH / "write-journal.jsonl")))
+WRITE_BATCH_SIZE = int(os.getenv("WRITE_BATCH_SIZE", 32))
+CATALOG_PATH = Path(os.getenv("CATALOG_PATH", str(INDEX_PATH / "catalog.json")))
+SEARCH_DEFAULT_PAGE_SIZE = int(os.getenv("SEARCH_DEFAULT_PAGE_SIZE", 20))
+SEARCH_MAX_PAGE_SIZE = int(os.getenv("SEARCH_MAX_PAGE_SIZE", 100))
+SEARCH_CACHE_SIZE = int(os.getenv("SEARCH_CACHE_SIZE", 512))
+RECENT_SEARCHES_SIZE = int(os.getenv("RECENT_SEARCHES_SIZE", 100))
+POPULAR_DOCUMENTS_CAPACITY = int(os.getenv("POPULAR_DOCUMENTS_CAPACITY", 100))
+READ_POOL_WORKERS = int(os.getenv("READ_POOL_WORKERS", 4))
+READ_POOL_QUEUE_SIZE = int(os.getenv("READ_POOL_QUEUE_SIZE", 64))
+WRITE_POOL_QUEUE_SIZE = int(os.getenv("WRITE_POOL_QUEUE_SIZE", 64))
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+EMBEDDING_CHUNK_CHARS = int(os.getenv("EMBEDDING_CHUNK_CHARS", 1000))
+EMBEDDINGS_PATH = INDEX_PATH / "embeddings"
+HYBRID_SEARCH_TIMEOUT = float(os.getenv("HYBRID_SEARCH_TIMEOUT", 0.5))
+HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", 50))
+RRF_K = 60
+DOCS_WATCH_ENABLED = os.getenv("DOCS_WATCH_ENABLED", "true").lower() == "true"
+DOCS_WATCH_DEBOUNCE = float(os.getenv("DOCS_WATCH_DEBOUNCE", 1.0))
+DOCS_WATCH_POLL_INTERVAL = float(os.getenv("DOCS_WATCH_POLL_INTERVAL", 5.0))
+
+# Time spent in each startup phase, reported by docs.getMetrics
+startup_timings: Dict[str, float] = {}
+
+@contextmanager
+def startup_phase(name: str):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        startup_timings[name] = round(time.perf_counter() - started, 4)
 
 # Ensure directories exist
 DOCS_ROOT.mkdir(parents=True, exist_ok=True)
@@ -70,7 +141,7 @@ CATEGORIES = [
 schema = Schema(
     id=ID(stored=True, unique=True),
     title=TEXT(stored=True),
-    content=TEXT(stored=True),
+    content=TEXT(stored=True, chars=True),
     category=KEYWORD(stored=True),
     tags=KEYWORD(stored=True, commas=True),
     created=DATETIME(stored=True),
@@ -79,11 +150,123 @@ schema = Schema(
     path=TEXT(stored=True)
 )
 
-# Create or open index
-if not INDEX_PATH.exists() or not index.exists_in(str(INDEX_PATH)):
-    ix = index.create_in(str(INDEX_PATH), schema)
-else:
-    ix = index.open_dir(str(INDEX_PATH))
+# Heading-delimited sections of each document, linked back by parent_id
+passage_schema = Schema(
+    id=ID(stored=True, unique=True),
+    parent_id=ID(stored=True),
+    section=NUMERIC(stored=True),
+    heading=TEXT(stored=True),
+    title=TEXT(stored=True),
+    content=TEXT(stored=True, chars=True),
+    category=KEYWORD(stored=True),
+    tags=KEYWORD(stored=True, commas=True),
+    start=NUMERIC(stored=True),
+    end=NUMERIC(stored=True)
+)
+
+# Fields that docs.search can project; "snippet" is only computed when requested
+SEARCH_FIELDS = ["id", "title", "category", "tags", "snippet", "score", "path", "author", "created", "modified"]
+DEFAULT_SEARCH_FIELDS = ["id", "title", "category", "snippet", "score", "path"]
+SEARCH_MODES = ["keyword", "hybrid"]
+
+def open_search_index(path: Path, index_schema: Schema):
+    """Open a search index, recreating it if the on-disk schema is outdated.
+
+    Returns the index and whether it was (re)created empty.
+    """
+    path.mkdir(parents=True, exist_ok=True)
+    if index.exists_in(str(path)):
+        existing = index.open_dir(str(path))
+        # Snippets rely on character offsets stored with the content postings
+        if existing.schema.names() == index_schema.names() and existing.schema["content"].supports("characters"):
+            return existing, False
+        logger.info(f"Search index schema at {path} is outdated, rebuilding index")
+    return index.create_in(str(path), index_schema), True
+
+# Create or open indexes
+with startup_phase("open_indexes"):
+    ix, docs_index_created = open_search_index(INDEX_PATH, schema)
+    passage_ix, passage_index_created = open_search_index(PASSAGE_INDEX_PATH, passage_schema)
+index_needs_rebuild = docs_index_created or passage_index_created
+
+# Long-lived searchers, one per worker thread since Whoosh searchers are not
+# shared across threads; each is refreshed when the index generation moves
+thread_state = threading.local()
+index_generation = ix.latest_generation()
+passage_generation = passage_ix.latest_generation()
+
+# docs.search results for the current index generation, in LRU order
+search_cache: "OrderedDict[tuple, Dict[str, Any]]" = OrderedDict()
+search_cache_generation = index_generation
+
+def thread_searcher(name: str, idx, generation: int):
+    """Return this thread's searcher for an index, refreshing it if the index has changed"""
+    searcher = getattr(thread_state, name, None)
+    if searcher is None:
+        searcher = idx.searcher()
+    elif searcher.reader().generation() != generation:
+        searcher = searcher.refresh()
+    setattr(thread_state, name, searcher)
+    return searcher
+
+def get_searcher():
+    """Return this thread's document index searcher"""
+    return thread_searcher("searcher", ix, index_generation)
+
+def get_passage_searcher():
+    """Return this thread's passage index searcher"""
+    return thread_searcher("passage_searcher", passage_ix, passage_generation)
+
+def refresh_searcher():
+    """Publish the latest index generations after a commit"""
+    global index_generation, passage_generation
+    passage_generation = passage_ix.latest_generation()
+    index_generation = ix.latest_generation()
+
+def get_cached_search(key: tuple) -> Optional[Dict[str, Any]]:
+    """Look up a cached search result, dropping the cache if the index changed"""
+    global search_cache_generation
+    if search_cache_generation != index_generation:
+        search_cache.clear()
+        search_cache_generation = index_generation
+    result = search_cache.get(key)
+    if result is not None:
+        search_cache.move_to_end(key)
+    return result
+
+def cache_search(key: tuple, result: Dict[str, Any]):
+    """Store a search result, evicting the least recently used entries"""
+    search_cache[key] = result
+    search_cache.move_to_end(key)
+    while len(search_cache) > SEARCH_CACHE_SIZE:
+        search_cache.popitem(last=False)
+
+class SpaceSaving:
+    """Space-Saving heavy-hitters sketch tracking at most `capacity` keys.
+
+    When full, a new key replaces the least frequent one and inherits its
+    count, so counts are overestimated by at most the recorded error.
+    """
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.counts: Dict[str, int] = {}
+        self.errors: Dict[str, int] = {}
+
+    def add(self, key: str):
+        if key in self.counts:
+            self.counts[key] += 1
+        elif len(self.counts) < self.capacity:
+            self.counts[key] = 1
+            self.errors[key] = 0
+        else:
+            victim = min(self.counts, key=self.counts.get)
+            floor = self.counts.pop(victim)
+            del self.errors[victim]
+            self.counts[key] = floor + 1
+            self.errors[key] = floor
+
+    def top(self, n: int) -> List[tuple]:
+        return heapq.nlargest(n, self.counts.items(), key=lambda item: item[1])
 
 # Metrics
 metrics = {
@@ -91,9 +274,321 @@ metrics = {
     "documents_accessed": 0,
     "documents_created": 0,
     "documents_updated": 0,
-    "popular_documents": {},
-    "search_queries": []
+    "search_cache_hits": 0,
+    "search_cache_misses": 0,
+    "passage_searches": 0,
+    "write_batches": 0
 }
+# Bounded views of query and access history
+recent_searches = deque(maxlen=RECENT_SEARCHES_SIZE)
+popular_documents = SpaceSaving(POPULAR_DOCUMENTS_CAPACITY)
+
+# Prometheus counters mirroring the counts above, served on /metrics from a
+# registry owned by this module, so importing it twice does not clash
+prometheus_registry = None
+prometheus_counters = {}
+if Counter:
+    prometheus_registry = CollectorRegistry()
+    prometheus_counters = {
+        name: Counter(f"docs_{name}_total", f"Documentation service {name.replace('_', ' ')}", registry=prometheus_registry)
+        for name in metrics
+    }
+
+# Most counters change on the event loop, but write_batches is counted on the writer thread
+metrics_lock = threading.Lock()
+
+def record_metric(name: str):
+    """Increment a service counter and its Prometheus mirror"""
+    with metrics_lock:
+        metrics[name] += 1
+    if name in prometheus_counters:
+        prometheus_counters[name].inc()
+
+class BoundedExecutor:
+    """Thread pool with a bounded backlog that records queue wait times.
+
+    Callers beyond `workers + queue_size` wait on the event loop instead of
+    piling up in the executor queue.
+    """
+    def __init__(self, name: str, workers: int, queue_size: int):
+        self.name = name
+        self.workers = workers
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"docs-{name}")
+        self.slots = asyncio.Semaphore(workers + queue_size)
+        self.pending = 0
+        self.wait_times = deque(maxlen=1000)
+
+    async def run(self, func, *args):
+        submitted = time.perf_counter()
+        self.pending += 1
+        try:
+            async with self.slots:
+                def timed():
+                    self.wait_times.append(time.perf_counter() - submitted)
+                    return func(*args)
+                future = asyncio.get_running_loop().run_in_executor(self.executor, timed)
+                try:
+                    return await asyncio.shield(future)
+                except asyncio.CancelledError:
+                    # The worker thread cannot be interrupted, so hold the slot until it finishes
+                    await asyncio.wait({future})
+                    raise
+        finally:
+            self.pending -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        waits = sorted(self.wait_times)
+        def percentile(p):
+            return round(waits[min(int(len(waits) * p), len(waits) - 1)] * 1000, 3) if waits else 0.0
+        return {
+            "workers": self.workers,
+            "pending": self.pending,
+            "queue_wait_ms_p50": percentile(0.50),
+            "queue_wait_ms_p99": percentile(0.99),
+            "queue_wait_ms_max": round(waits[-1] * 1000, 3) if waits else 0.0
+        }
+
+# Searches and file reads run on the read pool; all index commits and file
+# writes go through a single writer thread so they never block the event loop
+read_pool = BoundedExecutor("read", READ_POOL_WORKERS, READ_POOL_QUEUE_SIZE)
+write_pool = BoundedExecutor("write", 1, WRITE_POOL_QUEUE_SIZE)
+
+class EmbeddingStore:
+    """Normalized chunk embeddings per document, persisted as one .npz file each.
+
+    Searches run against a stacked matrix of all chunks, rebuilt lazily after
+    documents change.
+    """
+    def __init__(self, path: Path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.docs: Dict[str, tuple] = {}
+        self.matrix = None
+        self.rows: List[tuple] = []
+        self.loaded = False
+
+    def load(self):
+        """Read stored embeddings on first use rather than at startup"""
+        with self.lock:
+            if self.loaded:
+                return
+            self.path.mkdir(parents=True, exist_ok=True)
+            for npz_file in self.path.glob("*.npz"):
+                with np.load(npz_file) as data:
+                    self.docs[npz_file.stem] = (data["vectors"], [tuple(span) for span in data["spans"]])
+            self.matrix = None
+            self.loaded = True
+
+    def put(self, doc_id: str, vectors, spans: List[tuple]):
+        self.load()
+        self.path.mkdir(parents=True, exist_ok=True)
+        np.savez(self.path / f"{doc_id}.npz", vectors=vectors, spans=np.array(spans, dtype=np.int64))
+        with self.lock:
+            self.docs[doc_id] = (vectors, spans)
+            self.matrix = None
+
+    def remove(self, doc_id: str):
+        (self.path / f"{doc_id}.npz").unlink(missing_ok=True)
+        with self.lock:
+            if self.docs.pop(doc_id, None) is not None:
+                self.matrix = None
+
+    def search(self, query_vector, limit: int) -> List[tuple]:
+        """Return up to `limit` (doc_id, best chunk span, cosine score), best first"""
+        self.load()
+        with self.lock:
+            if self.matrix is None:
+                self.rows = [(doc_id, span) for doc_id, (_, spans) in self.docs.items() for span in spans]
+                self.matrix = np.vstack([vectors for vectors, _ in self.docs.values()]) if self.docs else None
+            matrix, rows = self.matrix, self.rows
+        if matrix is None:
+            return []
+        scores = matrix @ query_vector
+        hits, seen = [], set()
+        for row in np.argsort(-scores):
+            doc_id, span = rows[row]
+            if doc_id in seen:
+                continue
+            seen.add(doc_id)
+            hits.append((doc_id, span, float(scores[row])))
+            if len(hits) >= limit:
+                break
+        return hits
+
+embedding_store = EmbeddingStore(EMBEDDINGS_PATH)
+
+class VersionStore:
+    """Revision history per document, stored as compressed line deltas.
+
+    Every VERSION_SNAPSHOT_INTERVAL-th revision is a full snapshot and the
+    rest are difflib deltas against the previous revision, so rebuilding
+    any revision applies at most interval - 1 deltas. Revision metadata is
+    kept in a per-document revisions.json. Only the writer thread records.
+    """
+    def __init__(self, path: Path, snapshot_interval: int):
+        self.path = path
+        self.snapshot_interval = max(snapshot_interval, 1)
+
+    def revisions(self, doc_id: str) -> List[Dict[str, Any]]:
+        log_file = self.path / doc_id / "revisions.json"
+        if not log_file.exists():
+            return []
+        return json.loads(log_file.read_text())
+
+    def record(self, doc_id: str, text: str, info: Dict[str, Any]) -> int:
+        doc_dir = self.path / doc_id
+        doc_dir.mkdir(parents=True, exist_ok=True)
+        revisions = self.revisions(doc_id)
+        revision = len(revisions)
+        if revision % self.snapshot_interval == 0:
+            kind, payload = "snapshot", text
+        else:
+            previous = self.text_at(doc_id, revision - 1).splitlines(keepends=True)
+            kind, payload = "delta", json.dumps(make_delta(previous, text.splitlines(keepends=True)))
+        data = zlib.compress(payload.encode())
+        (doc_dir / f"{revision:06d}.{kind}.z").write_bytes(data)
+        revisions.append({**info, "revision": revision, "stored": kind, "size": len(data)})
+        # Replace the log atomically so concurrent readers never see a partial file
+        tmp_file = doc_dir / "revisions.json.tmp"
+        tmp_file.write_text(json.dumps(revisions))
+        os.replace(tmp_file, doc_dir / "revisions.json")
+        return revision
+
+    def text_at(self, doc_id: str, revision: int) -> str:
+        doc_dir = self.path / doc_id
+        base = revision - revision % self.snapshot_interval
+        lines = zlib.decompress((doc_dir / f"{base:06d}.snapshot.z").read_bytes()).decode().splitlines(keepends=True)
+        for number in range(base + 1, revision + 1):
+            ops = json.loads(zlib.decompress((doc_dir / f"{number:06d}.delta.z").read_bytes()))
+            lines = apply_delta(lines, ops)
+        return "".join(lines)
+
+def make_delta(old_lines: List[str], new_lines: List[str]) -> List[list]:
+    """Encode new_lines as copies of old line ranges plus inserted lines"""
+    ops = []
+    matcher = difflib.SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            ops.append(["c", i1, i2])
+        elif j2 > j1:
+            ops.append(["i", new_lines[j1:j2]])
+    return ops
+
+def apply_delta(old_lines: List[str], ops: List[list]) -> List[str]:
+    lines = []
+    for op in ops:
+        if op[0] == "c":
+            lines.extend(old_lines[op[1]:op[2]])
+        else:
+            lines.extend(op[1])
+    return lines
+
+def next_version(version: Any) -> str:
+    """Bump the minor part of a "major.minor" version string"""
+    major, _, minor = str(version).partition(".")
+    try:
+        return f"{int(major)}.{int(minor or 0) + 1}"
+    except ValueError:
+        return f"{version}.1"
+
+version_store = VersionStore(VERSIONS_ROOT, VERSION_SNAPSHOT_INTERVAL)
+
+def atomic_write(file_path: Path, text: str, sync: bool = True):
+    """Replace a file via a temp file and rename so readers never see a partial write"""
+    tmp_path = file_path.with_name(f".{file_path.name}.tmp")
+    with open(tmp_path, "w") as f:
+        f.write(text)
+        if sync:
+            f.flush()
+            os.fsync(f.fileno())
+    os.replace(tmp_path, file_path)
+
+def fsync_paths(paths: List[Path]):
+    """Flush files and their parent directories (so renames are durable) to disk"""
+    for path in set(paths) | {path.parent for path in paths}:
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+class WriteJournal:
+    """Append-only JSON-lines journal of document writes not yet checkpointed.
+
+    Entries are fsynced before the files are touched, so a crash between
+    writing a file and indexing it is repaired by replaying the journal.
+    Each entry carries a unique "entry" id so a checkpoint removes exactly
+    the entries it applied.
+    """
+    def __init__(self, path: Path):
+        self.path = path
+
+    def append(self, entries: List[Dict[str, Any]]):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a") as f:
+            for entry in entries:
+                f.write(json.dumps(entry) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def pending(self) -> List[Dict[str, Any]]:
+        if not self.path.exists():
+            return []
+        entries = []
+        for line in self.path.read_text().splitlines():
+            try:
+                entries.append(json.loads(line))
+            except json.JSONDecodeError:
+                # A torn final line was never acknowledged to a client
+                logger.warning(f"Ignoring incomplete journal entry in {self.path}")
+        return entries
+
+    def clear(self):
+        with open(self.path, "w") as f:
+            f.flush()
+            os.fsync(f.fileno())
+
+    def discard(self, ids: Set[Optional[str]]):
+        """Checkpoint the entries with the given ids, keeping any others"""
+        remaining = [entry for entry in self.pending() if entry.get("entry") not in ids]
+        if not remaining:
+            self.clear()
+            return
+        atomic_write(self.path, "".join(json.dumps(entry) + "\n" for entry in remaining))
+
+write_journal = WriteJournal(WRITE_JOURNAL_PATH)
+embedding_model = None
+embedding_model_lock = threading.Lock()
+embedding_loader: Optional[threading.Thread] = None
+# IDs of documents written before the model finished loading; only modified by
+# the writer thread, which embeds them once the load completes
+embedding_backlog: Set[str] = set()
+
+def get_embedding_model():
+    """Load the sentence-transformers model, if installed"""
+    global embedding_model
+    if SentenceTransformer is None:
+        return None
+    with embedding_model_lock:
+        if embedding_model is None:
+            embedding_model = SentenceTransformer(EMBEDDING_MODEL)
+            logger.info(f"Loaded embedding model: {EMBEDDING_MODEL}")
+    return embedding_model
+
+def start_embedding_model_load() -> Optional[threading.Thread]:
+    """Load the embedding model on a background thread, so startup and queries never wait for it"""
+    if SentenceTransformer is None:
+        return None
+    def load():
+        try:
+            get_embedding_model()
+        except Exception as e:
+            logger.error(f"Could not load embedding model {EMBEDDING_MODEL}: {e}", exc_info=True)
+            return
+        write_pool.executor.submit(backfill_embeddings)
+    loader = threading.Thread(target=load, name="docs-embedding-load", daemon=True)
+    loader.start()
+    return loader
 
 # Initialize FastMCP
 mcp = FastMCP("Documentation MCP Server")
@@ -103,10 +598,9 @@ def generate_doc_id(title: str, category: str) -> str:
     content = f"{category}:{title}:{dt.now().isoformat()}"
     return hashlib.md5(content.encode()).hexdigest()[:12]
 
-def index_document(doc_data: Dict[str, Any]):
-    """Add or update document in search index"""
-    writer = ix.writer()
-    writer.update_document(
+def index_fields(doc_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Map a loaded document to search index fields"""
+    return dict(
         id=doc_data["id"],
         title=doc_data["title"],
         content=doc_data["content"],
@@ -117,33 +611,422 @@ def index_document(doc_data: Dict[str, Any]):
         author=doc_data.get("author", ""),
         path=doc_data["path"]
     )
+
+HEADING_RE = re.compile(r"^#{1,6}\s+(.*?)[ \t#]*$")
+
+def split_sections(text: str) -> List[Dict[str, Any]]:
+    """Split markdown at headings outside code fences.
+
+    Each section carries its heading, character span (start_char/end_char)
+    and UTF-8 byte offsets (start/end) within the document body.
+    """
+    bounds = []
+    heading, start, offset = "", 0, 0
+    in_fence = False
+    for line in text.splitlines(keepends=True):
+        if line.lstrip().startswith(("```", "~~~")):
+            in_fence = not in_fence
+        elif not in_fence:
+            match = HEADING_RE.match(line.rstrip("\r\n"))
+            if match:
+                if text[start:offset].strip():
+                    bounds.append((heading, start, offset))
+                heading, start = match.group(1), offset
+        offset += len(line)
+    if text[start:].strip():
+        bounds.append((heading, start, len(text)))
+    
+    sections = []
+    byte_pos, char_pos = 0, 0
+    for number, (heading, start_char, end_char) in enumerate(bounds):
+        byte_pos += len(text[char_pos:start_char].encode())
+        length = len(text[start_char:end_char].encode())
+        sections.append({
+            "section": number,
+            "heading": heading,
+            "start": byte_pos,
+            "end": byte_pos + length,
+            "start_char": start_char,
+            "end_char": end_char
+        })
+        byte_pos += length
+        char_pos = end_char
+    return sections
+
+def chunk_text(text: str, max_chars: int = EMBEDDING_CHUNK_CHARS) -> List[tuple]:
+    """Split text into (start, end) character spans of whole paragraphs within a section"""
+    spans = []
+    for section in split_sections(text):
+        start = end = None
+        body = text[section["start_char"]:section["end_char"]]
+        for paragraph in re.finditer(r"(?:(?!\n[ \t]*\n)[\s\S])+", body):
+            if not paragraph.group().strip():
+                continue
+            if start is None:
+                start = paragraph.start()
+            elif paragraph.end() - start > max_chars:
+                spans.append((section["start_char"] + start, section["start_char"] + end))
+                start = paragraph.start()
+            end = paragraph.end()
+        if start is not None:
+            spans.append((section["start_char"] + start, section["start_char"] + end))
+    return spans
+
+def write_passages(writer, doc_data: Dict[str, Any]):
+    """Replace a document's sections in the passage index"""
+    writer.delete_by_term("parent_id", doc_data["id"])
+    content = doc_data["content"]
+    for section in split_sections(content):
+        writer.add_document(
+            id=f"{doc_data['id']}#{section['section']}",
+            parent_id=doc_data["id"],
+            section=section["section"],
+            heading=section["heading"],
+            title=doc_data["title"],
+            content=content[section["start_char"]:section["end_char"]],
+            category=doc_data["category"],
+            tags=",".join(doc_data.get("tags", [])),
+            start=section["start"],
+            end=section["end"]
+        )
+
+def embed_documents(docs: List[Dict[str, Any]]):
+    """Embed document chunks in one batch and store them for hybrid search.
+
+    Writes never wait for the model: until the background load finishes, the
+    documents are added to the backlog and embedded by backfill_embeddings.
+    """
+    model = embedding_model
+    if model is None:
+        if SentenceTransformer is not None:
+            embedding_backlog.update(doc["id"] for doc in docs)
+        return
+    try:
+        doc_spans = [(doc, chunk_text(doc["content"])) for doc in docs]
+        texts = [doc["content"][start:end] for doc, spans in doc_spans for start, end in spans]
+        vectors = model.encode(texts, batch_size=64, normalize_embeddings=True).astype(np.float32) if texts else []
+        offset = 0
+        for doc, spans in doc_spans:
+            if spans:
+                embedding_store.put(doc["id"], vectors[offset:offset + len(spans)], spans)
+            else:
+                embedding_store.remove(doc["id"])
+            offset += len(spans)
+    except Exception as e:
+        logger.warning(f"Could not embed documents for hybrid search: {e}")
+
+def backfill_embeddings():
+    """Embed the documents written while the model was loading (runs on the writer thread)"""
+    docs = []
+    for doc_id in sorted(embedding_backlog):
+        summary = catalog.get(doc_id)
+        doc_data = load_document(DOCS_ROOT / summary["path"]) if summary else None
+        if doc_data and doc_data.get("id") == doc_id:
+            docs.append(doc_data)
+    embedding_backlog.clear()
+    embed_documents(docs)
+    logger.info(f"Backfilled embeddings for {len(docs)} documents")
+
+# Relative path -> (doc ID, file mtime_ns) for every indexed file, and doc ID
+# -> summary served by docs.list; only modified by the writer thread (and at
+# startup, before it runs), persisted to CATALOG_PATH on shutdown
+indexed_files: Dict[str, tuple] = {}
+catalog: Dict[str, Dict[str, Any]] = {}
+
+SUMMARY_FIELDS = ["id", "title", "category", "tags", "created", "modified", "author", "path"]
+
+def file_mtime(rel_path: str) -> Optional[int]:
+    try:
+        return (DOCS_ROOT / rel_path).stat().st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+def track_document(doc_data: Dict[str, Any]):
+    """Record an indexed document in the file map and catalog"""
+    indexed_files[doc_data["path"]] = (doc_data["id"], file_mtime(doc_data["path"]))
+    catalog[doc_data["id"]] = {
+        field: str(doc_data[field]) if field in ("created", "modified") and doc_data.get(field) else doc_data.get(field)
+        for field in SUMMARY_FIELDS
+    }
+
+def untrack_document(rel_path: str, doc_id: str):
+    indexed_files.pop(rel_path, None)
+    catalog.pop(doc_id, None)
+
+def save_catalog():
+    """Persist the catalog with the index generations it describes"""
+    snapshot = {
+        "generation": ix.latest_generation(),
+        "passage_generation": passage_ix.latest_generation(),
+        "files": indexed_files,
+        "documents": list(catalog.values())
+    }
+    atomic_write(CATALOG_PATH, json.dumps(snapshot))
+
+def load_catalog() -> bool:
+    """Restore the catalog snapshot if it matches the current index generations"""
+    try:
+        snapshot = json.loads(CATALOG_PATH.read_text())
+    except (FileNotFoundError, json.JSONDecodeError):
+        return False
+    if (snapshot.get("generation") != ix.latest_generation()
+            or snapshot.get("passage_generation") != passage_ix.latest_generation()):
+        logger.info("Catalog snapshot is stale, rebuilding from the index")
+        return False
+    indexed_files.clear()
+    indexed_files.update((path, tuple(entry)) for path, entry in snapshot["files"].items())
+    catalog.clear()
+    catalog.update((summary["id"], summary) for summary in snapshot["documents"])
+    return True
+
+def index_documents(docs: List[Dict[str, Any]]):
+    """Add or update documents in the search indexes with a single commit"""
+    writer = ix.writer()
+    passage_writer = passage_ix.writer()
+    for doc_data in docs:
+        writer.update_document(**index_fields(doc_data))
+        write_passages(passage_writer, doc_data)
+    passage_writer.commit()
     writer.commit()
+    for doc_data in docs:
+        track_document(doc_data)
+    embed_documents(docs)
+    refresh_searcher()
+
+def index_document(doc_data: Dict[str, Any]):
+    """Add or update document in search index"""
+    index_documents([doc_data])
+
+def reindex_all_documents() -> int:
+    """Rebuild the search index from the markdown files under DOCS_ROOT"""
+    docs = []
+    writer = ix.writer()
+    passage_writer = passage_ix.writer()
+    for doc_file in DOCS_ROOT.rglob("*.md"):
+        doc_data = load_document(doc_file)
+        if not doc_data or not doc_data.get("id"):
+            continue
+        writer.update_document(**index_fields(doc_data))
+        write_passages(passage_writer, doc_data)
+        docs.append(doc_data)
+    passage_writer.commit()
+    writer.commit()
+    indexed_files.clear()
+    catalog.clear()
+    for doc_data in docs:
+        track_document(doc_data)
+    embed_documents(docs)
+    refresh_searcher()
+    count = len(docs)
+    logger.info(f"Reindexed {count} documents from {DOCS_ROOT}")
+    return count
+
+def document_from_post(post: frontmatter.Post, rel_path: str) -> Dict[str, Any]:
+    """Build the document dict from parsed frontmatter"""
+    return {
+        "id": post.metadata.get("id"),
+        "title": post.metadata.get("title"),
+        "content": post.content,
+        "category": post.metadata.get("category"),
+        "tags": post.metadata.get("tags", []),
+        "created": post.metadata.get("created"),
+        "modified": post.metadata.get("modified"),
+        "author": post.metadata.get("author"),
+        "version": post.metadata.get("version", "1.0"),
+        "path": rel_path
+    }
 
 def load_document(file_path: Path) -> Dict[str, Any]:
     """Load document with frontmatter"""
     try:
         post = frontmatter.load(file_path)
-        return {
-            "id": post.metadata.get("id"),
-            "title": post.metadata.get("title"),
-            "content": post.content,
-            "category": post.metadata.get("category"),
-            "tags": post.metadata.get("tags", []),
-            "created": post.metadata.get("created"),
-            "modified": post.metadata.get("modified"),
-            "author": post.metadata.get("author"),
-            "version": post.metadata.get("version", "1.0"),
-            "path": str(file_path.relative_to(DOCS_ROOT))
-        }
+        return document_from_post(post, str(file_path.relative_to(DOCS_ROOT)))
     except Exception as e:
         logger.error(f"Error loading document {file_path}: {e}")
         return None
 
+def build_query(query: str, category: Optional[str], tags: Optional[List[str]]):
+    """Parse a keyword query and apply category/tag filters"""
+    parser = MultifieldParser(["title", "content"], schema=ix.schema)
+    q = parser.parse(query)
+    
+    # Add filters
+    if category:
+        q = And([q, Term("category", category)])
+    
+    if tags:
+        tag_queries = [Term("tags", tag) for tag in tags]
+        q = And([q, Or(tag_queries)])
+    
+    return q
+
+def run_search(
+    query: str,
+    category: Optional[str],
+    tags: Optional[List[str]],
+    page: int,
+    page_size: int,
+    fields: List[str]
+) -> Dict[str, Any]:
+    """Execute a search page against the index (runs on the read pool)"""
+    searcher = get_searcher()
+    q = build_query(query, category, tags)
+    
+    # Execute search; matched terms let the highlighter use stored offsets
+    want_snippet = "snippet" in fields
+    results = searcher.search_page(q, page, pagelen=page_size, terms=want_snippet)
+    if want_snippet:
+        results.results.fragmenter = PinpointFragmenter(maxchars=200, surround=40, autotrim=True)
+    
+    # Format results
+    documents = []
+    for hit in results:
+        doc = {}
+        for field in fields:
+            if field == "snippet":
+                doc["snippet"] = hit.highlights("content", top=3) or hit["content"][:200] + "..."
+            elif field == "score":
+                doc["score"] = hit.score
+            elif field == "tags":
+                doc["tags"] = [t for t in hit.get("tags", "").split(",") if t]
+            elif field in ("created", "modified"):
+                doc[field] = hit[field].isoformat() if hit.get(field) else None
+            else:
+                doc[field] = hit.get(field)
+        documents.append(doc)
+    
+    logger.info(f"Search for '{query}' returned {len(documents)} results (page {results.pagenum}/{results.pagecount})")
+    
+    return {
+        "query": query,
+        "mode": "keyword",
+        "count": len(documents),
+        "total": results.total,
+        "page": results.pagenum,
+        "page_size": page_size,
+        "pages": results.pagecount,
+        "next_page": results.pagenum + 1 if not results.is_last_page() else None,
+        "documents": documents
+    }
+
+def rank_keyword(query: str, category: Optional[str], tags: Optional[List[str]], limit: int) -> List[str]:
+    """Return the IDs of the top BM25 matches"""
+    results = get_searcher().search(build_query(query, category, tags), limit=limit)
+    return [hit["id"] for hit in results]
+
+def rank_vector(query: str, limit: int) -> Optional[List[tuple]]:
+    """Return the top (doc_id, span, score) embedding matches, or None if unavailable"""
+    # Never load the model here: that would spend the whole hybrid search timeout
+    model = embedding_model
+    if model is None:
+        return None
+    query_vector = model.encode([query], normalize_embeddings=True)[0].astype(np.float32)
+    return embedding_store.search(query_vector, limit)
+
+def fuse_page(
+    query: str,
+    keyword_ids: List[str],
+    vector_hits: List[tuple],
+    category: Optional[str],
+    tags: Optional[List[str]],
+    page: int,
+    page_size: int,
+    fields: List[str]
+) -> Dict[str, Any]:
+    """Merge keyword and vector rankings with reciprocal rank fusion and format a page"""
+    scores: Dict[str, float] = {}
+    for rank, doc_id in enumerate(keyword_ids):
+        scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (RRF_K + rank + 1)
+    spans = {}
+    for rank, (doc_id, span, _) in enumerate(vector_hits):
+        scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (RRF_K + rank + 1)
+        spans[doc_id] = span
+    
+    # Vector matches are unfiltered, so apply category/tag filters on stored fields
+    searcher = get_searcher()
+    ranked = []
+    for doc_id in sorted(scores, key=scores.get, reverse=True):
+        stored = searcher.document(id=doc_id)
+        if not stored:
+            continue
+        if category and stored.get("category") != category:
+            continue
+        if tags and not set(tags) & set(stored.get("tags", "").split(",")):
+            continue
+        ranked.append((doc_id, stored))
+    
+    pages = max((len(ranked) + page_size - 1) // page_size, 1)
+    page = min(page, pages)
+    documents = []
+    for doc_id, stored in ranked[(page - 1) * page_size:page * page_size]:
+        doc = {}
+        for field in fields:
+            if field == "snippet":
+                start, end = spans.get(doc_id, (0, 200))
+                doc["snippet"] = stored["content"][start:min(end, start + 200)].strip() + "..."
+            elif field == "score":
+                doc["score"] = scores[doc_id]
+            elif field == "tags":
+                doc["tags"] = [t for t in stored.get("tags", "").split(",") if t]
+            elif field in ("created", "modified"):
+                doc[field] = stored[field].isoformat() if stored.get(field) else None
+            else:
+                doc[field] = stored.get(field)
+        documents.append(doc)
+    
+    logger.info(f"Hybrid search for '{query}' returned {len(documents)} results (page {page}/{pages})")
+    
+    return {
+        "query": query,
+        "mode": "hybrid",
+        "count": len(documents),
+        "total": len(ranked),
+        "page": page,
+        "page_size": page_size,
+        "pages": pages,
+        "next_page": page + 1 if page < pages else None,
+        "documents": documents
+    }
+
+async def hybrid_search(
+    query: str,
+    category: Optional[str],
+    tags: Optional[List[str]],
+    page: int,
+    page_size: int,
+    fields: List[str]
+) -> Dict[str, Any]:
+    """Run BM25 and vector retrieval concurrently, falling back to keyword-only on timeout"""
+    deadline = time.perf_counter() + HYBRID_SEARCH_TIMEOUT
+    keyword_task = asyncio.ensure_future(read_pool.run(rank_keyword, query, category, tags, HYBRID_CANDIDATES))
+    vector_task = asyncio.ensure_future(read_pool.run(rank_vector, query, HYBRID_CANDIDATES))
+    keyword_ids = await keyword_task
+    fallback = None
+    # Wait without cancelling: a timed-out lookup keeps its read pool slot until its thread finishes
+    done, _ = await asyncio.wait({vector_task}, timeout=max(deadline - time.perf_counter(), 0))
+    if not done:
+        logger.warning(f"Vector retrieval for '{query}' exceeded {HYBRID_SEARCH_TIMEOUT}s, using keyword results only")
+        vector_task.add_done_callback(lambda task: task.cancelled() or task.exception())
+        fallback = "timeout"
+    elif (vector_hits := vector_task.result()) is None:
+        loading = embedding_loader is not None and embedding_loader.is_alive()
+        fallback = "embeddings_loading" if loading else "embeddings_unavailable"
+    
+    if fallback:
+        result = await read_pool.run(run_search, query, category, tags, page, page_size, fields)
+        result["fallback"] = fallback
+        return result
+    return await read_pool.run(fuse_page, query, keyword_ids, vector_hits, category, tags, page, page_size, fields)
+
 @mcp.tool("docs.search")
 async def search_docs(
     query: str,
     category: Optional[str] = None,
-    tags: Optional[List[str]] = None
+    tags: Optional[List[str]] = None,
+    page: int = 1,
+    page_size: int = SEARCH_DEFAULT_PAGE_SIZE,
+    fields: Optional[List[str]] = None,
+    mode: str = "keyword"
 ) -> Dict[str, Any]:
     """
     Search documentation by keyword, category, or tags.
@@ -152,59 +1035,200 @@ async def search_docs(
         query: Search query string
         category: Optional category filter
         tags: Optional list of tags to filter by
+        page: Page number (1-based)
+        page_size: Number of results per page
+        fields: Fields to return for each hit (default: id, title, category,
+            snippet, score, path). Leave out "snippet" to skip highlighting.
+        mode: "keyword" (BM25) or "hybrid" (BM25 fused with embedding
+            similarity; falls back to keyword if embeddings are unavailable)
         
     Returns:
-        List of matching documents with snippets
+        Page of matching documents with snippets
     """
-    metrics["searches_performed"] += 1
-    metrics["search_queries"].append(query)
+    record_metric("searches_performed")
+    recent_searches.append(query)
     
+    fields = fields or DEFAULT_SEARCH_FIELDS
+    unknown_fields = [f for f in fields if f not in SEARCH_FIELDS]
+    if unknown_fields:
+        return {"error": f"Unknown fields: {', '.join(unknown_fields)}. Must be among: {', '.join(SEARCH_FIELDS)}", "documents": []}
+    if mode not in SEARCH_MODES:
+        return {"error": f"Invalid mode. Must be one of: {', '.join(SEARCH_MODES)}", "documents": []}
+    page = max(page, 1)
+    page_size = min(max(page_size, 1), SEARCH_MAX_PAGE_SIZE)
+    
+    cache_key = (
+        " ".join(query.split()),
+        category,
+        tuple(sorted(set(tags))) if tags else (),
+        page,
+        page_size,
+        tuple(fields),
+        mode
+    )
+    cached = get_cached_search(cache_key)
+    if cached is not None:
+        record_metric("search_cache_hits")
+        return cached
+    record_metric("search_cache_misses")
+    
+    generation = index_generation
     try:
-        with ix.searcher() as searcher:
-            # Build query
-            parser = MultifieldParser(["title", "content"], schema=ix.schema)
-            q = parser.parse(query)
-            
-            # Add filters
-            if category:
-                q = And([q, Term("category", category)])
-            
-            if tags:
-                tag_queries = [Term("tags", tag) for tag in tags]
-                q = And([q, Or(tag_queries)])
-            
-            # Execute search
-            results = searcher.search(q, limit=20)
-            
-            # Format results
-            documents = []
-            for hit in results:
-                doc = {
-                    "id": hit["id"],
-                    "title": hit["title"],
-                    "category": hit["category"],
-                    "snippet": hit.highlights("content", top=3) or hit["content"][:200] + "...",
-                    "score": hit.score,
-                    "path": hit["path"]
-                }
-                documents.append(doc)
-            
-            logger.info(f"Search for '{query}' returned {len(documents)} results")
-            
-            return {
-                "query": query,
-                "count": len(documents),
-                "documents": documents
-            }
-            
+        if mode == "hybrid":
+            result = await hybrid_search(query, category, tags, page, page_size, fields)
+        else:
+            result = await read_pool.run(run_search, query, category, tags, page, page_size, fields)
+        # Don't cache a page under a generation that was replaced mid-search, or a
+        # hybrid page that fell back to keyword-only for a transient reason
+        if generation == index_generation and result.get("fallback") not in ("timeout", "embeddings_loading"):
+            cache_search(cache_key, result)
+        return result
+        
     except Exception as e:
         logger.error(f"Search error: {str(e)}")
         return {"error": str(e), "documents": []}
 
+def run_passage_search(
+    query: str,
+    category: Optional[str],
+    tags: Optional[List[str]],
+    limit: int
+) -> Dict[str, Any]:
+    """Find the best-matching document sections (runs on the read pool)"""
+    searcher = get_passage_searcher()
+    parser = MultifieldParser(["heading", "content"], schema=passage_ix.schema)
+    q = parser.parse(query)
+    if category:
+        q = And([q, Term("category", category)])
+    if tags:
+        q = And([q, Or([Term("tags", tag) for tag in tags])])
+    
+    results = searcher.search(q, limit=limit, terms=True)
+    results.fragmenter = PinpointFragmenter(maxchars=200, surround=40, autotrim=True)
+    
+    passages = []
+    for hit in results:
+        passages.append({
+            "doc_id": hit["parent_id"],
+            "title": hit["title"],
+            "section": hit["section"],
+            "heading": hit["heading"],
+            "start": hit["start"],
+            "end": hit["end"],
+            "score": hit.score,
+            "snippet": hit.highlights("content", top=2) or hit["content"][:200]
+        })
+    
+    logger.info(f"Passage search for '{query}' returned {len(passages)} sections")
+    return {
+        "query": query,
+        "count": len(passages),
+        "passages": passages
+    }
+
+@mcp.tool("docs.searchPassages")
+async def search_passages(
+    query: str,
+    category: Optional[str] = None,
+    tags: Optional[List[str]] = None,
+    limit: int = 10
+) -> Dict[str, Any]:
+    """
+    Search individual document sections instead of whole documents.
+    
+    Args:
+        query: Search query string
+        category: Optional category filter
+        tags: Optional list of tags to filter by
+        limit: Maximum number of sections to return
+        
+    Returns:
+        Best-matching sections with their document ID, section number,
+        heading and byte offsets within the document body. Pass the
+        section numbers to docs.get to fetch just those sections.
+    """
+    record_metric("passage_searches")
+    recent_searches.append(query)
+    limit = min(max(limit, 1), SEARCH_MAX_PAGE_SIZE)
+    
+    cache_key = ("passages", " ".join(query.split()), category, tuple(sorted(set(tags))) if tags else (), limit)
+    cached = get_cached_search(cache_key)
+    if cached is not None:
+        record_metric("search_cache_hits")
+        return cached
+    record_metric("search_cache_misses")
+    
+    generation = index_generation
+    try:
+        result = await read_pool.run(run_passage_search, query, category, tags, limit)
+        if generation == index_generation:
+            cache_search(cache_key, result)
+        return result
+    except Exception as e:
+        logger.error(f"Passage search error: {str(e)}")
+        return {"error": str(e), "passages": []}
+
+def read_document(doc_id: str) -> Dict[str, Any]:
+    """Look up a document by ID and load it from disk"""
+    # Look up stored fields by unique ID
+    hit = get_searcher().document(id=doc_id)
+    
+    if not hit:
+        return {"error": f"Document {doc_id} not found"}
+    
+    doc_path = DOCS_ROOT / hit["path"]
+    
+    if not doc_path.exists():
+        return {"error": f"Document file not found: {hit['path']}"}
+    
+    # Load full document
+    doc = load_document(doc_path)
+    if doc:
+        logger.info(f"Retrieved document: {doc_id}")
+        return doc
+    else:
+        return {"error": "Failed to load document"}
+
+def read_document_version(doc_id: str, version: str) -> Dict[str, Any]:
+    """Rebuild a past version of a document from the version store"""
+    for entry in reversed(version_store.revisions(doc_id)):
+        if str(entry.get("version")) == version:
+            text = version_store.text_at(doc_id, entry["revision"])
+            doc = document_from_post(frontmatter.loads(text), entry.get("path"))
+            doc["version_note"] = entry.get("version_note")
+            logger.info(f"Retrieved document: {doc_id} version {version}")
+            return doc
+    # Documents without recorded history still serve their current version
+    doc = read_document(doc_id)
+    if "error" in doc or str(doc.get("version")) == version:
+        return doc
+    return {"error": f"Version {version} of document {doc_id} not found"}
+
+def select_sections(doc: Dict[str, Any], sections: List[int]) -> Dict[str, Any]:
+    """Replace a document's full content with only the requested sections"""
+    content = doc.pop("content")
+    selected = []
+    for section in split_sections(content):
+        if section["section"] in sections:
+            selected.append({
+                "section": section["section"],
+                "heading": section["heading"],
+                "start": section["start"],
+                "end": section["end"],
+                "content": content[section["start_char"]:section["end_char"]]
+            })
+    doc["sections"] = selected
+    found = {section["section"] for section in selected}
+    missing = [number for number in sections if number not in found]
+    if missing:
+        doc["missing_sections"] = missing
+    return doc
+
 @mcp.tool("docs.get")
 async def get_document(
     doc_id: str,
-    version: str = "latest"
+    version: str = "latest",
+    sections: Optional[List[int]] = None
 ) -> Dict[str, Any]:
     """
     Retrieve a specific document by ID.
@@ -212,39 +1236,45 @@ async def get_document(
     Args:
         doc_id: Document ID
         version: Version to retrieve (default: latest)
+        sections: Optional section numbers (from docs.searchPassages) to
+            return instead of the full content
         
     Returns:
-        Complete document content and metadata
+        Complete document content and metadata, or only the requested
+        sections with their byte offsets
     """
-    metrics["documents_accessed"] += 1
-    metrics["popular_documents"][doc_id] = metrics["popular_documents"].get(doc_id, 0) + 1
+    record_metric("documents_accessed")
+    popular_documents.add(doc_id)
     
     try:
-        # Search for document by ID
-        with ix.searcher() as searcher:
-            results = searcher.search(Term("id", doc_id))
-            
-            if not results:
-                return {"error": f"Document {doc_id} not found"}
-            
-            hit = results[0]
-            doc_path = DOCS_ROOT / hit["path"]
-            
-            if not doc_path.exists():
-                return {"error": f"Document file not found: {hit['path']}"}
-            
-            # Load full document
-            doc = load_document(doc_path)
-            if doc:
-                logger.info(f"Retrieved document: {doc_id}")
-                return doc
-            else:
-                return {"error": "Failed to load document"}
-                
+        if version == "latest":
+            doc = await read_pool.run(read_document, doc_id)
+        else:
+            doc = await read_pool.run(read_document_version, doc_id, version)
+        if sections is not None and "error" not in doc:
+            doc = select_sections(doc, sections)
+        return doc
     except Exception as e:
         logger.error(f"Error retrieving document {doc_id}: {str(e)}")
         return {"error": str(e)}
 
+def scan_documents(category: Optional[str], limit: int) -> List[Dict[str, Any]]:
+    """Return document summaries from the in-memory catalog"""
+    documents = []
+    
+    # Only filter by known categories, as the directory walk used to
+    if category not in CATEGORIES:
+        category = None
+    
+    for summary in list(catalog.values()):
+        if len(documents) >= limit:
+            break
+        if category and not summary["path"].startswith(f"{category}/"):
+            continue
+        documents.append({field: summary[field] for field in SUMMARY_FIELDS if field != "path"})
+    
+    return documents
+
 @mcp.tool("docs.list")
 async def list_documents(
     category: Optional[str] = None,
@@ -261,31 +1291,7 @@ async def list_documents(
         List of document summaries
     """
     try:
-        documents = []
-        
-        # Determine search path
-        search_path = DOCS_ROOT
-        if category and category in CATEGORIES:
-            search_path = DOCS_ROOT / category
-        
-        # Find all markdown files
-        for doc_file in search_path.rglob("*.md"):
-            if len(documents) >= limit:
-                break
-                
-            doc = load_document(doc_file)
-            if doc:
-                # Create summary
-                summary = {
-                    "id": doc["id"],
-                    "title": doc["title"],
-                    "category": doc["category"],
-                    "tags": doc["tags"],
-                    "created": doc["created"],
-                    "modified": doc["modified"],
-                    "author": doc["author"]
-                }
-                documents.append(summary)
+        documents = await read_pool.run(scan_documents, category, limit)
         
         return {
             "count": len(documents),
@@ -297,6 +1303,194 @@ async def list_documents(
         logger.error(f"Error listing documents: {str(e)}")
         return {"error": str(e), "documents": []}
 
+def record_revision(doc_data: Dict[str, Any], text: str, version_note: Optional[str] = None):
+    """Add a document's full text to its version history"""
+    version_store.record(doc_data["id"], text, {
+        "version": str(doc_data.get("version")),
+        "modified": doc_data.get("modified"),
+        "author": doc_data.get("author"),
+        "version_note": version_note,
+        "path": doc_data["path"]
+    })
+
+def commit_writes(writes: List[Dict[str, Any]]):
+    """Durably apply a batch of prepared writes (runs on the write pool).
+
+    The batch shares one journal fsync and one index commit; written files
+    are flushed before the batch's journal entries are checkpointed. Entries
+    left behind by an earlier batch that failed are replayed first, and stay
+    journaled (for the next batch or startup) if they fail again.
+    """
+    leftover = write_journal.pending()
+    if leftover:
+        try:
+            apply_journal_entries(leftover)
+        except Exception as e:
+            logger.error(f"Could not replay {len(leftover)} journaled writes of a failed batch, keeping them: {e}", exc_info=True)
+            leftover = []
+    entries = [
+        {"entry": uuid.uuid4().hex, "path": write["path"], "text": write["text"], "version_note": write.get("version_note")}
+        for write in writes
+    ]
+    write_journal.append(entries)
+    paths = []
+    for write in writes:
+        file_path = DOCS_ROOT / write["path"]
+        atomic_write(file_path, write["text"], sync=False)
+        paths.append(file_path)
+    
+    docs = [load_document(path) for path in paths]
+    for write, doc_data in zip(writes, docs):
+        if doc_data is None:
+            write["result"] = {"error": f"Document {write['path']} was written but could not be loaded for indexing"}
+    index_documents([doc_data for doc_data in docs if doc_data is not None])
+    for write, doc_data in zip(writes, docs):
+        if doc_data is None:
+            continue
+        if write.get("base"):
+            record_revision(*write["base"])
+        record_revision(doc_data, write["text"], write.get("version_note"))
+    
+    fsync_paths(paths)
+    write_journal.discard({entry.get("entry") for entry in leftover + entries})
+    record_metric("write_batches")
+
+def apply_journal_entries(entries: List[Dict[str, Any]]) -> int:
+    """Rewrite, index and version journaled writes; returns how many could be loaded and indexed"""
+    paths = []
+    for entry in entries:
+        file_path = DOCS_ROOT / entry["path"]
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write(file_path, entry["text"], sync=False)
+        paths.append(file_path)
+    applied = [(entry, doc_data) for entry, doc_data in zip(entries, map(load_document, paths)) if doc_data]
+    if len(applied) < len(entries):
+        logger.error(f"Skipped {len(entries) - len(applied)} journaled writes whose documents could not be loaded")
+    index_documents([doc_data for _, doc_data in applied])
+    for entry, doc_data in applied:
+        recorded = {str(rev.get("version")) for rev in version_store.revisions(doc_data["id"])}
+        if str(doc_data.get("version")) not in recorded:
+            record_revision(doc_data, entry["text"], entry.get("version_note"))
+    fsync_paths(paths)
+    return len(applied)
+
+def replay_write_journal() -> int:
+    """Re-apply journaled writes left behind by a crash"""
+    entries = write_journal.pending()
+    if not entries:
+        return 0
+    applied = apply_journal_entries(entries)
+    write_journal.clear()
+    logger.info(f"Replayed {applied} of {len(entries)} journaled document writes")
+    return applied
+
+class GroupCommitter:
+    """Collects concurrent document writes and commits them in batches.
+
+    Each submitter queues a prepare function and then schedules a drain on
+    the single writer thread; whichever drain runs first commits everything
+    queued so far, up to WRITE_BATCH_SIZE writes.
+    """
+    def __init__(self, max_batch: int):
+        self.max_batch = max_batch
+        self.queue = queue.Queue()
+
+    async def submit(self, key: Optional[str], prepare, *args) -> Dict[str, Any]:
+        future = Future()
+        self.queue.put((key, prepare, args, future))
+        await write_pool.run(self.drain)
+        return future.result()
+
+    def drain(self):
+        while not self.queue.empty():
+            batch, keys = [], set()
+            while len(batch) < self.max_batch:
+                try:
+                    key, prepare, args, future = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                # A second write to the same document must see the first on disk
+                if key is not None and key in keys:
+                    self.commit(batch)
+                    batch, keys = [], set()
+                try:
+                    write = prepare(*args)
+                except Exception as e:
+                    future.set_exception(e)
+                    continue
+                if "error" in write:
+                    future.set_result(write)
+                    continue
+                keys.add(write["id"])
+                batch.append((write, future))
+            self.commit(batch)
+
+    def commit(self, batch: List[tuple]):
+        if not batch:
+            return
+        try:
+            commit_writes([write for write, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        for write, future in batch:
+            future.set_result(write["result"])
+
+group_committer = GroupCommitter(WRITE_BATCH_SIZE)
+
+def prepare_new_document(
+    title: str,
+    content: str,
+    category: str,
+    tags: List[str],
+    metadata: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """Build the file text for a new document (runs on the write pool)"""
+    # Generate document ID
+    doc_id = generate_doc_id(title, category)
+    
+    # Create document metadata
+    doc_metadata = {
+        "id": doc_id,
+        "title": title,
+        "category": category,
+        "tags": tags,
+        "created": dt.now().isoformat(),
+        "modified": dt.now().isoformat(),
+        "author": metadata.get("author", "system") if metadata else "system",
+        "version": "1.0"
+    }
+    
+    # Add custom metadata
+    if metadata:
+        doc_metadata.update(metadata)
+    
+    # Create document with frontmatter
+    post = frontmatter.Post(content, **doc_metadata)
+    
+    # Determine file path
+    category_dir = DOCS_ROOT / category
+    category_dir.mkdir(exist_ok=True)
+    
+    filename = f"{doc_id}_{title.lower().replace(' ', '_')}.md"
+    file_path = category_dir / filename
+    
+    logger.info(f"Created document: {doc_id} - {title}")
+    
+    return {
+        "id": doc_id,
+        "path": str(file_path.relative_to(DOCS_ROOT)),
+        "text": frontmatter.dumps(post),
+        "result": {
+            "id": doc_id,
+            "title": title,
+            "category": category,
+            "path": str(file_path.relative_to(DOCS_ROOT)),
+            "created": doc_metadata["created"]
+        }
+    }
+
 @mcp.tool("docs.create")
 async def create_document(
     title: str,
@@ -327,58 +1521,54 @@ async def create_document(
         return {"error": f"Invalid category. Must be one of: {', '.join(CATEGORIES)}"}
     
     try:
-        # Generate document ID
-        doc_id = generate_doc_id(title, category)
-        
-        # Create document metadata
-        doc_metadata = {
-            "id": doc_id,
-            "title": title,
-            "category": category,
-            "tags": tags,
-            "created": dt.now().isoformat(),
-            "modified": dt.now().isoformat(),
-            "author": metadata.get("author", "system") if metadata else "system",
-            "version": "1.0"
-        }
-        
-        # Add custom metadata
-        if metadata:
-            doc_metadata.update(metadata)
-        
-        # Create document with frontmatter
-        post = frontmatter.Post(content, **doc_metadata)
-        
-        # Determine file path
-        category_dir = DOCS_ROOT / category
-        category_dir.mkdir(exist_ok=True)
-        
-        filename = f"{doc_id}_{title.lower().replace(' ', '_')}.md"
-        file_path = category_dir / filename
-        
-        # Save document
-        with open(file_path, 'w') as f:
-            f.write(frontmatter.dumps(post))
-        
-        # Index document
-        doc_data = load_document(file_path)
-        index_document(doc_data)
-        
-        metrics["documents_created"] += 1
-        logger.info(f"Created document: {doc_id} - {title}")
-        
-        return {
-            "id": doc_id,
-            "title": title,
-            "category": category,
-            "path": str(file_path.relative_to(DOCS_ROOT)),
-            "created": doc_metadata["created"]
-        }
+        result = await group_committer.submit(None, prepare_new_document, title, content, category, tags, metadata)
+        record_metric("documents_created")
+        return result
         
     except Exception as e:
         logger.error(f"Error creating document: {str(e)}")
         return {"error": str(e)}
 
+def prepare_document_update(doc_id: str, content: str, version_note: str) -> Dict[str, Any]:
+    """Build the updated file text for an existing document (runs on the write pool)"""
+    # Find existing document
+    existing = read_document(doc_id)
+    if "error" in existing:
+        return existing
+    
+    # Keep the pre-update text if this document has no history yet
+    file_path = DOCS_ROOT / existing["path"]
+    base = None
+    if not version_store.revisions(doc_id):
+        base = (dict(existing), file_path.read_text())
+    
+    # Update metadata
+    existing["modified"] = dt.now().isoformat()
+    existing["version"] = next_version(existing.get("version", "1.0"))
+    existing["version_note"] = version_note
+    
+    # Create updated document
+    post = frontmatter.Post(content, **{
+        k: v for k, v in existing.items() 
+        if k not in ["content", "path"]
+    })
+    
+    logger.info(f"Updated document: {doc_id} to version {existing['version']}")
+    
+    return {
+        "id": doc_id,
+        "path": existing["path"],
+        "text": frontmatter.dumps(post),
+        "version_note": version_note,
+        "base": base,
+        "result": {
+            "id": doc_id,
+            "version": existing["version"],
+            "modified": existing["modified"],
+            "version_note": version_note
+        }
+    }
+
 @mcp.tool("docs.update")
 async def update_document(
     doc_id: str,
@@ -402,44 +1592,37 @@ async def update_document(
         return {"error": "Document update requires approval token"}
     
     try:
-        # Find existing document
-        existing = await get_document(doc_id)
-        if "error" in existing:
-            return existing
-        
-        # Update metadata
-        existing["modified"] = dt.now().isoformat()
-        existing["version"] = str(float(existing.get("version", "1.0")) + 0.1)
-        existing["version_note"] = version_note
-        
-        # Create updated document
-        post = frontmatter.Post(content, **{
-            k: v for k, v in existing.items() 
-            if k not in ["content", "path"]
-        })
-        
-        # Save updated document
-        file_path = DOCS_ROOT / existing["path"]
-        with open(file_path, 'w') as f:
-            f.write(frontmatter.dumps(post))
-        
-        # Re-index document
-        doc_data = load_document(file_path)
-        index_document(doc_data)
+        result = await group_committer.submit(doc_id, prepare_document_update, doc_id, content, version_note)
+        if "error" not in result:
+            record_metric("documents_updated")
+        return result
         
-        metrics["documents_updated"] += 1
-        logger.info(f"Updated document: {doc_id} to version {existing['version']}")
+    except Exception as e:
+        logger.error(f"Error updating document {doc_id}: {str(e)}")
+        return {"error": str(e)}
+
+@mcp.tool("docs.history")
+async def document_history(doc_id: str) -> Dict[str, Any]:
+    """
+    List the recorded versions of a document.
+    
+    Args:
+        doc_id: Document ID
         
+    Returns:
+        Versions in order with their modification time, author, note and
+        how they are stored (snapshot or delta)
+    """
+    try:
+        revisions = await read_pool.run(version_store.revisions, doc_id)
         return {
-            "id": doc_id,
-            "version": existing["version"],
-            "modified": existing["modified"],
-            "version_note": version_note
+            "doc_id": doc_id,
+            "count": len(revisions),
+            "versions": revisions
         }
-        
     except Exception as e:
-        logger.error(f"Error updating document {doc_id}: {str(e)}")
-        return {"error": str(e)}
+        logger.error(f"Error reading history for {doc_id}: {str(e)}")
+        return {"error": str(e), "versions": []}
 
 @mcp.tool("docs.categories.list")
 async def list_categories() -> Dict[str, Any]:
@@ -449,17 +1632,22 @@ async def list_categories() -> Dict[str, Any]:
         "count": len(CATEGORIES)
     }
 
+def collect_tags() -> set:
+    """Gather tags from the stored fields of every indexed document"""
+    all_tags = set()
+    
+    for doc in get_searcher().documents():
+        if doc.get("tags"):
+            tags = doc["tags"].split(",")
+            all_tags.update(tag.strip() for tag in tags if tag.strip())
+    
+    return all_tags
+
 @mcp.tool("docs.tags.list")
 async def list_tags() -> Dict[str, Any]:
     """List all available tags."""
     try:
-        all_tags = set()
-        
-        with ix.searcher() as searcher:
-            for doc in searcher.documents():
-                if doc.get("tags"):
-                    tags = doc["tags"].split(",")
-                    all_tags.update(tag.strip() for tag in tags if tag.strip())
+        all_tags = await read_pool.run(collect_tags)
         
         return {
             "tags": sorted(list(all_tags)),
@@ -474,22 +1662,187 @@ async def list_tags() -> Dict[str, Any]:
 async def get_metrics() -> Dict[str, Any]:
     """Get documentation service metrics."""
     # Get top 10 popular documents
-    top_docs = sorted(
-        metrics["popular_documents"].items(),
-        key=lambda x: x[1],
-        reverse=True
-    )[:10]
+    top_docs = popular_documents.top(10)
+    with metrics_lock:
+        counts = dict(metrics)
     
     return {
         "service": SERVICE_NAME,
         "metrics": {
-            **metrics,
+            **counts,
             "popular_documents": dict(top_docs),
-            "recent_searches": metrics["search_queries"][-10:]
+            "recent_searches": list(recent_searches),
+            "thread_pools": {
+                "read": read_pool.stats(),
+                "write": write_pool.stats()
+            },
+            "startup": startup_timings
         },
         "timestamp": dt.now().isoformat()
     }
 
+# Filesystem watcher
+def load_indexed_files():
+    """Seed indexed_files and the catalog from the stored fields in the index"""
+    indexed_files.clear()
+    catalog.clear()
+    for stored in get_searcher().documents():
+        track_document({
+            **stored,
+            "tags": [tag for tag in stored.get("tags", "").split(",") if tag],
+            "created": stored["created"].isoformat() if stored.get("created") else None,
+            "modified": stored["modified"].isoformat() if stored.get("modified") else None
+        })
+
+def changed_paths() -> Set[str]:
+    """Paths whose mtime differs from the indexed copy, plus indexed files that are gone"""
+    known = dict(indexed_files)
+    changed = set()
+    for doc_file in DOCS_ROOT.rglob("*.md"):
+        rel_path = str(doc_file.relative_to(DOCS_ROOT))
+        entry = known.pop(rel_path, None)
+        if entry is None or entry[1] != file_mtime(rel_path):
+            changed.add(rel_path)
+    changed.update(known)
+    return changed
+
+def apply_file_changes(paths: Set[str]) -> Dict[str, int]:
+    """Index changed files and drop deleted ones in a single commit (runs on the write pool)"""
+    updates, deletes = [], []
+    for rel_path in paths:
+        known = indexed_files.get(rel_path)
+        mtime = file_mtime(rel_path)
+        if mtime is None:
+            if known:
+                deletes.append((rel_path, known[0]))
+            continue
+        if known and known[1] == mtime:
+            continue
+        doc_data = load_document(DOCS_ROOT / rel_path)
+        if not doc_data or not doc_data.get("id"):
+            continue
+        try:
+            fields = index_fields(doc_data)
+        except Exception as e:
+            logger.warning(f"Skipping {rel_path}: {e}")
+            continue
+        updates.append((doc_data, fields, known))
+    
+    if not updates and not deletes:
+        return {"updated": 0, "deleted": 0}
+    
+    writer = ix.writer()
+    passage_writer = passage_ix.writer()
+    for rel_path, doc_id in deletes:
+        writer.delete_by_term("id", doc_id)
+        passage_writer.delete_by_term("parent_id", doc_id)
+    for doc_data, fields, known in updates:
+        # A file that was rewritten with a different ID replaces the old document
+        if known and known[0] != doc_data["id"]:
+            writer.delete_by_term("id", known[0])
+            passage_writer.delete_by_term("parent_id", known[0])
+        writer.update_document(**fields)
+        write_passages(passage_writer, doc_data)
+    passage_writer.commit()
+    writer.commit()
+    
+    for rel_path, doc_id in deletes:
+        untrack_document(rel_path, doc_id)
+        embedding_store.remove(doc_id)
+    for doc_data, _, known in updates:
+        if known and known[0] != doc_data["id"]:
+            catalog.pop(known[0], None)
+        track_document(doc_data)
+    embed_documents([doc_data for doc_data, _, _ in updates])
+    refresh_searcher()
+    
+    logger.info(f"Reindexed {len(updates)} changed and removed {len(deletes)} deleted documents")
+    return {"updated": len(updates), "deleted": len(deletes)}
+
+class DocsWatcher(FileSystemEventHandler):
+    """Watches DOCS_ROOT and feeds debounced batches of changed files to the index writer.
+
+    Uses inotify through watchdog when installed, otherwise polls file mtimes.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pending: Set[str] = set()
+        self.rescan = False
+        self.last_event = 0.0
+        self.wakeup = threading.Event()
+        self.observer = None
+
+    def start(self):
+        if Observer is not None:
+            self.observer = Observer()
+            self.observer.schedule(self, str(DOCS_ROOT), recursive=True)
+            self.observer.start()
+            logger.info(f"Watching {DOCS_ROOT} for changes (inotify)")
+        else:
+            threading.Thread(target=self.poll, name="docs-watch-poll", daemon=True).start()
+            logger.info(f"Watching {DOCS_ROOT} for changes (polling every {DOCS_WATCH_POLL_INTERVAL}s)")
+        threading.Thread(target=self.flush_loop, name="docs-watch-flush", daemon=True).start()
+        # Pick up anything that changed while the service was down
+        self.request_rescan()
+
+    def on_any_event(self, event):
+        if event.is_directory:
+            if event.event_type in ("moved", "deleted"):
+                self.request_rescan()
+            return
+        paths = [event.src_path, getattr(event, "dest_path", None)]
+        self.enqueue(path for path in paths if path and path.endswith(".md"))
+
+    def enqueue(self, paths):
+        rel_paths = set()
+        for path in paths:
+            try:
+                rel_paths.add(str(Path(path).relative_to(DOCS_ROOT)))
+            except ValueError:
+                continue
+        if not rel_paths:
+            return
+        with self.lock:
+            self.pending.update(rel_paths)
+            self.last_event = time.monotonic()
+        self.wakeup.set()
+
+    def request_rescan(self):
+        with self.lock:
+            self.rescan = True
+            self.last_event = time.monotonic()
+        self.wakeup.set()
+
+    def poll(self):
+        while True:
+            time.sleep(DOCS_WATCH_POLL_INTERVAL)
+            try:
+                self.enqueue(str(DOCS_ROOT / rel_path) for rel_path in changed_paths())
+            except Exception as e:
+                logger.warning(f"Polling {DOCS_ROOT} failed: {e}")
+
+    def flush_loop(self):
+        while True:
+            self.wakeup.wait()
+            # Wait for the burst of events to go quiet before touching the index
+            while True:
+                with self.lock:
+                    quiet_for = time.monotonic() - self.last_event
+                if quiet_for >= DOCS_WATCH_DEBOUNCE:
+                    break
+                time.sleep(DOCS_WATCH_DEBOUNCE - quiet_for)
+            with self.lock:
+                batch, self.pending = self.pending, set()
+                rescan, self.rescan = self.rescan, False
+                self.wakeup.clear()
+            try:
+                if rescan:
+                    batch |= changed_paths()
+                if batch:
+                    write_pool.executor.submit(apply_file_changes, batch).result()
+            except Exception as e:
+                logger.error(f"Failed to apply documentation changes: {e}", exc_info=True)
+
 # Initialize sample documentation
 def initialize_sample_docs():
     """Create sample documentation if none exists"""
@@ -539,29 +1892,21 @@ This guide will help you get started with the MCP system.
         }
     ]
     
-    for doc in sample_docs:
-        # Check if docs exist
-        if any(DOCS_ROOT.rglob("*.md")):
-            break
-            
-        # Create sample doc
-        create_doc_sync(
+    # Only seed an empty documentation tree
+    if next(DOCS_ROOT.rglob("*.md"), None):
+        logger.info("Documents already exist, skipping sample docs")
+        return 0
+    
+    commit_writes([
+        prepare_new_document(
             title=doc["title"],
             content=doc["content"],
             category=doc["category"],
             tags=doc["tags"]
         )
-
-def create_doc_sync(title, content, category, tags):
-    """Synchronous version for initialization"""
-    import asyncio
-    asyncio.run(create_document(
-        title=title,
-        content=content,
-        category=category,
-        tags=tags,
-        approval_token="init"
-    ))
+        for doc in sample_docs
+    ])
+    return len(sample_docs)
 
 # Initialize on startup
 logger.info(f"Documentation MCP Server starting on port {MCP_PORT}")
@@ -569,22 +1914,62 @@ logger.info(f"Documents root: {DOCS_ROOT}")
 logger.info(f"Approval required: {REQUIRE_APPROVAL}")
 
 # Create category directories
-for category in CATEGORIES:
-    (DOCS_ROOT / category).mkdir(exist_ok=True)
+with startup_phase("directories"):
+    for category in CATEGORIES:
+        (DOCS_ROOT / category).mkdir(exist_ok=True)
 
-# Initialize sample docs
-try:
-    initialize_sample_docs()
-except Exception as e:
-    logger.warning(f"Could not initialize sample docs: {e}")
+# Repopulate a freshly created index from the documents on disk
+if index_needs_rebuild:
+    with startup_phase("rebuild_index"):
+        try:
+            reindex_all_documents()
+        except Exception as e:
+            logger.warning(f"Could not rebuild search index: {e}")
+
+# Restore the catalog snapshot saved at the last shutdown, falling back to
+# the index's stored fields when the index has moved on since
+with startup_phase("catalog"):
+    try:
+        catalog_restored = not index_needs_rebuild and load_catalog()
+        if not catalog_restored and not index_needs_rebuild:
+            load_indexed_files()
+    except Exception as e:
+        catalog_restored = False
+        logger.warning(f"Could not load document catalog: {e}")
+
+# Finish writes interrupted by a crash before serving requests
+with startup_phase("journal_replay"):
+    try:
+        replay_write_journal()
+    except Exception as e:
+        logger.error(f"Could not replay write journal: {e}", exc_info=True)
+
+# The embedding model loads in the background; hybrid searches fall back to keyword results until it is ready
+embedding_loader = start_embedding_model_load()
+
+startup_timings["total"] = round(sum(startup_timings.values()), 4)
+logger.info(f"Startup finished in {startup_timings['total']}s "
+            f"(catalog {'restored' if catalog_restored else 'rebuilt'}): {startup_timings}")
+
+def save_catalog_on_exit():
+    try:
+        save_catalog()
+    except Exception as e:
+        logger.warning(f"Could not save document catalog: {e}")
+
+atexit.register(save_catalog_on_exit)
 
-if __name__ == "__main__":
+if __name__ == "__main__" and "--init-samples" in sys.argv[1:]:
+    # One-off: seed an empty DOCS_ROOT with the sample documentation
+    created = initialize_sample_docs()
+    logger.info(f"Created {created} sample documents")
+elif __name__ == "__main__":
     # Run the FastMCP server
     import uvicorn
     from starlette.applications import Starlette
     from starlette.routing import Mount
     from starlette.staticfiles import StaticFiles
-    from starlette.responses import FileResponse
+    from starlette.responses import FileResponse, Response
     from starlette.exceptions import HTTPException
     
     # Get the MCP SSE app
@@ -598,6 +1983,12 @@ if __name__ == "__main__":
     if static_path.exists():
         app.mount("/static", StaticFiles(directory=str(static_path)), name="static")
     
+    # Serve Prometheus metrics
+    if generate_latest:
+        @app.route("/metrics")
+        async def prometheus_metrics(request):
+            return Response(generate_latest(prometheus_registry), media_type=CONTENT_TYPE_LATEST)
+    
     # Serve index.html at root
     @app.route("/")
     async def homepage(request):
@@ -609,4 +2000,8 @@ if __name__ == "__main__":
     # Mount the MCP app for all other routes
     app.mount("/", mcp_app)
     
+    # Keep the index in sync with edits made directly under DOCS_ROOT
+    if DOCS_WATCH_ENABLED:
+        DocsWatcher().start()
+    
     uvicorn.run(app, host="0.0.0.0", port=MCP_PORT, log_level="info")
\ No newline at end of file
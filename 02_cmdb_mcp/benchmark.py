@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+"""
+Benchmark the CMDB MCP Service against a synthetic server inventory.
+
+Generates inventories with configurable row counts, column cardinalities and
+string lengths, then measures load time, memory footprint, exact hostname
+lookups, substring findServers queries and multi-field cmdb.query calls for
+each backend (in-memory CSV store, SQLite) through the tool functions in
+mcp_server.py. Results are printed and optionally written as JSON with a
+stable layout (one entry per rows x backend) so runs, indexes and backends
+can be compared over time.
+
+Usage:
+    python benchmark.py run --rows 10000,100000,1000000 --output results.json
+    python benchmark.py generate --rows 100000 --out /tmp/inventory.csv
+"""
+import argparse
+import csv
+import gc
+import json
+import logging
+import os
+import platform
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+OS_NAMES = ["Linux", "Windows", "Docker", "FreeBSD", "AIX", "Solaris", "ESXi", "macOS"]
+ROLES = ["web", "app", "db", "cache", "queue", "batch", "proxy", "build"]
+ENVIRONMENTS = ["prod", "staging", "dev", "test"]
+SYLLABLES = ["ka", "lo", "mi", "ne", "ru", "ta", "vi", "so", "pe", "da", "zu", "fo", "gri", "tan", "mel", "dor"]
+COLUMNS = ["hostname", "ip_address", "os_type", "os_version", "services", "environment", "location",
+           "owner", "cpu_count", "memory_gb", "path", "notes"]
+SCHEMA_VERSION = 1
+
+def zipf_weights(count, skew):
+    """Cumulative weights for rank-frequency sampling"""
+    total, cumulative = 0.0, []
+    for rank in range(1, count + 1):
+        total += 1.0 / rank ** skew
+        cumulative.append(total)
+    return cumulative
+
+def make_profile(args):
+    """Distinct values of each categorical column, derived from the seed"""
+    rng = random.Random(args.seed)
+    words = sorted({"".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))) for _ in range(500)})
+    return {
+        "os_types": [OS_NAMES[n] if n < len(OS_NAMES) else f"os{n}" for n in range(args.os_types)],
+        "os_versions": [f"{n // 4 + 1}.{n % 4}" for n in range(args.os_versions)],
+        "services": [f"{rng.choice(words)}-{n}" for n in range(args.services)],
+        "locations": [f"dc{n:03d}" for n in range(args.locations)],
+        "owners": [f"team-{rng.choice(words)}-{n}" for n in range(args.owners)],
+        "words": words
+    }
+
+def hostname(n, role):
+    return f"{role}-{n:07d}.example.com"
+
+def generate_inventory(path, args):
+    """Write an inventory CSV of `args.rows` servers and return the value profile.
+
+    Categorical columns follow a Zipf distribution (`--skew`), so some values
+    match a large share of rows and others very few; `notes` is free text of
+    about `--notes-length` characters on a `--notes-fill` share of rows.
+    """
+    profile = make_profile(args)
+    rng = random.Random(args.seed)
+    weights = {key: zipf_weights(len(profile[key]), args.skew) for key in ("os_types", "os_versions", "services", "locations", "owners")}
+    pick = lambda key: rng.choices(profile[key], cum_weights=weights[key])[0]
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(COLUMNS)
+        for n in range(args.rows):
+            role = ROLES[n % len(ROLES)]
+            services = set(rng.choices(profile["services"], cum_weights=weights["services"], k=args.services_per_host))
+            notes = ""
+            if rng.random() < args.notes_fill:
+                notes_words = []
+                while sum(len(word) + 1 for word in notes_words) < args.notes_length:
+                    notes_words.append(rng.choice(profile["words"]))
+                notes = " ".join(notes_words)
+            cpus = rng.choice([2, 4, 8, 16, 32, 64])
+            writer.writerow([
+                hostname(n, role),
+                f"10.{n >> 16 & 255}.{n >> 8 & 255}.{n & 255}",
+                pick("os_types"),
+                pick("os_versions"),
+                ",".join(sorted(services)),
+                rng.choice(ENVIRONMENTS),
+                pick("locations"),
+                pick("owners"),
+                cpus,
+                cpus * rng.choice([2, 4, 8]),
+                f"/srv/{role}/{n}",
+                notes
+            ])
+    return profile
+
+def make_lookups(rng, rows, count, miss_ratio):
+    names = []
+    for _ in range(count):
+        if rng.random() < miss_ratio:
+            names.append(f"missing-{rng.randrange(10 ** 9)}.example.com")
+        else:
+            n = rng.randrange(rows)
+            name = hostname(n, ROLES[n % len(ROLES)])
+            names.append(name.upper() if rng.random() < 0.2 else name)
+    return names
+
+def make_finds(rng, rows, profile, count):
+    """Substring queries over text and categorical columns, from selective to broad"""
+    finds = []
+    for _ in range(count):
+        n = rng.randrange(rows)
+        kind = rng.randrange(6)
+        if kind == 0:
+            finds.append(("hostname", f"-{n:07d}"[:rng.randint(5, 8)]))
+        elif kind == 1:
+            finds.append(("ip_address", f"10.{n >> 16 & 255}.{n >> 8 & 255}."))
+        elif kind == 2:
+            finds.append(("path", f"/{ROLES[n % len(ROLES)]}/{n}"[:rng.randint(6, 12)]))
+        elif kind == 3:
+            finds.append(("notes", rng.choice(profile["words"])))
+        elif kind == 4:
+            finds.append(("os_type", rng.choice(profile["os_types"])[:3].lower()))
+        else:
+            finds.append(("services", rng.choice(profile["services"]).split("-")[0]))
+    return finds
+
+def make_queries(rng, profile, count):
+    """cmdb.query filter lists mixing equality, membership, ranges, substrings and boolean groups"""
+    queries = []
+    for _ in range(count):
+        kind = rng.randrange(6)
+        sort = None
+        if kind == 0:
+            filters = [{"field": "os_type", "op": "eq", "value": rng.choice(profile["os_types"])},
+                       {"field": "environment", "op": "eq", "value": rng.choice(ENVIRONMENTS)}]
+        elif kind == 1:
+            filters = [{"field": "services", "op": "eq", "value": rng.choice(profile["services"])},
+                       {"field": "location", "op": "in", "value": rng.sample(profile["locations"], min(2, len(profile["locations"])))}]
+        elif kind == 2:
+            filters = [{"field": "cpu_count", "op": "range", "value": {"gte": rng.choice([8, 16, 32])}},
+                       {"field": "memory_gb", "op": "range", "value": {"lt": rng.choice([64, 128, 256])}},
+                       {"field": "owner", "op": "eq", "value": rng.choice(profile["owners"])}]
+            sort = ["-cpu_count"]
+        elif kind == 3:
+            filters = [{"field": "hostname", "op": "prefix", "value": f"{rng.choice(ROLES)}-00{rng.randrange(10)}"},
+                       {"not": {"field": "os_type", "op": "eq", "value": profile["os_types"][0]}}]
+        elif kind == 4:
+            filters = [{"any": [{"field": "owner", "op": "eq", "value": rng.choice(profile["owners"])},
+                                {"field": "services", "op": "eq", "value": rng.choice(profile["services"])}]},
+                       {"field": "environment", "op": "eq", "value": "prod"}]
+        else:
+            filters = [{"field": "notes", "op": "contains", "value": rng.choice(profile["words"])},
+                       {"field": "os_version", "op": "in", "value": rng.sample(profile["os_versions"], min(3, len(profile["os_versions"])))}]
+        queries.append((filters, sort))
+    return queries
+
+def summarize(latencies, elapsed=None):
+    """Latency percentiles in milliseconds plus throughput"""
+    ordered = sorted(latencies)
+    def percentile(p):
+        return round(ordered[min(int(len(ordered) * p), len(ordered) - 1)] * 1000, 3) if ordered else 0.0
+    elapsed = elapsed if elapsed is not None else sum(ordered)
+    return {
+        "ops": len(ordered),
+        "ops_per_sec": round(len(ordered) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": percentile(0.50),
+        "p95_ms": percentile(0.95),
+        "p99_ms": percentile(0.99),
+        "max_ms": round(ordered[-1] * 1000, 3) if ordered else 0.0
+    }
+
+def run_sequential(calls):
+    """Time each call; tool error results abort the run"""
+    latencies = []
+    started = time.perf_counter()
+    for call in calls:
+        call_started = time.perf_counter()
+        result = call()
+        latencies.append(time.perf_counter() - call_started)
+        if isinstance(result, dict) and "error" in result:
+            raise RuntimeError(result["error"])
+    return summarize(latencies, time.perf_counter() - started)
+
+def rss_bytes():
+    """Resident set size of this process (Linux), or None"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return None
+
+def load_backend(server, backend, csv_path, db_path):
+    """Build a fresh store for `backend` and make it the one the tools serve from"""
+    server.local_cmdb = server.sqlite_cmdb = None
+    gc.collect()
+    rss_before = rss_bytes()
+    started = time.perf_counter()
+    if backend == "csv":
+        store = server.CmdbStore(server.pd.read_csv(csv_path), server.file_signature(csv_path))
+        server.swap_local_cmdb(store)
+        store_bytes = store.memory_bytes()
+    else:
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(db_path + suffix):
+                os.remove(db_path + suffix)
+        store = server.SqliteCmdb(db_path, server.SQLITE_MMAP_SIZE)
+        store.import_csv(csv_path)
+        server.sqlite_cmdb = store
+        store_bytes = store.size_bytes()
+    elapsed = time.perf_counter() - started
+    rss_after = rss_bytes()
+    return len(store), {
+        "seconds": round(elapsed, 3),
+        "rows_per_sec": round(len(store) / elapsed, 1) if elapsed else 0.0
+    }, {
+        # In-memory size for the CSV store, database file size for SQLite
+        "store_bytes": store_bytes,
+        "rss_delta_bytes": rss_after - rss_before if rss_before is not None and rss_after is not None else None
+    }
+
+def run_benchmark(args):
+    workdir = Path(args.workdir or tempfile.mkdtemp(prefix="cmdb-bench-"))
+    workdir.mkdir(parents=True, exist_ok=True)
+    os.environ.update({
+        "LOCAL_CMDB_PATH": str(workdir / "none.csv"),
+        "CMDB_RELATIONS_PATH": str(workdir / "none_relations.csv"),
+        "CMDB_BACKEND": "csv",
+        "CMDB_INDEXED_COLUMNS": args.indexed_columns,
+        "CMDB_TRIGRAM_COLUMNS": args.trigram_columns,
+        "CMDB_MULTIVALUE_COLUMNS": "services"
+    })
+    # Import against an empty inventory; each dataset below is loaded and measured on its own
+    sys.path.insert(0, str(Path(__file__).parent))
+    import mcp_server as server
+    logging.getLogger().setLevel(logging.WARNING)
+
+    results = {
+        "schema_version": SCHEMA_VERSION,
+        "generated_at": datetime.now().isoformat(),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "pandas": server.pd.__version__ if server.pd else None,
+            "numpy": server.np.__version__ if server.np else None,
+            "sqlite": sqlite3.sqlite_version
+        },
+        "config": {key: value for key, value in vars(args).items() if key not in ("command", "output")},
+        "runs": []
+    }
+    backends = [name.strip() for name in args.backends.split(",") if name.strip()]
+    for rows in [int(count) for count in args.rows.split(",")]:
+        csv_path = workdir / f"inventory_{rows}.csv"
+        started = time.perf_counter()
+        dataset = argparse.Namespace(**{**vars(args), "rows": rows})
+        profile = generate_inventory(csv_path, dataset)
+        generate_sec = round(time.perf_counter() - started, 3)
+        for backend in backends:
+            loaded, load, memory = load_backend(server, backend, str(csv_path), str(workdir / f"inventory_{rows}.sqlite"))
+            rng = random.Random(args.seed)
+            run = {
+                "rows": rows,
+                "backend": backend,
+                "dataset": {"rows_loaded": loaded, "csv_bytes": csv_path.stat().st_size, "generate_sec": generate_sec},
+                "load": load,
+                "memory": memory
+            }
+            run["hostname_lookup"] = run_sequential(
+                (lambda name=name: server.get_local_server_info(name))
+                for name in make_lookups(rng, rows, args.lookups, args.miss_ratio)
+            )
+            run["find_servers"] = run_sequential(
+                (lambda field=field, value=value: server.find_local_servers(field, value, limit=args.page_size))
+                for field, value in make_finds(rng, rows, profile, args.finds)
+            )
+            run["query"] = run_sequential(
+                (lambda filters=filters, sort=sort: server.query_cmdb(filters, sort=sort, limit=args.page_size))
+                for filters, sort in make_queries(rng, profile, args.queries)
+            )
+            results["runs"].append(run)
+            print_run(run)
+        if not args.keep:
+            csv_path.unlink()
+    results["workdir"] = str(workdir)
+    return results
+
+def print_header():
+    print(f"{'rows':>9} {'backend':<8}{'scenario':<17}{'ops':>7}{'ops/s':>11}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+
+def print_run(run):
+    memory = run["memory"]
+    print(f"{run['rows']:>9} {run['backend']:<8}load {run['load']['seconds']}s ({run['load']['rows_per_sec']} rows/s), "
+          f"store {memory['store_bytes']} bytes, rss +{memory['rss_delta_bytes']} bytes")
+    for name in ("hostname_lookup", "find_servers", "query"):
+        stats = run[name]
+        print(f"{run['rows']:>9} {run['backend']:<8}{name:<17}{stats['ops']:>7}{stats['ops_per_sec']:>11}"
+              f"{stats['p50_ms']:>10}{stats['p95_ms']:>10}{stats['p99_ms']:>10}")
+
+def add_inventory_arguments(parser):
+    parser.add_argument("--os-types", type=int, default=6, help="Distinct os_type values")
+    parser.add_argument("--os-versions", type=int, default=24, help="Distinct os_version values")
+    parser.add_argument("--services", type=int, default=200, help="Distinct service names")
+    parser.add_argument("--services-per-host", type=int, default=3)
+    parser.add_argument("--locations", type=int, default=40, help="Distinct locations")
+    parser.add_argument("--owners", type=int, default=300, help="Distinct owner teams")
+    parser.add_argument("--notes-length", type=int, default=60, help="Characters of free text in notes")
+    parser.add_argument("--notes-fill", type=float, default=0.3, help="Share of rows with notes")
+    parser.add_argument("--skew", type=float, default=1.0, help="Zipf exponent of categorical value popularity")
+    parser.add_argument("--seed", type=int, default=42)
+
+def main():
+    parser = argparse.ArgumentParser(description="CMDB MCP Service benchmark")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    generate = commands.add_parser("generate", help="Only write a synthetic inventory CSV")
+    generate.add_argument("--rows", type=int, default=100000)
+    add_inventory_arguments(generate)
+    generate.add_argument("--out", required=True, help="CSV file to write")
+
+    run = commands.add_parser("run", help="Generate inventories and run all scenarios")
+    run.add_argument("--rows", default="10000,100000,1000000", help="Comma-separated inventory sizes")
+    add_inventory_arguments(run)
+    run.add_argument("--backends", default="csv,sqlite", help="Comma-separated backends: csv, sqlite")
+    run.add_argument("--indexed-columns", default="os_type,services,environment,location,owner",
+                     help="CMDB_INDEXED_COLUMNS for the run")
+    run.add_argument("--trigram-columns", default="hostname,ip_address,path",
+                     help="CMDB_TRIGRAM_COLUMNS for the run")
+    run.add_argument("--lookups", type=int, default=5000, help="Hostname lookups per run")
+    run.add_argument("--miss-ratio", type=float, default=0.1, help="Share of lookups for unknown hostnames")
+    run.add_argument("--finds", type=int, default=300, help="findServers queries per run")
+    run.add_argument("--queries", type=int, default=300, help="cmdb.query calls per run")
+    run.add_argument("--page-size", type=int, default=100)
+    run.add_argument("--workdir", help="Directory for generated inventories (default: a new temp dir)")
+    run.add_argument("--keep", action="store_true", help="Keep generated CSV files")
+    run.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    if args.command == "generate":
+        generate_inventory(args.out, args)
+        print(f"Wrote {args.rows} servers to {args.out}")
+        return
+
+    print_header()
+    results = run_benchmark(args)
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2, sort_keys=True))
+        print(f"Results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -1,34 +1,47 @@
 import os
+import asyncio
+import base64
+import csv
+import functools
+import io
 import logging
-from typing import Optional, List, Dict, Any
+import random
+import re
+import sqlite3
+import threading
+from typing import Optional, List, Dict, Any, Set, AsyncIterator, Iterator, Union
+from collections import OrderedDict
 
-from mcp.server.fastmcp import FastMCP
+from mcp.server.fastmcp import FastMCP, Context
 
 # Add these imports
 import time
 from starlette.routing import Route
-from starlette.responses import JSONResponse
+from starlette.responses import JSONResponse, StreamingResponse
 import uvicorn
 
 # Add these imports for JSON logging
 import json
-from datetime import datetime as dt # Alias to avoid conflict
+from datetime import datetime as dt, timedelta, timezone # Alias to avoid conflict
+from zoneinfo import ZoneInfo
 
 # Optional imports based on chosen backends
 try:
+    import numpy as np
     import pandas as pd
 except ImportError:
+    np = None
     pd = None
 
-# try:
-#     import requests
-# except ImportError:
-#     requests = None
+try:
+    import httpx
+except ImportError:
+    httpx = None
 
-# try:
-#     import pysnow
-# except ImportError:
-#     pysnow = None
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
 
 # --- JSON Formatter Class ---
 class JSONFormatter(logging.Formatter):
@@ -74,38 +87,1237 @@ LOCAL_CMDB_PATH = os.getenv("LOCAL_CMDB_PATH", "/data/cmdb.csv") # Example: CSV
 SERVICENOW_INSTANCE = os.getenv("SERVICENOW_INSTANCE")
 SERVICENOW_USER = os.getenv("SERVICENOW_USER")
 SERVICENOW_PASSWORD_SECRET_PATH = os.getenv("SERVICENOW_PASSWORD_SECRET_PATH", "/run/secrets/servicenow_password")
+SERVICENOW_PAGE_SIZE = int(os.getenv("SERVICENOW_PAGE_SIZE", 1000))
+SERVICENOW_CONCURRENCY = int(os.getenv("SERVICENOW_CONCURRENCY", 4)) # Parallel page fetches
+SERVICENOW_MAX_CONNECTIONS = int(os.getenv("SERVICENOW_MAX_CONNECTIONS", 10))
+SERVICENOW_TIMEOUT = float(os.getenv("SERVICENOW_TIMEOUT", 30.0))
+SERVICENOW_MAX_RETRIES = int(os.getenv("SERVICENOW_MAX_RETRIES", 5))
+SERVICENOW_CACHE_TTL = float(os.getenv("SERVICENOW_CACHE_TTL", 300.0))
+SERVICENOW_CACHE_SIZE = int(os.getenv("SERVICENOW_CACHE_SIZE", 10000))
+SERVICENOW_QUERY_MAX_RECORDS = int(os.getenv("SERVICENOW_QUERY_MAX_RECORDS", 10000))
+SERVICENOW_SYNC_TABLES = [t.strip() for t in os.getenv("SERVICENOW_SYNC_TABLES", "").split(",") if t.strip()] # Tables mirrored into the SQLite CMDB
+SERVICENOW_SYNC_FIELDS = [f.strip() for f in os.getenv("SERVICENOW_SYNC_FIELDS", "").split(",") if f.strip()] # Empty mirrors every field
+SERVICENOW_SYNC_HOSTNAME_FIELD = os.getenv("SERVICENOW_SYNC_HOSTNAME_FIELD", "name")
+SERVICENOW_SYNC_INTERVAL = float(os.getenv("SERVICENOW_SYNC_INTERVAL", 60.0)) # Seconds between delta syncs
+SERVICENOW_SYNC_FULL_INTERVAL = float(os.getenv("SERVICENOW_SYNC_FULL_INTERVAL", 86400.0)) # Seconds between full snapshots; 0 only takes the initial one
+SERVICENOW_SYNC_OVERLAP = int(os.getenv("SERVICENOW_SYNC_OVERLAP", 60)) # Seconds re-read before the watermark
+SERVICENOW_TIMEZONE = os.getenv("SERVICENOW_TIMEZONE", "") # Time zone of SERVICENOW_USER (IANA name); empty sends UTC watermarks as GlideDateTime values
+HOSTNAME_COLUMN = os.getenv("CMDB_HOSTNAME_COLUMN", "hostname")
+INDEXED_COLUMNS = [col.strip().lower() for col in os.getenv("CMDB_INDEXED_COLUMNS", "os_type,services").split(",") if col.strip()]
+MULTIVALUE_COLUMNS = [col.strip().lower() for col in os.getenv("CMDB_MULTIVALUE_COLUMNS", "services").split(",") if col.strip()]
+CATEGORICAL_MAX_RATIO = 0.5 # Text columns with at most this share of distinct values become categoricals
+TRIGRAM_COLUMNS = [col.strip().lower() for col in os.getenv("CMDB_TRIGRAM_COLUMNS", f"{HOSTNAME_COLUMN},ip_address").split(",") if col.strip()]
+TRIGRAM_CHUNK_BYTES = 16 * 1024 * 1024 # Text bytes turned into trigrams at a time while building an index
+FIND_DEFAULT_LIMIT = int(os.getenv("CMDB_FIND_DEFAULT_LIMIT", 100))
+FIND_MAX_LIMIT = int(os.getenv("CMDB_FIND_MAX_LIMIT", 1000))
+BATCH_CHUNK_SIZE = int(os.getenv("CMDB_BATCH_CHUNK_SIZE", 500))
+BATCH_MAX_HOSTNAMES = int(os.getenv("CMDB_BATCH_MAX_HOSTNAMES", 10000))
+QUERY_OPS = ["eq", "in", "contains", "prefix", "range"]
+RANGE_BOUNDS = ["gt", "gte", "lt", "lte"]
+REQUIRE_APPROVAL = os.getenv("REQUIRE_APPROVAL", "true").lower() == "true" # Tools that modify CMDB data need an approval_token
+CMDB_BACKEND = os.getenv("CMDB_BACKEND", "csv").lower() # "csv" (in-memory store) or "sqlite"
+SQLITE_PATH = os.getenv("CMDB_SQLITE_PATH", "/data/cmdb.sqlite")
+SQLITE_MMAP_SIZE = int(os.getenv("CMDB_SQLITE_MMAP_SIZE", 256 * 1024 * 1024))
+IMPORT_ROOT = os.getenv("CMDB_IMPORT_ROOT", os.path.dirname(LOCAL_CMDB_PATH) or ".")
+IMPORT_CHUNK_ROWS = 5000
+RELOAD_INTERVAL = float(os.getenv("CMDB_RELOAD_INTERVAL", 5.0)) # Seconds between checks of LOCAL_CMDB_PATH; 0 disables hot reload
+RELATIONS_PATH = os.getenv("CMDB_RELATIONS_PATH", os.path.join(os.path.dirname(LOCAL_CMDB_PATH) or ".", "cmdb_relations.csv")) # parent,child,type edges
+RELATION_TABLE = "cmdb_rel_ci" # ServiceNow relationship table; mirrored as edges when listed in SERVICENOW_SYNC_TABLES
+GRAPH_DIRECTIONS = ["upstream", "downstream", "both"]
+GRAPH_MAX_DEPTH = int(os.getenv("CMDB_GRAPH_MAX_DEPTH", 10))
+GRAPH_MAX_NODES = int(os.getenv("CMDB_GRAPH_MAX_NODES", 5000)) # Traversals stop (truncated) after visiting this many CIs
+GRAPH_CACHE_SIZE = int(os.getenv("CMDB_GRAPH_CACHE_SIZE", 1024)) # Memoized traversals per graph generation
+EXPORT_FORMATS = ["ndjson", "arrow"]
+EXPORT_CHUNK_ROWS = int(os.getenv("CMDB_EXPORT_CHUNK_ROWS", 10000))
+EXPORT_MAX_ROWS = int(os.getenv("CMDB_EXPORT_MAX_ROWS", 100000)) # Per cmdb.local.export call; /export streams everything
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "arrow": "application/vnd.apache.arrow.stream"}
+
+# --- Export Encoding ---
+class ArrowStreamEncoder:
+    """Writes record batches as one Arrow IPC stream and hands back the bytes produced by each write"""
+    def __init__(self, schema):
+        self.schema = schema
+        self.buffer = io.BytesIO()
+        self.writer = pa.ipc.new_stream(self.buffer, schema)
+
+    def take(self) -> bytes:
+        data = self.buffer.getvalue()
+        self.buffer.seek(0)
+        self.buffer.truncate()
+        return data
+
+    def write(self, batch) -> bytes:
+        self.writer.write_batch(batch)
+        return self.take()
+
+    def close(self) -> bytes:
+        self.writer.close()
+        return self.take()
+
+# --- Local CMDB Store ---
+def compact_frame(frame):
+    """Normalize column names and shrink column dtypes (categoricals, downcast and nullable integers)"""
+    frame = frame.reset_index(drop=True)
+    frame.columns = [str(col).lower().strip() for col in frame.columns]
+    for col in frame.columns:
+        series = frame[col]
+        if pd.api.types.is_integer_dtype(series):
+            frame[col] = pd.to_numeric(series, downcast="integer")
+        elif (pd.api.types.is_float_dtype(series) and series.notna().any() and (series.dropna() % 1 == 0).all()
+              and series.dropna().abs().max() < 2 ** 63):
+            # Integers with gaps are read as floats; keep them integers (49, not 49.0) with a missing-value mask.
+            # Values beyond int64 (e.g. 1e20) stay float64
+            frame[col] = series.astype("Int64")
+        elif not pd.api.types.is_numeric_dtype(series) and series.nunique(dropna=True) <= CATEGORICAL_MAX_RATIO * len(series):
+            frame[col] = series.astype("category")
+    return frame
+
+def value_keys(value: str, multivalue: bool) -> List[str]:
+    items = value.split(",") if multivalue else [value]
+    return [key for key in (item.strip().lower() for item in items) if key]
+
+def build_value_index(series, multivalue: bool = False) -> Dict[str, Any]:
+    """Map each lowercased value (or comma-separated item) to the row positions holding it"""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        # Group rows by category code, then fan each category out to its keys
+        codes = series.cat.codes.to_numpy()
+        order = np.argsort(codes, kind="stable").astype(np.int32)
+        bounds = np.searchsorted(codes[order], np.arange(len(series.cat.categories) + 1))
+        grouped: Dict[str, list] = {}
+        for code, category in enumerate(series.cat.categories):
+            rows = order[bounds[code]:bounds[code + 1]]
+            for key in value_keys(str(category), multivalue):
+                grouped.setdefault(key, []).append(rows)
+        return {
+            key: parts[0] if len(parts) == 1 else np.unique(np.concatenate(parts))
+            for key, parts in grouped.items()
+        }
+    values = series.dropna().astype(str)
+    if multivalue:
+        values = values.str.split(",").explode()
+    values = values.str.strip().str.lower()
+    values = values[values != ""]
+    pairs = pd.DataFrame({"row": values.index.to_numpy(dtype=np.int32), "value": values.to_numpy()})
+    if multivalue:
+        pairs = pairs.drop_duplicates()
+    if pairs.empty:
+        return {}
+    codes, uniques = pd.factorize(pairs["value"])
+    order = np.argsort(codes, kind="stable")
+    splits = np.cumsum(np.bincount(codes))[:-1]
+    return dict(zip(uniques, np.split(pairs["row"].to_numpy()[order], splits)))
+
+class TrigramIndex:
+    """Trigram inverted index over the distinct lowercased values of a text column.
+
+    Posting lists point at distinct values rather than rows, so a substring
+    query intersects the postings of its trigrams, verifies the surviving
+    candidates and only then expands them to row positions.
+    """
+    def __init__(self, series):
+        codes, uniques = pd.factorize(series.astype(str).str.lower())
+        self.values = np.asarray(uniques, dtype=object)
+        # Rows grouped by value code (missing values, code -1, sort first and are skipped)
+        self.row_order = np.argsort(codes, kind="stable").astype(np.int32)
+        self.bounds = np.searchsorted(codes[self.row_order], np.arange(len(self.values) + 1))
+        self.keys = np.empty(0, dtype=np.uint32)
+        self.starts = np.zeros(1, dtype=np.int64)
+        self.postings = np.empty(0, dtype=np.int32)
+
+        # Trigrams over UTF-8 bytes. Values of equal length are stacked into unpadded
+        # byte matrices of at most TRIGRAM_CHUNK_BYTES, so memory follows the
+        # column's total text size rather than rows times its longest value.
+        encoded = [value.encode() for value in self.values]
+        lengths = np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded))
+        by_length = np.argsort(lengths, kind="stable")
+        edges = np.flatnonzero(np.diff(lengths[by_length])) + 1
+        parts = []
+        for group in np.split(by_length, edges):
+            length = int(lengths[group[0]]) if len(group) else 0
+            if length < 3:
+                continue
+            step = max(1, TRIGRAM_CHUNK_BYTES // length)
+            for start in range(0, len(group), step):
+                ids = group[start:start + step]
+                matrix = np.frombuffer(b"".join(encoded[i] for i in ids), dtype=np.uint8).reshape(len(ids), length).astype(np.uint32)
+                grams = (matrix[:, :-2] << 16) | (matrix[:, 1:-1] << 8) | matrix[:, 2:]
+                # (trigram, value) pairs, deduplicated per chunk; chunks never share a value
+                parts.append(np.unique((grams.astype(np.uint64) << np.uint64(32)) | ids.astype(np.uint64)[:, None]))
+        if not parts:
+            return
+        # Runs of equal trigrams in the sorted pairs become posting lists
+        pairs = np.sort(np.concatenate(parts))
+        gram_ids = (pairs >> np.uint64(32)).astype(np.uint32)
+        starts = np.flatnonzero(np.concatenate(([True], gram_ids[1:] != gram_ids[:-1])))
+        self.keys = gram_ids[starts]
+        self.starts = np.append(starts, len(pairs))
+        self.postings = (pairs & np.uint64(0xFFFFFFFF)).astype(np.int32)
+
+    def grams(self, needle: str) -> Set[int]:
+        data = needle.lower().encode()
+        return {(data[i] << 16) | (data[i + 1] << 8) | data[i + 2] for i in range(len(data) - 2)}
+
+    def estimate(self, needle: str) -> int:
+        """Upper bound on distinct values containing `needle` (its rarest trigram)"""
+        grams = self.grams(needle)
+        if not grams:
+            return len(self.values)
+        return min(len(self.posting(gram)) for gram in grams)
+
+    def posting(self, gram: int):
+        pos = np.searchsorted(self.keys, gram)
+        if pos == len(self.keys) or self.keys[pos] != gram:
+            return np.empty(0, dtype=np.int32)
+        return self.postings[self.starts[pos]:self.starts[pos + 1]]
+
+    def search(self, needle: str):
+        """Row positions (in table order) whose value contains `needle`, case-insensitively"""
+        needle = needle.lower()
+        grams = self.grams(needle)
+        if not grams:
+            # Too short for trigrams; scan the distinct values instead
+            candidates = np.arange(len(self.values))
+        else:
+            postings = sorted((self.posting(gram) for gram in grams), key=len)
+            candidates = postings[0]
+            for posting in postings[1:]:
+                if not len(candidates):
+                    break
+                candidates = np.intersect1d(candidates, posting, assume_unique=True)
+        matching = [code for code in candidates.tolist() if needle in self.values[code]]
+        selected = np.zeros(len(self.values), dtype=bool)
+        selected[matching] = True
+        offset = self.bounds[0]
+        return np.sort(self.row_order[offset:][np.repeat(selected, np.diff(self.bounds))])
+
+    def memory_bytes(self) -> int:
+        arrays = (self.row_order, self.bounds, self.keys, self.starts, self.postings)
+        return sum(array.nbytes for array in arrays)
+
+class CmdbStore:
+    """Immutable column-oriented snapshot of the local CMDB with hash indexes.
+
+    Hostnames are indexed lowercased for O(1) exact lookups, and each column in
+    CMDB_INDEXED_COLUMNS gets a value -> row positions index (per item for
+    comma-separated CMDB_MULTIVALUE_COLUMNS). Non-categorical text columns in
+    CMDB_TRIGRAM_COLUMNS get a trigram index for substring search.
+    """
+    def __init__(self, frame, source_signature: Optional[tuple] = None):
+        self.generation = 0
+        self.loaded_at = None
+        self.source_signature = source_signature
+        self.frame = compact_frame(frame)
+        self.columns = list(self.frame.columns)
+        self.arrays = {col: self.frame[col].array for col in self.columns}
+        self.hostname_index: Optional[Dict[str, int]] = None
+        if HOSTNAME_COLUMN in self.frame.columns:
+            hostnames = self.frame[HOSTNAME_COLUMN].astype(str).str.lower().drop_duplicates()
+            self.hostname_index = dict(zip(hostnames.to_numpy(), hostnames.index.to_numpy().tolist()))
+        self.indexes = {
+            col: build_value_index(self.frame[col], col in MULTIVALUE_COLUMNS)
+            for col in INDEXED_COLUMNS if col in self.frame.columns
+        }
+        self.trigrams = {
+            col: TrigramIndex(self.frame[col]) for col in self.columns
+            if ("*" in TRIGRAM_COLUMNS or col in TRIGRAM_COLUMNS)
+            and not isinstance(self.frame[col].dtype, pd.CategoricalDtype)
+            and not pd.api.types.is_numeric_dtype(self.frame[col])
+        }
+        # Rows per category, used by the query planner's selectivity estimates
+        self.category_counts = {
+            col: np.bincount(self.frame[col].cat.codes.to_numpy() + 1, minlength=len(self.frame[col].cat.categories) + 1)[1:]
+            for col in self.columns if isinstance(self.frame[col].dtype, pd.CategoricalDtype)
+        }
+
+    def __len__(self) -> int:
+        return len(self.frame)
+
+    def get(self, hostname: str) -> Optional[Dict[str, Any]]:
+        """Exact, case-insensitive hostname lookup"""
+        row = self.hostname_index.get(hostname.lower())
+        return None if row is None else self.record(row)
+
+    def get_many(self, hostnames: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Resolve several hostnames in one pass; misses are left out"""
+        rows = ((hostname, self.hostname_index.get(hostname.lower())) for hostname in hostnames)
+        return {hostname: self.record(row) for hostname, row in rows if row is not None}
+
+    def lookup(self, column: str, value: str):
+        """Row positions whose value (or one of whose items) equals `value`, or None if the column is not indexed"""
+        index = self.indexes.get(column)
+        if index is None:
+            return None
+        return index.get(str(value).strip().lower(), np.empty(0, dtype=np.int32))
+
+    def contains(self, column: str, value: str, regex: bool = False):
+        """Row positions whose value contains `value` (or matches it as a regular expression), case-insensitively"""
+        series = self.frame[column]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            # Match against the distinct values only, then map back to rows
+            categories = pd.Series(series.cat.categories.astype(str))
+            matching = np.flatnonzero(categories.str.contains(value, case=False, regex=regex).to_numpy())
+            return np.flatnonzero(np.isin(series.cat.codes.to_numpy(), matching))
+        if column in self.trigrams and not regex:
+            return self.trigrams[column].search(value)
+        return np.flatnonzero(series.astype(str).str.contains(value, case=False, regex=regex, na=False).to_numpy())
+
+    def record(self, row: int, columns: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Materialize a single row straight from the column arrays"""
+        record = {}
+        for col in columns or self.columns:
+            value = self.arrays[col][row]
+            record[col] = None if pd.isna(value) else value.item() if hasattr(value, "item") else value
+        return record
+
+    def records(self, rows, columns: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Materialize only the given rows (and columns) as JSON-friendly dicts"""
+        if len(rows) <= 16:
+            return [self.record(row, columns) for row in rows]
+        subset = self.frame.iloc[rows]
+        if columns:
+            subset = subset[columns]
+        subset = subset.astype(object)
+        return subset.where(subset.notna(), None).to_dict('records')
+
+    def export(self, columns: List[str], fmt: str, chunk_rows: int, offset: int = 0, limit: Optional[int] = None) -> Iterator[bytes]:
+        """Yield rows [offset, offset + limit) as NDJSON or Arrow IPC stream chunks.
+
+        Each chunk is a positional slice of the frame encoded by pandas' JSON
+        writer or converted to an Arrow record batch column by column, so no
+        per-row Python objects are built.
+        """
+        stop = len(self) if limit is None else min(len(self), offset + limit)
+        encoder = None
+        if fmt == "arrow":
+            # Infer the schema over the whole column so sparse columns keep their type in every batch
+            schema = pa.Schema.from_pandas(self.frame[columns], preserve_index=False)
+            encoder = ArrowStreamEncoder(schema)
+        for start in range(offset, stop, chunk_rows):
+            chunk = self.frame.iloc[start:min(start + chunk_rows, stop)][columns]
+            if encoder is not None:
+                yield encoder.write(pa.RecordBatch.from_pandas(chunk, schema=schema, preserve_index=False))
+            else:
+                data = chunk.to_json(orient="records", lines=True)
+                yield (data if data.endswith("\n") else data + "\n").encode()
+        if encoder is not None:
+            yield encoder.close()
+
+    # --- Structured queries (cmdb.query) ---
+    # A filter node is a condition {"field", "op", "value"} or a group
+    # {"all": [...]}, {"any": [...]} or {"not": node}.
+
+    def value_mask(self, series, column: str, op: str, value: Any):
+        """Boolean mask of the values in `series` that satisfy one condition"""
+        if op == "range":
+            # Numeric bounds only match numbers, so text such as "n/a" in a mixed column never does;
+            # other bounds compare the lowercased text
+            numbers = series if pd.api.types.is_numeric_dtype(series) else pd.to_numeric(series, errors="coerce")
+            text = series.astype("string").str.lower()
+            mask = pd.Series(True, index=series.index)
+            for name, method in (("gt", "gt"), ("gte", "ge"), ("lt", "lt"), ("lte", "le")):
+                if name in value:
+                    if isinstance(value[name], (int, float)):
+                        compared = getattr(numbers, method)(float(value[name]))
+                    else:
+                        compared = getattr(text, method)(str(value[name]).lower())
+                    mask &= compared.fillna(False).astype(bool)
+            return mask.to_numpy()
+        text = series.astype("string").str.lower()
+        if op in ("eq", "in"):
+            targets = [str(item).strip().lower() for item in (value if op == "in" else [value])]
+            if column in MULTIVALUE_COLUMNS:
+                pattern = "|".join(rf"(?:^|,)\s*{re.escape(target)}\s*(?:,|$)" for target in targets)
+                mask = text.str.contains(pattern, regex=True)
+            else:
+                mask = text.str.strip().isin(targets)
+        elif op == "contains":
+            mask = text.str.contains(str(value).lower(), regex=False)
+        else:
+            mask = text.str.startswith(str(value).lower())
+        return mask.fillna(False).astype(bool).to_numpy()
+
+    def verify(self, condition: Dict[str, Any], rows):
+        """Filter candidate rows by checking their values directly"""
+        series = self.frame[condition["field"]].iloc[rows]
+        return rows[self.value_mask(series, condition["field"], condition["op"], condition.get("value"))]
+
+    def evaluate(self, condition: Dict[str, Any]):
+        """All rows matching one condition, using the best available index"""
+        column, op, value = condition["field"], condition["op"], condition.get("value")
+        series = self.frame[column]
+        if op in ("eq", "in") and column in self.indexes:
+            parts = [self.lookup(column, item) for item in (value if op == "in" else [value])]
+            return np.unique(np.concatenate(parts)) if parts else np.empty(0, dtype=np.int32)
+        if op != "range" and isinstance(series.dtype, pd.CategoricalDtype):
+            categories = pd.Series(series.cat.categories.astype(str))
+            matching = np.flatnonzero(self.value_mask(categories, column, op, value))
+            return np.flatnonzero(np.isin(series.cat.codes.to_numpy(), matching))
+        if op != "range" and column in self.trigrams:
+            needles = value if op == "in" else [value]
+            parts = [self.trigrams[column].search(str(needle).strip()) for needle in needles]
+            candidates = np.unique(np.concatenate(parts)) if parts else np.empty(0, dtype=np.int64)
+            return candidates if op == "contains" else self.verify(condition, candidates)
+        return np.flatnonzero(self.value_mask(series, column, op, value))
+
+    def estimate(self, node: Dict[str, Any]) -> int:
+        """Cheap upper bound on the rows a filter node can match"""
+        if "all" in node:
+            return min((self.estimate(child) for child in node["all"]), default=len(self))
+        if "any" in node:
+            return min(len(self), sum(self.estimate(child) for child in node["any"]))
+        if "not" in node:
+            return len(self)
+        column, op, value = node["field"], node["op"], node.get("value")
+        items = value if op == "in" else [value]
+        if op in ("eq", "in") and column in self.indexes:
+            return sum(len(self.lookup(column, item)) for item in items)
+        if op != "range" and column in self.category_counts:
+            categories = pd.Series(self.frame[column].cat.categories.astype(str))
+            return int(self.category_counts[column][self.value_mask(categories, column, op, value)].sum())
+        if op != "range" and column in self.trigrams:
+            return min(len(self), sum(self.trigrams[column].estimate(str(item).strip()) for item in items))
+        return len(self)
+
+    def select(self, node: Dict[str, Any], candidates=None):
+        """Sorted row positions matching a filter node, restricted to `candidates` if given.
+
+        Conjunctions run their most selective child first; later children
+        either check the surviving candidates directly or, when their own
+        index lookup is smaller than the candidate set, are intersected.
+        """
+        if "all" in node:
+            rows = candidates
+            for child in sorted(node["all"], key=self.estimate):
+                rows = self.select(child, rows)
+                if not len(rows):
+                    break
+            return rows if rows is not None else np.arange(len(self))
+        if "any" in node:
+            parts = [self.select(child, candidates) for child in node["any"]]
+            return np.unique(np.concatenate(parts)) if parts else np.empty(0, dtype=np.int64)
+        if "not" in node:
+            base = candidates if candidates is not None else np.arange(len(self))
+            return np.setdiff1d(base, self.select(node["not"], base), assume_unique=True)
+        if candidates is None:
+            return np.sort(self.evaluate(node))
+        if self.estimate(node) < len(candidates):
+            return np.intersect1d(candidates, self.evaluate(node), assume_unique=True)
+        return self.verify(node, candidates)
+
+    def sort_rows(self, rows, sort: List[str]):
+        """Order rows by columns; a leading '-' sorts that column descending"""
+        columns = [key.lstrip("-").lower() for key in sort]
+        subset = self.frame.iloc[rows][columns].reset_index(drop=True)
+        # Text sorts case-insensitively, as with COLLATE NOCASE in the SQLite backend
+        order = subset.sort_values(
+            by=columns, ascending=[not key.startswith("-") for key in sort],
+            kind="stable", na_position="last",
+            key=lambda col: col if pd.api.types.is_numeric_dtype(col) else col.astype("string").str.lower()
+        ).index.to_numpy()
+        return rows[order]
+
+    def memory_bytes(self) -> int:
+        index_bytes = sum(rows.nbytes for index in self.indexes.values() for rows in index.values())
+        index_bytes += sum(trigrams.memory_bytes() for trigrams in self.trigrams.values())
+        return int(self.frame.memory_usage(deep=True).sum()) + index_bytes
+
+def quote_identifier(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+def escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+@functools.lru_cache(maxsize=256)
+def compile_pattern(pattern: str):
+    return re.compile(pattern, re.IGNORECASE)
+
+def sql_regexp(pattern: str, value: Any) -> bool:
+    """SQLite REGEXP function: case-insensitive search, like pandas str.contains(case=False)"""
+    return value is not None and compile_pattern(pattern).search(str(value)) is not None
+
+NUMBER_PATTERN = re.compile(r"[+-]?(?:\d+(\.\d*)?|\.\d+)([eE][+-]?\d+)?")
+
+def sql_value(value: Any) -> Any:
+    """Store numbers (and numeric strings, as pandas reads them from CSV) as numbers,
+    lists as comma-separated items, objects as JSON and everything else as text"""
+    if value is None or value == "" or (isinstance(value, float) and value != value):
+        return None
+    if isinstance(value, list):
+        return ",".join(str(item) for item in value)
+    if isinstance(value, dict):
+        return json.dumps(value)
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return value
+    text = str(value).strip()
+    match = NUMBER_PATTERN.fullmatch(text)
+    if match is None:
+        return text
+    if match.group(1) is None and match.group(2) is None and abs(int(text)) < 2 ** 63:
+        return int(text)
+    return float(text)
+
+class SqliteCmdb:
+    """Persistent CMDB in SQLite, used when CMDB_BACKEND=sqlite.
+
+    Rows are keyed by lowercased hostname and upserted in place, so writes
+    cost O(changed rows). Each row records which sources (a CSV file, the
+    upsert tool, a ServiceNow table) wrote it in cmdb_sources, so a source
+    can drop the rows it no longer has without touching rows another source
+    still holds. Items of CMDB_MULTIVALUE_COLUMNS are mirrored into
+    an indexed side table, CMDB_INDEXED_COLUMNS get NOCASE indexes, and reads
+    go through per-thread connections using WAL and memory-mapped I/O.
+    """
+    def __init__(self, path: str, mmap_size: int):
+        self.path = path
+        self.mmap_size = mmap_size
+        self.local = threading.local()
+        self.write_lock = threading.Lock()
+        self.generation = 0
+        conn = self.connect()
+        with conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS cmdb (_key TEXT PRIMARY KEY)")
+            conn.execute("CREATE TABLE IF NOT EXISTS cmdb_values (col TEXT, item TEXT, _key TEXT, "
+                         "PRIMARY KEY (col, item, _key)) WITHOUT ROWID")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_cmdb_values_key ON cmdb_values(_key)")
+            conn.execute("CREATE TABLE IF NOT EXISTS cmdb_sources (_key TEXT, source TEXT, stamp INTEGER, "
+                         "PRIMARY KEY (_key, source)) WITHOUT ROWID")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_cmdb_sources_source ON cmdb_sources(source, stamp)")
+            conn.execute("CREATE TABLE IF NOT EXISTS cmdb_meta (name TEXT PRIMARY KEY, value TEXT)")
+            conn.execute("CREATE TABLE IF NOT EXISTS cmdb_relations (_key TEXT PRIMARY KEY, parent TEXT, child TEXT, "
+                         "type TEXT, source TEXT)")
+        self.columns = self.load_columns(conn)
+
+    def connect(self) -> sqlite3.Connection:
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.create_function("regexp", 2, sql_regexp, deterministic=True)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA mmap_size={int(self.mmap_size)}")
+            self.local.conn = conn
+        return conn
+
+    def load_columns(self, conn) -> List[str]:
+        return [row["name"] for row in conn.execute("PRAGMA table_info(cmdb)") if row["name"] != "_key"]
+
+    def ensure_columns(self, conn, names):
+        for name in names:
+            if name not in self.columns:
+                # No declared type, so numbers keep their storage class and sort numerically
+                conn.execute(f"ALTER TABLE cmdb ADD COLUMN {quote_identifier(name)}")
+                if name in INDEXED_COLUMNS and name not in MULTIVALUE_COLUMNS:
+                    conn.execute(f"CREATE INDEX IF NOT EXISTS {quote_identifier('idx_cmdb_' + name)} "
+                                 f"ON cmdb({quote_identifier(name)} COLLATE NOCASE)")
+                self.columns = self.columns + [name]
+
+    def ensure_index(self, name: str):
+        with self.write_lock:
+            conn = self.connect()
+            with conn:
+                self.ensure_columns(conn, [name])
+                conn.execute(f"CREATE INDEX IF NOT EXISTS {quote_identifier('idx_cmdb_' + name)} "
+                             f"ON cmdb({quote_identifier(name)} COLLATE NOCASE)")
+
+    def get_meta(self, name: str) -> Optional[str]:
+        row = self.connect().execute("SELECT value FROM cmdb_meta WHERE name = ?", (name,)).fetchone()
+        return row["value"] if row else None
+
+    def set_meta(self, name: str, value: str):
+        with self.connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO cmdb_meta (name, value) VALUES (?, ?)", (name, value))
+
+    def upsert(self, rows: List[Dict[str, Any]], source: str = "api", stamp: int = 0) -> Dict[str, int]:
+        """Insert or update rows by hostname in one transaction; only the given columns change.
+
+        The rows are recorded as held by `source`, marked with `stamp` (see release).
+        """
+        prepared, skipped = [], 0
+        for row in rows:
+            row = {str(col).lower().strip(): value for col, value in row.items()}
+            hostname = row.get(HOSTNAME_COLUMN)
+            if hostname is None or str(hostname).strip() == "":
+                skipped += 1
+                continue
+            prepared.append((str(hostname).strip().lower(), {col: sql_value(value) for col, value in row.items()}))
+        with self.write_lock:
+            conn = self.connect()
+            with conn:
+                self.ensure_columns(conn, dict.fromkeys(col for _, values in prepared for col in values))
+                # One statement per distinct column set
+                groups: Dict[tuple, list] = {}
+                for key, values in prepared:
+                    groups.setdefault(tuple(values), []).append([key] + list(values.values()))
+                for cols, params in groups.items():
+                    names = ", ".join(quote_identifier(col) for col in cols)
+                    updates = ", ".join(f"{quote_identifier(col)} = excluded.{quote_identifier(col)}" for col in cols)
+                    conn.executemany(
+                        f"INSERT INTO cmdb (_key, {names}) VALUES ({', '.join('?' * (len(cols) + 1))}) "
+                        f"ON CONFLICT(_key) DO UPDATE SET {updates}", params
+                    )
+                for col in MULTIVALUE_COLUMNS:
+                    changed = [(key, values[col]) for key, values in prepared if col in values]
+                    if not changed:
+                        continue
+                    conn.executemany("DELETE FROM cmdb_values WHERE col = ? AND _key = ?", [(col, key) for key, _ in changed])
+                    conn.executemany(
+                        "INSERT OR IGNORE INTO cmdb_values (col, item, _key) VALUES (?, ?, ?)",
+                        [(col, item, key) for key, value in changed for item in value_keys("" if value is None else str(value), True)]
+                    )
+                conn.executemany(
+                    "INSERT INTO cmdb_sources (_key, source, stamp) VALUES (?, ?, ?) "
+                    "ON CONFLICT(_key, source) DO UPDATE SET stamp = excluded.stamp",
+                    [(key, source, stamp) for key, _ in prepared]
+                )
+            self.generation += 1
+        return {"upserted": len(prepared), "skipped": skipped}
+
+    def release(self, source: str, stamp: int, clear_columns: Optional[List[str]] = None) -> int:
+        """Drop `source`'s hold on rows it did not write with `stamp`; rows no source holds any more are deleted.
+
+        Rows another source still holds are kept, with `clear_columns` set to NULL.
+        """
+        with self.write_lock:
+            conn = self.connect()
+            with conn:
+                stale = [row["_key"] for row in conn.execute(
+                    "SELECT _key FROM cmdb_sources WHERE source = ? AND stamp <> ?", (source, stamp)
+                )]
+                conn.execute("DELETE FROM cmdb_sources WHERE source = ? AND stamp <> ?", (source, stamp))
+                orphans, kept = [], []
+                for key in stale:
+                    held = conn.execute("SELECT 1 FROM cmdb_sources WHERE _key = ? LIMIT 1", (key,)).fetchone()
+                    (kept if held else orphans).append((key,))
+                deleted = conn.executemany("DELETE FROM cmdb WHERE _key = ?", orphans).rowcount if orphans else 0
+                conn.executemany("DELETE FROM cmdb_values WHERE _key = ?", orphans)
+                cleared = [col for col in clear_columns or [] if col in self.columns]
+                if kept and cleared:
+                    conn.executemany(
+                        f"UPDATE cmdb SET {', '.join(f'{quote_identifier(col)} = NULL' for col in cleared)} WHERE _key = ?", kept
+                    )
+            self.generation += 1
+        return deleted
+
+    def delete(self, hostnames: List[str]) -> int:
+        keys = [(str(hostname).strip().lower(),) for hostname in hostnames]
+        with self.write_lock:
+            conn = self.connect()
+            with conn:
+                deleted = conn.executemany("DELETE FROM cmdb WHERE _key = ?", keys).rowcount
+                conn.executemany("DELETE FROM cmdb_values WHERE _key = ?", keys)
+                conn.executemany("DELETE FROM cmdb_sources WHERE _key = ?", keys)
+            self.generation += 1
+        return deleted
+
+    def import_csv(self, path: str, replace: bool = False) -> Dict[str, int]:
+        """Stream a CSV into the table in chunks of IMPORT_CHUNK_ROWS upserts.
+
+        With replace=True, rows imported from the same file earlier but missing
+        from it now are deleted once the whole file is in (unless another
+        source still holds them), so readers never see a partly emptied table.
+        """
+        source, stamp = f"csv:{os.path.realpath(path)}", time.time_ns()
+        totals = {"upserted": 0, "skipped": 0}
+        with open(path, newline="") as f:
+            chunk = []
+            for row in csv.DictReader(f):
+                chunk.append(row)
+                if len(chunk) >= IMPORT_CHUNK_ROWS:
+                    for name, count in self.upsert(chunk, source, stamp).items():
+                        totals[name] += count
+                    chunk = []
+            if chunk:
+                for name, count in self.upsert(chunk, source, stamp).items():
+                    totals[name] += count
+        if replace:
+            totals["deleted"] = self.release(source, stamp)
+        return totals
+
+    def upsert_relations(self, rows: List[Dict[str, Any]], source: str) -> int:
+        """Insert or replace edges ({_key, parent, child, type}) recorded under `source`"""
+        with self.write_lock:
+            with self.connect() as conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO cmdb_relations (_key, parent, child, type, source) VALUES (?, ?, ?, ?, ?)",
+                    [(row["_key"], row["parent"], row["child"], row.get("type"), source) for row in rows]
+                )
+            self.generation += 1
+        return len(rows)
+
+    def relation_keys(self, source: str) -> Set[str]:
+        return {row["_key"] for row in self.connect().execute("SELECT _key FROM cmdb_relations WHERE source = ?", (source,))}
+
+    def delete_relations(self, keys: List[str]) -> int:
+        with self.write_lock:
+            with self.connect() as conn:
+                deleted = conn.executemany("DELETE FROM cmdb_relations WHERE _key = ?", [(key,) for key in keys]).rowcount
+            self.generation += 1
+        return deleted
+
+    def relations(self):
+        return self.connect().execute("SELECT parent, child, type FROM cmdb_relations")
+
+    def row_dict(self, row, columns: Optional[List[str]] = None) -> Dict[str, Any]:
+        return {col: row[col] for col in (columns or self.columns)}
+
+    def __len__(self) -> int:
+        return self.connect().execute("SELECT COUNT(*) FROM cmdb").fetchone()[0]
+
+    def get(self, hostname: str) -> Optional[Dict[str, Any]]:
+        row = self.connect().execute("SELECT * FROM cmdb WHERE _key = ?", (hostname.strip().lower(),)).fetchone()
+        return self.row_dict(row) if row else None
+
+    def get_many(self, hostnames: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Resolve several hostnames with one primary-key IN lookup; misses are left out"""
+        keys = {hostname.strip().lower(): hostname for hostname in hostnames}
+        rows = self.connect().execute(
+            f"SELECT * FROM cmdb WHERE _key IN ({', '.join('?' * len(keys))})", list(keys)
+        )
+        found = {row["_key"]: self.row_dict(row) for row in rows}
+        return {hostname: found[key] for hostname in hostnames if (key := hostname.strip().lower()) in found}
+
+    def find(self, column: str, value: str, limit: int, offset: int, regex: bool = False) -> List[Dict[str, Any]]:
+        if regex:
+            condition, param = f"{quote_identifier(column)} REGEXP ?", value
+        else:
+            condition, param = f"{quote_identifier(column)} LIKE ? ESCAPE '\\'", f"%{escape_like(value)}%"
+        rows = self.connect().execute(
+            f"SELECT * FROM cmdb WHERE {condition} ORDER BY rowid LIMIT ? OFFSET ?", (param, limit, offset)
+        )
+        return [self.row_dict(row) for row in rows]
+
+    def export(self, columns: List[str], fmt: str, chunk_rows: int, offset: int = 0, limit: Optional[int] = None) -> Iterator[bytes]:
+        """Yield rows in rowid order as NDJSON or Arrow IPC stream chunks.
+
+        Chunks are read by rowid keyset (each one a fresh query on the calling
+        thread's connection), so a stream can be consumed from any thread.
+        """
+        names = ", ".join(quote_identifier(col) for col in columns)
+        encoder = ArrowStreamEncoder(pa.schema(list(self.arrow_types(columns).items()))) if fmt == "arrow" else None
+        last, remaining = None, limit
+        while remaining is None or remaining > 0:
+            size = chunk_rows if remaining is None else min(chunk_rows, remaining)
+            if last is None:
+                rows = self.connect().execute(f"SELECT rowid, {names} FROM cmdb ORDER BY rowid LIMIT ? OFFSET ?", (size, offset)).fetchall()
+            else:
+                rows = self.connect().execute(f"SELECT rowid, {names} FROM cmdb WHERE rowid > ? ORDER BY rowid LIMIT ?", (last, size)).fetchall()
+            if not rows:
+                break
+            last = rows[-1][0]
+            if remaining is not None:
+                remaining -= len(rows)
+            if encoder is not None:
+                arrays = [
+                    pa.array([value if value is None or kind != pa.string() else str(value) for value in values], kind)
+                    for values, kind in zip(list(zip(*rows))[1:], encoder.schema.types)
+                ]
+                yield encoder.write(pa.RecordBatch.from_arrays(arrays, schema=encoder.schema))
+            else:
+                yield "".join(json.dumps(dict(zip(columns, row[1:]))) + "\n" for row in rows).encode()
+        if encoder is not None:
+            yield encoder.close()
+
+    def arrow_types(self, columns: List[str]) -> Dict[str, Any]:
+        """Arrow type per column from the storage classes it holds: int64, float64 or string"""
+        types = {}
+        for col in columns:
+            rows = self.connect().execute(f"SELECT DISTINCT typeof({quote_identifier(col)}) FROM cmdb")
+            classes = {row[0] for row in rows} - {"null"}
+            if classes == {"integer"}:
+                types[col] = pa.int64()
+            elif classes and classes <= {"integer", "real"}:
+                types[col] = pa.float64()
+            else:
+                types[col] = pa.string()
+        return types
+
+    def filter_sql(self, node: Dict[str, Any]) -> tuple:
+        """Translate a normalized cmdb.query filter node into a WHERE clause"""
+        if "all" in node or "any" in node:
+            joiner, empty = (" AND ", "1") if "all" in node else (" OR ", "0")
+            parts = [self.filter_sql(child) for child in node.get("all", node.get("any"))]
+            if not parts:
+                return empty, []
+            return joiner.join(f"({sql})" for sql, _ in parts), [param for _, params in parts for param in params]
+        if "not" in node:
+            sql, params = self.filter_sql(node["not"])
+            return f"NOT ({sql})", params
+        column, op, value = quote_identifier(node["field"]), node["op"], node.get("value")
+        if op in ("eq", "in"):
+            items = [str(item).strip().lower() for item in (value if op == "in" else [value])]
+            marks = ", ".join("?" * len(items))
+            if node["field"] == HOSTNAME_COLUMN:
+                return f"_key IN ({marks})", items
+            if node["field"] in MULTIVALUE_COLUMNS:
+                return f"_key IN (SELECT _key FROM cmdb_values WHERE col = ? AND item IN ({marks}))", [node["field"]] + items
+            return f"{column} COLLATE NOCASE IN ({marks})", [sql_value(item) for item in items]
+        if op == "contains":
+            return f"{column} LIKE ? ESCAPE '\\'", [f"%{escape_like(str(value))}%"]
+        if op == "prefix":
+            return f"{column} LIKE ? ESCAPE '\\'", [f"{escape_like(str(value))}%"]
+        clauses, params = [], []
+        for name, operator in (("gt", ">"), ("gte", ">="), ("lt", "<"), ("lte", "<=")):
+            if name in value:
+                if isinstance(value[name], (int, float)):
+                    # Text values in a mixed column would CAST to 0.0 and match; compare numbers only
+                    clauses.append(f"typeof({column}) IN ('integer', 'real') AND {column} {operator} ?")
+                    params.append(value[name])
+                else:
+                    clauses.append(f"lower({column}) {operator} ?")
+                    params.append(str(value[name]).lower())
+        return f"{column} IS NOT NULL AND " + " AND ".join(clauses), params
+
+    def query(self, root: Dict[str, Any], sort: Optional[List[str]], fields: Optional[List[str]], limit: int, offset: int) -> Dict[str, Any]:
+        conn = self.connect()
+        where, params = self.filter_sql(root)
+        # Missing values sort last in both directions, as in the CSV store
+        order = [
+            f"{column} IS NULL, {column} COLLATE NOCASE {'DESC' if key.startswith('-') else 'ASC'}"
+            for key in sort or [] for column in [quote_identifier(key.lstrip('-').lower())]
+        ]
+        columns = fields or self.columns
+        select = (f"SELECT {', '.join(quote_identifier(col) for col in columns)} FROM cmdb WHERE {where} "
+                  f"ORDER BY {', '.join(order + ['rowid'])} LIMIT ? OFFSET ?")
+        total = conn.execute(f"SELECT COUNT(*) FROM cmdb WHERE {where}", params).fetchone()[0]
+        rows = conn.execute(select, params + [limit, offset])
+        return {
+            "total": total,
+            "results": [self.row_dict(row, columns) for row in rows],
+            "plan": [row["detail"] for row in conn.execute(f"EXPLAIN QUERY PLAN {select}", params + [limit, offset])]
+        }
+
+    def size_bytes(self) -> int:
+        return sum(os.path.getsize(self.path + suffix) for suffix in ("", "-wal") if os.path.exists(self.path + suffix))
+
+# --- ServiceNow Client ---
+class ServiceNowError(Exception):
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
+class TTLCache:
+    """Size-bounded LRU cache whose entries expire after `ttl` seconds"""
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.entries: "OrderedDict[Any, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Any) -> Optional[Any]:
+        entry = self.entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self.entries[key]
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key: Any, value: Any):
+        self.entries[key] = (time.monotonic() + self.ttl, value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+
+class ServiceNowClient:
+    """Async ServiceNow Table API client with a pooled HTTP connection.
+
+    List queries are paged with sysparm_limit/sysparm_offset: the first page
+    reports X-Total-Count and the remaining pages are fetched up to
+    SERVICENOW_CONCURRENCY at a time, yielded in order. 429 and 5xx responses
+    are retried with exponential backoff (honoring Retry-After).
+    `instance` may be a name (<instance>.service-now.com) or a full base URL.
+    """
+    def __init__(self, instance: str, user: str, password: str):
+        self.base_url = instance if instance.startswith(("http://", "https://")) else f"https://{instance}.service-now.com"
+        self.auth = (user, password)
+        self.client = None
+        self.client_loop = None
+        self.stats = {"requests": 0, "retries": 0, "errors": 0}
+
+    def http(self):
+        # AsyncClient pools are bound to the event loop they were first used on
+        loop = asyncio.get_running_loop()
+        if self.client is None or self.client_loop is not loop:
+            self.client = httpx.AsyncClient(
+                base_url=self.base_url,
+                auth=self.auth,
+                headers={"Accept": "application/json"},
+                timeout=SERVICENOW_TIMEOUT,
+                limits=httpx.Limits(max_connections=SERVICENOW_MAX_CONNECTIONS,
+                                    max_keepalive_connections=SERVICENOW_MAX_CONNECTIONS)
+            )
+            self.client_loop = loop
+        return self.client
+
+    async def request(self, path: str, params: Optional[Dict[str, Any]] = None):
+        """GET a Table API path, retrying rate limits and server errors"""
+        for attempt in range(SERVICENOW_MAX_RETRIES + 1):
+            self.stats["requests"] += 1
+            try:
+                response = await self.http().get(path, params=params)
+            except httpx.TransportError as e:
+                if attempt == SERVICENOW_MAX_RETRIES:
+                    self.stats["errors"] += 1
+                    raise ServiceNowError(f"ServiceNow request failed: {e}")
+                delay = None
+            else:
+                if response.status_code == 404:
+                    return None
+                if response.status_code < 400:
+                    return response
+                retryable = response.status_code == 429 or response.status_code >= 500
+                if not retryable or attempt == SERVICENOW_MAX_RETRIES:
+                    self.stats["errors"] += 1
+                    raise ServiceNowError(f"ServiceNow returned {response.status_code}: {response.text[:200]}", response.status_code)
+                delay = response.headers.get("Retry-After")
+            self.stats["retries"] += 1
+            backoff = float(delay) if delay and delay.isdigit() else min(30.0, 0.5 * 2 ** attempt)
+            await asyncio.sleep(backoff + random.uniform(0, backoff / 4))
+
+    async def get_record(self, table: str, sys_id: str) -> Optional[Dict[str, Any]]:
+        response = await self.request(f"/api/now/table/{table}/{sys_id}")
+        return response.json()["result"] if response is not None else None
+
+    async def fetch_page(self, table: str, params: Dict[str, Any], offset: int, limit: int) -> tuple:
+        response = await self.request(f"/api/now/table/{table}", {**params, "sysparm_offset": offset, "sysparm_limit": limit})
+        if response is None:
+            raise ServiceNowError(f"ServiceNow table '{table}' not found", 404)
+        total = response.headers.get("X-Total-Count")
+        return response.json()["result"], int(total) if total is not None else None
+
+    async def iter_pages(
+        self,
+        table: str,
+        query: str = "",
+        fields: Optional[List[str]] = None,
+        max_records: Optional[int] = None,
+        page_size: int = SERVICENOW_PAGE_SIZE,
+        display_value: Optional[str] = None
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Yield pages of records matching an encoded query, in order"""
+        # Paging needs a stable order
+        if "ORDERBY" not in query:
+            query = f"{query}^ORDERBYsys_id" if query else "ORDERBYsys_id"
+        params = {"sysparm_query": query, "sysparm_exclude_reference_link": "true"}
+        if fields:
+            params["sysparm_fields"] = ",".join(fields)
+        if display_value:
+            params["sysparm_display_value"] = display_value
+        limit = min(page_size, max_records) if max_records else page_size
+        records, total = await self.fetch_page(table, params, 0, limit)
+        yield records
+        if total is None:
+            # No count header: walk pages sequentially until a short page
+            offset = len(records)
+            while len(records) == limit and (max_records is None or offset < max_records):
+                records, _ = await self.fetch_page(table, params, offset, limit)
+                offset += len(records)
+                yield records
+            return
+        end = min(total, max_records) if max_records else total
+        window: List[asyncio.Task] = []
+        try:
+            for offset in range(limit, end, limit):
+                window.append(asyncio.create_task(self.fetch_page(table, params, offset, min(limit, end - offset))))
+                if len(window) >= SERVICENOW_CONCURRENCY:
+                    yield (await window.pop(0))[0]
+            while window:
+                yield (await window.pop(0))[0]
+        finally:
+            # A failed page or a consumer that stops early leaves fetches in flight
+            for task in window:
+                task.cancel()
+            await asyncio.gather(*window, return_exceptions=True)
+
+    async def close(self):
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+# --- Relationship Graph ---
+class RelationGraph:
+    """Immutable CI -> CI relationship graph held as adjacency lists.
+
+    CI names are interned to integer ids (case-insensitive) and every edge
+    parent -> child is stored in both the outgoing list of the parent and the
+    incoming list of the child, so traversal in either direction costs
+    O(visited edges). "downstream" follows parent -> child (what a CI depends
+    on or runs on), "upstream" follows child -> parent (what depends on it).
+    Traversal results are memoized; a reload builds a new graph with an empty
+    memo.
+    """
+    def __init__(self, edges):
+        self.ids: Dict[str, int] = {}
+        self.names: List[str] = []
+        self.type_ids: Dict[str, int] = {}
+        self.types: List[str] = []
+        self.out: List[List[tuple]] = []
+        self.inn: List[List[tuple]] = []
+        self.edge_count = 0
+        seen = set()
+        for parent, child, rel_type in edges:
+            if not parent or not child:
+                continue
+            source, target = self.intern(str(parent).strip()), self.intern(str(child).strip())
+            rel_type = str(rel_type).strip() if rel_type else ""
+            if rel_type not in self.type_ids:
+                self.type_ids[rel_type] = len(self.types)
+                self.types.append(rel_type)
+            edge = (source, target, self.type_ids[rel_type])
+            if edge in seen:
+                continue
+            seen.add(edge)
+            self.out[source].append((target, edge[2]))
+            self.inn[target].append((source, edge[2]))
+            self.edge_count += 1
+        self.cache = TTLCache(GRAPH_CACHE_SIZE, float("inf"))
+        self.generation = 0
+        self.loaded_at = None
+
+    def intern(self, name: str) -> int:
+        key = name.lower()
+        node = self.ids.get(key)
+        if node is None:
+            node = self.ids[key] = len(self.names)
+            self.names.append(name)
+            self.out.append([])
+            self.inn.append([])
+        return node
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def traverse(self, ci: str, direction: str, depth: int, types: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+        """Bounded BFS from `ci`; None if the CI has no relationships"""
+        start = self.ids.get(ci.strip().lower())
+        if start is None:
+            return None
+        type_filter = frozenset(self.type_ids[t] for t in types if t in self.type_ids) if types else None
+        key = (start, direction, depth, type_filter)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        steps = []
+        if direction in ("downstream", "both"):
+            steps.append((self.out, False))
+        if direction in ("upstream", "both"):
+            steps.append((self.inn, True))
+        depths = {start: 0}
+        edges = []
+        frontier = [start]
+        truncated = False
+        for level in range(1, depth + 1):
+            next_frontier = []
+            for node in frontier:
+                for adjacency, reverse in steps:
+                    for other, rel_type in adjacency[node]:
+                        if type_filter is not None and rel_type not in type_filter:
+                            continue
+                        if other not in depths:
+                            if len(depths) >= GRAPH_MAX_NODES:
+                                truncated = True
+                                continue
+                            depths[other] = level
+                            next_frontier.append(other)
+                        edges.append((other, node, rel_type) if reverse else (node, other, rel_type))
+            frontier = next_frontier
+            if not frontier:
+                break
+        result = {
+            "ci": self.names[start],
+            "direction": direction,
+            "depth": depth,
+            "nodes": [{"ci": self.names[node], "depth": level} for node, level in depths.items() if node != start],
+            "edges": [{"parent": self.names[a], "child": self.names[b], "type": self.types[t]} for a, b, t in dict.fromkeys(edges)],
+            "truncated": truncated
+        }
+        self.cache.put(key, result)
+        return result
 
 # --- Backend Initialization --- 
 mcp_server = FastMCP(name="cmdb-service")
-local_cmdb_data = None
-snow_client = None
+# Tools read `local_cmdb` once per call and use that snapshot throughout, so
+# a reload swapping in a new store never changes data under a running query
+local_cmdb: Optional[CmdbStore] = None
+local_cmdb_generation = 0
+local_cmdb_lock = threading.Lock()
+sqlite_cmdb: Optional[SqliteCmdb] = None
+snow_client: Optional[ServiceNowClient] = None
+snow_cache = TTLCache(SERVICENOW_CACHE_SIZE, SERVICENOW_CACHE_TTL)
+relation_graph: Optional[RelationGraph] = None
+relation_graph_generation = 0
+request_counts: Dict[str, int] = {} # Tool calls by function name
+error_counts: Dict[str, int] = {} # Tool calls that raised or returned {"error": ...}
+request_counts_lock = threading.Lock()
+
+def count_request(tool: str, failed: bool):
+    with request_counts_lock:
+        request_counts[tool] = request_counts.get(tool, 0) + 1
+        if failed:
+            error_counts[tool] = error_counts.get(tool, 0) + 1
+
+def tracked(fn):
+    """Count a tool's calls and failures for cmdb.getMetrics"""
+    if asyncio.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            try:
+                result = await fn(*args, **kwargs)
+            except Exception:
+                count_request(fn.__name__, True)
+                raise
+            count_request(fn.__name__, isinstance(result, dict) and "error" in result)
+            return result
+    else:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            try:
+                result = fn(*args, **kwargs)
+            except Exception:
+                count_request(fn.__name__, True)
+                raise
+            count_request(fn.__name__, isinstance(result, dict) and "error" in result)
+            return result
+    return wrapper
+
+def file_signature(path: str) -> Optional[tuple]:
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+def swap_local_cmdb(store: CmdbStore) -> int:
+    """Publish a fully built store as the current snapshot"""
+    global local_cmdb, local_cmdb_generation
+    with local_cmdb_lock:
+        local_cmdb_generation += 1
+        store.generation = local_cmdb_generation
+        store.loaded_at = dt.now().isoformat()
+        local_cmdb = store
+    return store.generation
+
+def initialize_sqlite_cmdb():
+    """Open the SQLite backend and import LOCAL_CMDB_PATH if it changed since the last import"""
+    global sqlite_cmdb
+    try:
+        sqlite_cmdb = SqliteCmdb(SQLITE_PATH, SQLITE_MMAP_SIZE)
+        signature = file_signature(LOCAL_CMDB_PATH) if LOCAL_CMDB_PATH else None
+        if signature is not None and sqlite_cmdb.get_meta("csv_signature") != json.dumps(signature):
+            totals = sqlite_cmdb.import_csv(LOCAL_CMDB_PATH, replace=True)
+            sqlite_cmdb.set_meta("csv_signature", json.dumps(signature))
+            sqlite_cmdb.set_meta("csv_loaded_at", dt.now().isoformat())
+            logger.info(f"Imported {LOCAL_CMDB_PATH} into {SQLITE_PATH}: {totals}")
+        logger.info(f"SQLite CMDB opened at {SQLITE_PATH}, columns: {sqlite_cmdb.columns}")
+    except Exception as e:
+        logger.error(f"Failed to open SQLite CMDB at {SQLITE_PATH}: {e}", exc_info=True)
+        sqlite_cmdb = None
 
 def initialize_local_cmdb():
-    global local_cmdb_data
+    if CMDB_BACKEND == "sqlite":
+        initialize_sqlite_cmdb()
+        return
     if not pd:
         logger.warning("Pandas library not installed. Local CSV CMDB backend disabled.")
         return
         
     if LOCAL_CMDB_PATH and os.path.exists(LOCAL_CMDB_PATH):
         try:
-            # Example: Load CSV into a pandas DataFrame
-            local_cmdb_data = pd.read_csv(LOCAL_CMDB_PATH)
-            # Perform basic validation/cleaning if needed
-            local_cmdb_data.columns = [col.lower().strip() for col in local_cmdb_data.columns]
+            store = CmdbStore(pd.read_csv(LOCAL_CMDB_PATH), file_signature(LOCAL_CMDB_PATH))
+            swap_local_cmdb(store)
             logger.info(f"Local CMDB data loaded successfully from: {LOCAL_CMDB_PATH}")
-            logger.info(f"Local CMDB columns: {list(local_cmdb_data.columns)}")
+            logger.info(f"Local CMDB columns: {store.columns}, rows: {len(store)}, indexed: {list(store.indexes)}")
         except Exception as e:
             logger.error(f"Failed to load or process local CMDB from {LOCAL_CMDB_PATH}: {e}", exc_info=True)
-            local_cmdb_data = None
     else:
         logger.warning(f"Local CMDB path not configured or not found: {LOCAL_CMDB_PATH}")
 
+class CmdbReloader:
+    """Polls LOCAL_CMDB_PATH and hot-swaps a freshly loaded store when it changes.
+
+    The CSV is parsed and indexed on this background thread; the old store
+    keeps serving until the new one is complete. A file that fails to load is
+    not retried until it changes again.
+    """
+    def __init__(self, path: str, interval: float):
+        self.path = path
+        self.interval = interval
+        self.failed_signature = None
+        self.last_error = None
+        self.relations_signature = None
+
+    def start(self):
+        threading.Thread(target=self.run, name="cmdb-reload", daemon=True).start()
+        logger.info(f"Watching {self.path} for changes every {self.interval}s")
+
+    def run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.check()
+            except Exception as e:
+                logger.error(f"Local CMDB reload check failed: {e}", exc_info=True)
+            if file_signature(RELATIONS_PATH) != self.relations_signature:
+                load_relation_graph()
+
+    def check(self) -> bool:
+        signature = file_signature(self.path)
+        store = local_cmdb
+        if sqlite_cmdb is not None:
+            current = tuple(json.loads(sqlite_cmdb.get_meta("csv_signature") or "[]"))
+        else:
+            current = store.source_signature if store is not None else None
+        if signature is None or signature in (current, self.failed_signature):
+            return False
+        # Let an in-progress write settle before reading
+        time.sleep(min(self.interval, 1.0))
+        if file_signature(self.path) != signature:
+            return False
+        started = time.perf_counter()
+        if sqlite_cmdb is not None:
+            # With the SQLite backend, CSV edits are upserted and hosts removed from the file deleted
+            try:
+                totals = sqlite_cmdb.import_csv(self.path, replace=True)
+            except Exception as e:
+                self.failed_signature = signature
+                self.last_error = f"{dt.now().isoformat()}: {e}"
+                logger.error(f"Failed to import {self.path} into SQLite CMDB: {e}")
+                return False
+            sqlite_cmdb.set_meta("csv_signature", json.dumps(signature))
+            sqlite_cmdb.set_meta("csv_loaded_at", dt.now().isoformat())
+            self.failed_signature = None
+            self.last_error = None
+            logger.info(f"Imported changed {self.path} into SQLite CMDB in {time.perf_counter() - started:.2f}s: {totals}")
+            return True
+        try:
+            new_store = CmdbStore(pd.read_csv(self.path), signature)
+        except Exception as e:
+            self.failed_signature = signature
+            self.last_error = f"{dt.now().isoformat()}: {e}"
+            logger.error(f"Failed to reload local CMDB from {self.path}, keeping generation {local_cmdb_generation}: {e}")
+            return False
+        self.failed_signature = None
+        self.last_error = None
+        generation = swap_local_cmdb(new_store)
+        logger.info(f"Reloaded local CMDB from {self.path}: generation {generation}, "
+                    f"{len(new_store)} rows in {time.perf_counter() - started:.2f}s")
+        return True
+
+cmdb_reloader = CmdbReloader(LOCAL_CMDB_PATH, RELOAD_INTERVAL)
+
 def initialize_servicenow():
     global snow_client
     if SERVICENOW_INSTANCE and SERVICENOW_USER:
-        # if not requests or not pysnow:
-        #     logger.warning("Requests or pysnow library not installed. ServiceNow backend disabled.")
-        #     return
+        if not httpx:
+            logger.warning("httpx library not installed. ServiceNow backend disabled.")
+            return
         
         password = None
         try:
@@ -117,11 +1329,8 @@ def initialize_servicenow():
                 # return # Cannot proceed without password
 
             if password:
-                # Example using pysnow (uncomment imports and requirements)
-                # snow_client = pysnow.Client(instance=SERVICENOW_INSTANCE, user=SERVICENOW_USER, password=password)
-                # # Define default resources or test connection
-                # snow_client.all(table='cmdb_ci_server', query=pysnow.QueryBuilder().AND().field('name').equals('test')).get(limit=1)
-                logger.info(f"ServiceNow client initialized for instance: {SERVICENOW_INSTANCE} (Placeholder - requires library)")
+                snow_client = ServiceNowClient(SERVICENOW_INSTANCE, SERVICENOW_USER, password)
+                logger.info(f"ServiceNow client initialized for instance: {snow_client.base_url}")
             else:
                  logger.error("ServiceNow configured but password secret not found/readable.")
 
@@ -131,8 +1340,183 @@ def initialize_servicenow():
     else:
          logger.info("ServiceNow connection details not fully configured. ServiceNow backend disabled.")
 
+SNOW_TABLE_COLUMN = "snow_table"
+SNOW_TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+def snow_time_value(moment: dt) -> str:
+    """Encoded-query value for a UTC sys_updated_on.
+
+    The Table API returns sys_updated_on in UTC but reads date literals in a
+    query in the session user's time zone. Either convert to that zone or let
+    GlideDateTime, whose string constructor takes UTC, parse the value.
+    """
+    if SERVICENOW_TIMEZONE:
+        return moment.replace(tzinfo=timezone.utc).astimezone(ZoneInfo(SERVICENOW_TIMEZONE)).strftime(SNOW_TIME_FORMAT)
+    return f"javascript:new GlideDateTime('{moment.strftime(SNOW_TIME_FORMAT)}')"
+
+class ServiceNowSync:
+    """Mirrors SERVICENOW_SYNC_TABLES into the SQLite CMDB.
+
+    Each table starts with a full snapshot fetched with parallel paged
+    requests and upserted page by page. Afterwards only records with
+    sys_updated_on at or after the stored watermark (minus
+    SERVICENOW_SYNC_OVERLAP) are fetched. Deletions are picked up by the
+    periodic full snapshot: rows are upserted under the source
+    "servicenow:<table>", and the snapshot releases the rows it no longer
+    sees, deleting only those no CSV import or upsert call also wrote.
+    Rows are keyed by SERVICENOW_SYNC_HOSTNAME_FIELD, so cmdb.local.* and
+    cmdb.query answer from the mirror. cmdb_rel_ci is mirrored into the
+    relations table instead, with parent/child/type display values, and
+    rebuilds the relationship graph when it changes. The sync runs on its own
+    thread, event loop and connection pool.
+    """
+    def __init__(self, tables: List[str], interval: float):
+        self.tables = tables
+        self.interval = interval
+        self.client: Optional[ServiceNowClient] = None
+        self.status: Dict[str, Dict[str, Any]] = {table: {} for table in tables}
+
+    def start(self, client: ServiceNowClient):
+        # A separate pool: AsyncClient connections belong to one event loop
+        self.client = ServiceNowClient(client.base_url, *client.auth)
+        sqlite_cmdb.ensure_index("sys_id")
+        threading.Thread(target=self.run, name="servicenow-sync", daemon=True).start()
+        logger.info(f"Mirroring ServiceNow tables {self.tables} every {self.interval}s")
+
+    def run(self):
+        loop = asyncio.new_event_loop()
+        while True:
+            for table in self.tables:
+                try:
+                    loop.run_until_complete(self.sync_table(table))
+                except Exception as e:
+                    self.status[table]["last_error"] = f"{dt.now().isoformat()}: {e}"
+                    logger.error(f"ServiceNow sync of '{table}' failed: {e}", exc_info=True)
+            time.sleep(self.interval)
+
+    def is_mirrored(self, table: str) -> bool:
+        return (table in self.tables and table != RELATION_TABLE and sqlite_cmdb is not None
+                and sqlite_cmdb.get_meta(f"snow_watermark:{table}") is not None)
+
+    def prepare(self, table: str, record: Dict[str, Any]) -> Dict[str, Any]:
+        return {**record, HOSTNAME_COLUMN: record.get(SERVICENOW_SYNC_HOSTNAME_FIELD), SNOW_TABLE_COLUMN: table}
+
+    def prepare_relation(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        # sysparm_display_value=all returns {"value", "display_value"} per field
+        field = lambda name, key: record[name].get(key) if isinstance(record.get(name), dict) else record.get(name)
+        return {
+            "_key": field("sys_id", "value"),
+            "parent": field("parent", "display_value"),
+            "child": field("child", "display_value"),
+            "type": field("type", "display_value"),
+            "sys_updated_on": field("sys_updated_on", "value")
+        }
+
+    async def sync_table(self, table: str):
+        watermark = sqlite_cmdb.get_meta(f"snow_watermark:{table}")
+        last_full = float(sqlite_cmdb.get_meta(f"snow_full_sync:{table}") or 0)
+        full = watermark is None or (SERVICENOW_SYNC_FULL_INTERVAL > 0 and time.time() - last_full >= SERVICENOW_SYNC_FULL_INTERVAL)
+        query = ""
+        if not full:
+            since = dt.strptime(watermark, SNOW_TIME_FORMAT) - timedelta(seconds=SERVICENOW_SYNC_OVERLAP)
+            query = f"sys_updated_on>={snow_time_value(since)}"
+        relations = table == RELATION_TABLE
+        fields, display_value = None, None
+        if relations:
+            fields, display_value = ["sys_id", "sys_updated_on", "parent", "child", "type"], "all"
+        elif SERVICENOW_SYNC_FIELDS:
+            fields = list(dict.fromkeys(SERVICENOW_SYNC_FIELDS + ["sys_id", "sys_updated_on", SERVICENOW_SYNC_HOSTNAME_FIELD]))
+
+        started = time.perf_counter()
+        source, stamp = f"servicenow:{table}", time.time_ns()
+        totals = {"upserted": 0, "skipped": 0, "changed": 0}
+        seen: Set[str] = set()
+        newest = watermark or ""
+        async for page in self.client.iter_pages(table, query, fields, display_value=display_value):
+            if relations:
+                page = [self.prepare_relation(record) for record in page]
+                totals["upserted"] += sqlite_cmdb.upsert_relations(page, "servicenow")
+                seen.update(record["_key"] for record in page)
+            else:
+                for name, count in sqlite_cmdb.upsert([self.prepare(table, record) for record in page], source, stamp).items():
+                    totals[name] += count
+            for record in page:
+                updated = record.get("sys_updated_on") or ""
+                # Records re-read from the overlap window are upserted again but are not changes
+                totals["changed"] += updated > (watermark or "")
+                newest = max(newest, updated)
+        if full:
+            if relations:
+                stale = sqlite_cmdb.relation_keys("servicenow") - seen
+                totals["deleted"] = sqlite_cmdb.delete_relations(list(stale)) if stale else 0
+            else:
+                # Rows a CSV import or the upsert tool also wrote lose only their ServiceNow identity
+                totals["deleted"] = sqlite_cmdb.release(source, stamp, [SNOW_TABLE_COLUMN, "sys_id"])
+            sqlite_cmdb.set_meta(f"snow_full_sync:{table}", str(time.time()))
+        if relations and (totals["changed"] or totals.get("deleted")):
+            load_relation_graph()
+        # An empty table still records a watermark so later runs are deltas
+        sqlite_cmdb.set_meta(f"snow_watermark:{table}", newest or time.strftime(SNOW_TIME_FORMAT, time.gmtime()))
+        self.status[table] = {
+            "mode": "full" if full else "delta",
+            "finished_at": dt.now().isoformat(),
+            "seconds": round(time.perf_counter() - started, 3),
+            "watermark": sqlite_cmdb.get_meta(f"snow_watermark:{table}"),
+            "last_error": None,
+            **totals
+        }
+        if full or totals["changed"]:
+            logger.info(f"ServiceNow {'full' if full else 'delta'} sync of '{table}': {self.status[table]}")
+
+    def lookup(self, table: str, sys_id: Optional[str], name: Optional[str]) -> Optional[Dict[str, Any]]:
+        if SNOW_TABLE_COLUMN not in sqlite_cmdb.columns:
+            return None
+        conditions = [{"field": SNOW_TABLE_COLUMN, "op": "eq", "value": table}]
+        if sys_id:
+            conditions.append({"field": "sys_id", "op": "eq", "value": sys_id})
+        if name:
+            conditions.append({"field": HOSTNAME_COLUMN, "op": "eq", "value": name})
+        results = sqlite_cmdb.query({"all": conditions}, None, None, 1, 0)["results"]
+        if not results:
+            return None
+        return {col: value for col, value in results[0].items() if value is not None and col != SNOW_TABLE_COLUMN}
+
+servicenow_sync = ServiceNowSync(SERVICENOW_SYNC_TABLES, SERVICENOW_SYNC_INTERVAL)
+
+def read_relations_csv(path: str):
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            row = {str(col).lower().strip(): value for col, value in row.items()}
+            yield row.get("parent"), row.get("child"), row.get("type")
+
+def load_relation_graph() -> Optional[RelationGraph]:
+    """Build the graph from CMDB_RELATIONS_PATH and the SQLite relations table, then swap it in"""
+    global relation_graph, relation_graph_generation
+    cmdb_reloader.relations_signature = signature = file_signature(RELATIONS_PATH)
+    sources = []
+    if signature is not None:
+        sources.append(read_relations_csv(RELATIONS_PATH))
+    if sqlite_cmdb is not None:
+        sources.append(sqlite_cmdb.relations())
+    if not sources:
+        return None
+    started = time.perf_counter()
+    try:
+        graph = RelationGraph(edge for source in sources for edge in source)
+    except Exception as e:
+        logger.error(f"Failed to load CMDB relationships: {e}", exc_info=True)
+        return None
+    relation_graph_generation += 1
+    graph.generation = relation_graph_generation
+    graph.loaded_at = dt.now().isoformat()
+    relation_graph = graph
+    logger.info(f"Loaded CMDB relationship graph generation {graph.generation}: {len(graph)} CIs, "
+                f"{graph.edge_count} edges in {time.perf_counter() - started:.2f}s")
+    return graph
+
 initialize_local_cmdb()
 initialize_servicenow()
+load_relation_graph()
 
 # --- Health Check Endpoint ---
 async def health_check(request): # Starlette request argument
@@ -142,104 +1526,588 @@ async def health_check(request): # Starlette request argument
 # --- Tool Definitions ---
 
 @mcp_server.tool("cmdb.local.getServerInfo")
+@tracked
 def get_local_server_info(hostname: str) -> Optional[Dict[str, Any]]:
     """Retrieves server information from the local CMDB based on hostname."""
     logger.info(f"Querying local CMDB for server: {hostname}")
-    if local_cmdb_data is None or hostname is None:
+    if sqlite_cmdb is not None and hostname is not None:
+        try:
+            return sqlite_cmdb.get(hostname)
+        except Exception as e:
+            logger.error(f"Error querying SQLite CMDB for server '{hostname}': {e}", exc_info=True)
+            return {"error": str(e)}
+    store = local_cmdb
+    if store is None or hostname is None:
         logger.warning("Local CMDB not loaded or hostname not provided.")
         return None
     try:
-        # Assuming a 'hostname' column exists
-        result = local_cmdb_data[local_cmdb_data['hostname'].str.lower() == hostname.lower()]
-        if not result.empty:
-            # Convert the first match to a dictionary
-            server_info = result.iloc[0].to_dict()
+        if store.hostname_index is None:
+            logger.error(f"Local CMDB does not contain a '{HOSTNAME_COLUMN}' column.")
+            return {"error": f"Local CMDB missing '{HOSTNAME_COLUMN}' column"}
+        server_info = store.get(hostname)
+        if server_info is not None:
             logger.info(f"Found server '{hostname}' in local CMDB.")
             return server_info
         else:
             logger.info(f"Server '{hostname}' not found in local CMDB.")
             return None
-    except KeyError:
-         logger.error("Local CMDB does not contain a 'hostname' column.")
-         return {"error": "Local CMDB missing 'hostname' column"}
     except Exception as e:
         logger.error(f"Error querying local CMDB for server '{hostname}': {e}", exc_info=True)
         return {"error": str(e)}
 
+@mcp_server.tool("cmdb.local.getServersInfo")
+@tracked
+async def get_local_servers_info(hostnames: List[str], ctx: Context = None) -> Dict[str, Any]:
+    """Retrieves server information for many hostnames at once (exact, case-insensitive).
+
+    Returns {"servers": {hostname: info}, "missing": [hostnames not found], ...}. Batches are
+    resolved in chunks of CMDB_BATCH_CHUNK_SIZE with a progress notification after each chunk.
+    """
+    hostnames = list(dict.fromkeys(str(hostname) for hostname in hostnames))
+    logger.info(f"Querying local CMDB for {len(hostnames)} servers")
+    if len(hostnames) > BATCH_MAX_HOSTNAMES:
+        return {"error": f"At most {BATCH_MAX_HOSTNAMES} hostnames per call", "servers": {}, "missing": []}
+    store = sqlite_cmdb if sqlite_cmdb is not None else local_cmdb
+    if store is None:
+        logger.warning("Local CMDB not loaded.")
+        return {"error": "Local CMDB not loaded", "servers": {}, "missing": []}
+    if store is local_cmdb and store.hostname_index is None:
+        return {"error": f"Local CMDB missing '{HOSTNAME_COLUMN}' column", "servers": {}, "missing": []}
+    try:
+        servers: Dict[str, Dict[str, Any]] = {}
+        for start in range(0, len(hostnames), BATCH_CHUNK_SIZE):
+            servers.update(store.get_many(hostnames[start:start + BATCH_CHUNK_SIZE]))
+            done = min(start + BATCH_CHUNK_SIZE, len(hostnames))
+            if ctx is not None and done < len(hostnames):
+                await ctx.report_progress(done, len(hostnames))
+            # Let other requests run between chunks
+            await asyncio.sleep(0)
+        missing = [hostname for hostname in hostnames if hostname not in servers]
+        logger.info(f"Found {len(servers)} of {len(hostnames)} servers in local CMDB.")
+        return {
+            "requested": len(hostnames),
+            "found": len(servers),
+            "generation": store.generation,
+            "servers": servers,
+            "missing": missing
+        }
+    except Exception as e:
+        logger.error(f"Error querying local CMDB for {len(hostnames)} servers: {e}", exc_info=True)
+        return {"error": str(e), "servers": {}, "missing": []}
+
 @mcp_server.tool("cmdb.local.findServers")
-def find_local_servers(query_field: str, query_value: str) -> List[Dict[str, Any]]:
-    """Finds servers in the local CMDB matching a specific field value (e.g., query_field='os', query_value='Ubuntu')."""
+@tracked
+def find_local_servers(query_field: str, query_value: str, limit: int = FIND_DEFAULT_LIMIT, offset: int = 0, regex: bool = False) -> Union[List[Dict[str, Any]], Dict[str, Any]]:
+    """Finds servers in the local CMDB whose field contains a value, case-insensitively (e.g., query_field='os', query_value='Ubuntu').
+
+    `query_value` is matched as a literal substring ('10.0.1.' only matches addresses in 10.0.1.x);
+    pass regex=True to match it as a regular expression instead, which scans the column.
+    Returns at most `limit` matches (capped at CMDB_FIND_MAX_LIMIT) starting at `offset`, in CMDB order,
+    or {"error": ...} for an invalid pattern, an unknown field or a failed search.
+    """
     logger.info(f"Searching local CMDB where {query_field} = {query_value}")
-    if local_cmdb_data is None:
+    limit = max(1, min(limit, FIND_MAX_LIMIT))
+    offset = max(0, offset)
+    if regex:
+        try:
+            compile_pattern(str(query_value))
+        except re.error as e:
+            logger.error(f"Invalid regular expression '{query_value}': {e}")
+            return {"error": f"Invalid regular expression: {e}"}
+    if sqlite_cmdb is not None:
+        field = query_field.lower().strip()
+        if field not in sqlite_cmdb.columns:
+            logger.error(f"Query field '{field}' not found in local CMDB columns.")
+            return {"error": f"Unknown field '{field}'"}
+        try:
+            return sqlite_cmdb.find(field, str(query_value), limit, offset, regex)
+        except Exception as e:
+            logger.error(f"Error searching SQLite CMDB: {e}", exc_info=True)
+            return {"error": str(e)}
+    store = local_cmdb
+    if store is None:
         logger.warning("Local CMDB not loaded.")
-        return []
+        return {"error": "Local CMDB not loaded"}
     try:
         field = query_field.lower().strip()
-        if field not in local_cmdb_data.columns:
+        if field not in store.columns:
             logger.error(f"Query field '{field}' not found in local CMDB columns.")
-            return []
+            return {"error": f"Unknown field '{field}'"}
             
-        results = local_cmdb_data[local_cmdb_data[field].astype(str).str.contains(query_value, case=False, na=False)]
+        rows = store.contains(field, str(query_value), regex)
         
-        if not results.empty:
-            logger.info(f"Found {len(results)} servers matching {query_field}={query_value}.")
-            return results.to_dict('records')
+        if len(rows):
+            logger.info(f"Found {len(rows)} servers matching {query_field}={query_value}, returning {offset}..{offset + limit}.")
+            return store.records(rows[offset:offset + limit])
         else:
             logger.info(f"No servers found matching {query_field}={query_value}.")
             return []
     except Exception as e:
         logger.error(f"Error searching local CMDB: {e}", exc_info=True)
-        return []
+        return {"error": str(e)}
+
+def normalize_filter(node: Any, columns: List[str]) -> Dict[str, Any]:
+    """Validate a cmdb.query filter node and lowercase its field names"""
+    if not isinstance(node, dict):
+        raise ValueError(f"Filter must be an object, got: {node!r}")
+    for group in ("all", "any"):
+        if group in node:
+            if not isinstance(node[group], list):
+                raise ValueError(f"'{group}' must be a list of filters")
+            return {group: [normalize_filter(child, columns) for child in node[group]]}
+    if "not" in node:
+        return {"not": normalize_filter(node["not"], columns)}
+    field = str(node.get("field", "")).lower().strip()
+    op = node.get("op", "eq")
+    value = node.get("value")
+    if field not in columns:
+        raise ValueError(f"Unknown field '{field}'. Must be among: {', '.join(columns)}")
+    if op not in QUERY_OPS:
+        raise ValueError(f"Unknown op '{op}'. Must be one of: {', '.join(QUERY_OPS)}")
+    if op == "in" and not isinstance(value, list):
+        raise ValueError("'in' requires a list value")
+    if op == "range" and (not isinstance(value, dict) or not set(value) & set(RANGE_BOUNDS) or set(value) - set(RANGE_BOUNDS)):
+        raise ValueError(f"'range' requires an object with any of: {', '.join(RANGE_BOUNDS)}")
+    if op not in ("in", "range") and value is None:
+        raise ValueError(f"'{op}' requires a value")
+    return {"field": field, "op": op, "value": value}
+
+@mcp_server.tool("cmdb.query")
+@tracked
+def query_cmdb(
+    filters: List[Dict[str, Any]],
+    sort: Optional[List[str]] = None,
+    fields: Optional[List[str]] = None,
+    limit: int = FIND_DEFAULT_LIMIT,
+    offset: int = 0
+) -> Dict[str, Any]:
+    """Queries the local CMDB with several filters combined, plus sort, projection and paging.
+
+    Each filter is {"field": ..., "op": ..., "value": ...} with op one of eq, in, contains,
+    prefix (case-insensitive) or range (value {"gte": .., "lt": ..}); filters in the list
+    must all match. Groups {"any": [...]}, {"all": [...]} and {"not": filter} nest.
+    Example: [{"field": "os_type", "op": "eq", "value": "Linux"},
+              {"any": [{"field": "services", "op": "in", "value": ["nginx", "redis"]},
+                       {"field": "hostname", "op": "prefix", "value": "web-"}]}]
+    `sort` lists columns, prefixed with '-' for descending; `fields` limits the returned columns.
+    """
+    logger.info(f"Querying local CMDB: filters={filters}, sort={sort}, fields={fields}")
+    store = sqlite_cmdb if sqlite_cmdb is not None else local_cmdb
+    if store is None:
+        logger.warning("Local CMDB not loaded.")
+        return {"error": "Local CMDB not loaded", "results": []}
+    try:
+        root = normalize_filter({"all": filters if isinstance(filters, list) else [filters]}, store.columns)
+        for key in (sort or []) + (fields or []):
+            if key.lstrip("-").lower().strip() not in store.columns:
+                raise ValueError(f"Unknown field '{key}'. Must be among: {', '.join(store.columns)}")
+        limit = max(1, min(limit, FIND_MAX_LIMIT))
+        offset = max(0, offset)
+        columns = [field.lower().strip() for field in fields] if fields else None
+        
+        if store is sqlite_cmdb:
+            result = store.query(root, sort, columns, limit, offset)
+            total = result["total"]
+            return {
+                "total": total,
+                "count": len(result["results"]),
+                "offset": offset,
+                "limit": limit,
+                "next_offset": offset + limit if offset + limit < total else None,
+                "generation": store.generation,
+                "plan": result["plan"],
+                "results": result["results"]
+            }
+        
+        plan = [
+            {"filter": child, "estimated_rows": store.estimate(child)}
+            for child in sorted(root["all"], key=store.estimate)
+        ]
+        rows = store.select(root)
+        if sort:
+            rows = store.sort_rows(rows, sort)
+        page = rows[offset:offset + limit]
+        total = len(rows)
+        logger.info(f"Query matched {total} rows, returning {len(page)}.")
+        return {
+            "total": total,
+            "count": len(page),
+            "offset": offset,
+            "limit": limit,
+            "next_offset": offset + limit if offset + limit < total else None,
+            "generation": store.generation,
+            "plan": plan,
+            "results": store.records(page, columns)
+        }
+    except ValueError as e:
+        return {"error": str(e), "results": []}
+    except Exception as e:
+        logger.error(f"Error querying local CMDB: {e}", exc_info=True)
+        return {"error": str(e), "results": []}
+
+@mcp_server.tool("cmdb.local.upsertServers")
+@tracked
+def upsert_local_servers(servers: List[Dict[str, Any]], approval_token: Optional[str] = None) -> Dict[str, Any]:
+    """Inserts or updates servers in the SQLite CMDB, keyed by hostname (requires approval).
+
+    Only the fields present in each server dict are changed; new fields become new columns.
+    Requires CMDB_BACKEND=sqlite.
+    """
+    logger.info(f"Upserting {len(servers)} servers into local CMDB")
+    if REQUIRE_APPROVAL and not approval_token:
+        return {"error": "Modifying CMDB data requires approval token"}
+    if sqlite_cmdb is None:
+        return {"error": "Upserts require CMDB_BACKEND=sqlite"}
+    try:
+        return sqlite_cmdb.upsert(servers)
+    except Exception as e:
+        logger.error(f"Error upserting into SQLite CMDB: {e}", exc_info=True)
+        return {"error": str(e)}
+
+@mcp_server.tool("cmdb.local.deleteServers")
+@tracked
+def delete_local_servers(hostnames: List[str], approval_token: Optional[str] = None) -> Dict[str, Any]:
+    """Deletes servers from the SQLite CMDB by hostname (requires approval). Requires CMDB_BACKEND=sqlite."""
+    logger.info(f"Deleting {len(hostnames)} servers from local CMDB")
+    if REQUIRE_APPROVAL and not approval_token:
+        return {"error": "Modifying CMDB data requires approval token"}
+    if sqlite_cmdb is None:
+        return {"error": "Deletes require CMDB_BACKEND=sqlite"}
+    try:
+        return {"deleted": sqlite_cmdb.delete(hostnames)}
+    except Exception as e:
+        logger.error(f"Error deleting from SQLite CMDB: {e}", exc_info=True)
+        return {"error": str(e)}
+
+@mcp_server.tool("cmdb.local.importCsv")
+@tracked
+def import_local_csv(path: str, replace: bool = False, approval_token: Optional[str] = None) -> Dict[str, Any]:
+    """Bulk-imports a CSV (under CMDB_IMPORT_ROOT) into the SQLite CMDB as chunked upserts (requires approval).
+
+    With replace=True, servers imported from the same file before but no longer in it are deleted
+    after the import (servers also written by another source are kept).
+    Requires CMDB_BACKEND=sqlite.
+    """
+    logger.info(f"Importing {path} into local CMDB (replace={replace})")
+    if REQUIRE_APPROVAL and not approval_token:
+        return {"error": "Modifying CMDB data requires approval token"}
+    if sqlite_cmdb is None:
+        return {"error": "Imports require CMDB_BACKEND=sqlite"}
+    root = os.path.realpath(IMPORT_ROOT)
+    resolved = os.path.realpath(os.path.join(root, path))
+    if os.path.commonpath([root, resolved]) != root:
+        return {"error": f"Import path must be under {IMPORT_ROOT}"}
+    if not os.path.isfile(resolved):
+        return {"error": f"File not found: {path}"}
+    try:
+        started = time.perf_counter()
+        totals = sqlite_cmdb.import_csv(resolved, replace=replace)
+        return {**totals, "seconds": round(time.perf_counter() - started, 3)}
+    except Exception as e:
+        logger.error(f"Error importing {path} into SQLite CMDB: {e}", exc_info=True)
+        return {"error": str(e)}
+
+def export_plan(fmt: str, fields: Optional[List[str]]) -> tuple:
+    """Resolve the store and projected columns for an export, or return an error message"""
+    if fmt not in EXPORT_FORMATS:
+        return None, None, f"Unknown format '{fmt}', expected one of {EXPORT_FORMATS}"
+    if fmt == "arrow" and pa is None:
+        return None, None, "pyarrow library not installed; use format 'ndjson'"
+    store = sqlite_cmdb if sqlite_cmdb is not None else local_cmdb
+    if store is None:
+        return None, None, "Local CMDB not loaded"
+    columns = [field.lower().strip() for field in fields] if fields else list(store.columns)
+    unknown = [col for col in columns if col not in store.columns]
+    if unknown:
+        return None, None, f"Unknown fields {unknown}. Must be among: {', '.join(store.columns)}"
+    return store, columns, None
+
+@mcp_server.tool("cmdb.local.export")
+@tracked
+def export_local_cmdb(
+    format: str = "ndjson",
+    fields: Optional[List[str]] = None,
+    offset: int = 0,
+    limit: int = EXPORT_CHUNK_ROWS
+) -> Dict[str, Any]:
+    """Exports a slice of the local CMDB in bulk, encoded straight from the column data.
+
+    format is 'ndjson' (newline-delimited JSON text in `data`) or 'arrow' (base64 Arrow IPC stream in `data`);
+    `fields` projects columns. Page through the inventory with `next_offset` (limit is capped at CMDB_EXPORT_MAX_ROWS);
+    GET /export?format=...&fields=... streams the whole inventory in one response instead.
+    """
+    logger.info(f"Exporting local CMDB: format={format}, fields={fields}, offset={offset}, limit={limit}")
+    store, columns, error = export_plan(format, fields)
+    if error:
+        return {"error": error}
+    try:
+        offset, limit = max(0, offset), max(1, min(limit, EXPORT_MAX_ROWS))
+        total = len(store)
+        data = b"".join(store.export(columns, format, EXPORT_CHUNK_ROWS, offset, limit))
+        rows = max(0, min(limit, total - offset))
+        return {
+            "format": format,
+            "fields": columns,
+            "total": total,
+            "rows": rows,
+            "next_offset": offset + rows if offset + rows < total else None,
+            "generation": store.generation,
+            "data": data.decode() if format == "ndjson" else base64.b64encode(data).decode()
+        }
+    except Exception as e:
+        logger.error(f"Error exporting local CMDB: {e}", exc_info=True)
+        return {"error": str(e)}
+
+async def export_route(request):
+    """GET /export?format=ndjson|arrow&fields=a,b: stream the whole local CMDB in chunks of CMDB_EXPORT_CHUNK_ROWS"""
+    fmt = request.query_params.get("format", "ndjson")
+    fields = [field for field in request.query_params.get("fields", "").split(",") if field.strip()] or None
+    store, columns, error = export_plan(fmt, fields)
+    if error:
+        return JSONResponse({"error": error}, status_code=400)
+    logger.info(f"Streaming local CMDB export: format={fmt}, fields={columns}, rows={len(store)}")
+    return StreamingResponse(
+        store.export(columns, fmt, EXPORT_CHUNK_ROWS),
+        media_type=EXPORT_MEDIA_TYPES[fmt],
+        headers={"X-CMDB-Generation": str(store.generation)}
+    )
+
+TABLE_NAME_RE = re.compile(r"^[a-z0-9_]+$")
+SYS_ID_RE = re.compile(r"^[A-Za-z0-9]+$")
 
 @mcp_server.tool("cmdb.servicenow.getCiDetails")
-def get_servicenow_ci(sys_id: Optional[str] = None, name: Optional[str] = None, table: str = 'cmdb_ci') -> Optional[Dict[str, Any]]:
-    """Retrieves Configuration Item (CI) details from ServiceNow by sys_id or name."""
+@tracked
+async def get_servicenow_ci(sys_id: Optional[str] = None, name: Optional[str] = None, table: str = 'cmdb_ci') -> Optional[Dict[str, Any]]:
+    """Retrieves Configuration Item (CI) details from ServiceNow by sys_id or name.
+
+    Tables in SERVICENOW_SYNC_TABLES are answered from the local mirror; others are cached for SERVICENOW_CACHE_TTL seconds.
+    """
     logger.info(f"Querying ServiceNow table '{table}' for CI: sys_id={sys_id}, name={name}")
+    if not sys_id and not name:
+         return {"error": "Either sys_id or name must be provided."}
+    if servicenow_sync.is_mirrored(table):
+        try:
+            return servicenow_sync.lookup(table, sys_id, name)
+        except Exception as e:
+            logger.error(f"Error reading ServiceNow mirror of '{table}': {e}", exc_info=True)
+            return {"error": str(e)}
     if not snow_client:
         logger.error("ServiceNow client not initialized.")
         return {"error": "ServiceNow client not available."}
-    if not sys_id and not name:
-         return {"error": "Either sys_id or name must be provided."}
+    if not TABLE_NAME_RE.match(table):
+        return {"error": f"Invalid table name: {table}"}
+    if sys_id and not SYS_ID_RE.match(sys_id):
+        return {"error": f"Invalid sys_id: {sys_id}"}
+    if name and "^" in name:
+        # '^' separates encoded query conditions, so it would add conditions of its own
+        return {"error": "CI name must not contain '^'"}
 
+    cache_key = (table, sys_id, name)
+    cached = snow_cache.get(cache_key)
+    if cached is not None:
+        return cached
     try:
-        # Example using pysnow (uncomment imports and requirements)
-        # resource = snow_client.resource(api_path=f'/table/{table}')
-        # query = pysnow.QueryBuilder()
-        # if sys_id:
-        #     query.AND().field('sys_id').equals(sys_id)
-        # if name:
-        #      query.AND().field('name').equals(name)
-        # response = resource.get(query=query, limit=1)
-        # result = response.one_or_none()
-        # if result:
-        #     logger.info(f"Found CI in ServiceNow: {result.get('name', sys_id)}")
-        #     return result
-        # else:
-        #      logger.info("CI not found in ServiceNow.")
-        #      return None
-        logger.warning("ServiceNow client library not fully implemented.") # Placeholder
-        return {"status": "ServiceNow client library not fully implemented."} # Placeholder
+        if sys_id and not name:
+            result = await snow_client.get_record(table, sys_id)
+        else:
+            query = f"name={name}" + (f"^sys_id={sys_id}" if sys_id else "")
+            records, _ = await snow_client.fetch_page(table, {"sysparm_query": query, "sysparm_exclude_reference_link": "true"}, 0, 1)
+            result = records[0] if records else None
+        if result:
+            logger.info(f"Found CI in ServiceNow: {result.get('name', sys_id)}")
+            snow_cache.put(cache_key, result)
+            return result
+        else:
+            logger.info("CI not found in ServiceNow.")
+            return None
     except Exception as e:
         logger.error(f"Error querying ServiceNow table '{table}': {e}", exc_info=True)
         return {"error": str(e)}
 
+@mcp_server.tool("cmdb.servicenow.queryCis")
+@tracked
+async def query_servicenow_cis(
+    query: str = "",
+    table: str = 'cmdb_ci',
+    fields: Optional[List[str]] = None,
+    max_records: int = 1000,
+    ctx: Context = None
+) -> Dict[str, Any]:
+    """Lists CIs from a ServiceNow table matching an encoded query (e.g. 'operational_status=1^os=Linux').
+
+    Pages are fetched in parallel; at most `max_records` (capped at SERVICENOW_QUERY_MAX_RECORDS) are returned.
+    """
+    logger.info(f"Querying ServiceNow table '{table}': query={query}, max_records={max_records}")
+    if not snow_client:
+        logger.error("ServiceNow client not initialized.")
+        return {"error": "ServiceNow client not available.", "records": []}
+    if not TABLE_NAME_RE.match(table):
+        return {"error": f"Invalid table name: {table}", "records": []}
+    max_records = max(1, min(max_records, SERVICENOW_QUERY_MAX_RECORDS))
+    try:
+        records: List[Dict[str, Any]] = []
+        async for page in snow_client.iter_pages(table, query, fields, max_records):
+            records.extend(page)
+            if ctx is not None:
+                await ctx.report_progress(len(records), max_records)
+        return {"table": table, "count": len(records), "records": records}
+    except Exception as e:
+        logger.error(f"Error querying ServiceNow table '{table}': {e}", exc_info=True)
+        return {"error": str(e), "records": []}
+
+def graph_traverse(ci: str, direction: str, depth: int, types: Optional[List[str]], fields: Optional[List[str]]) -> Dict[str, Any]:
+    graph = relation_graph
+    if graph is None:
+        return {"error": "CMDB relationship graph not loaded", "nodes": [], "edges": []}
+    if direction not in GRAPH_DIRECTIONS:
+        return {"error": f"Unknown direction '{direction}', expected one of {GRAPH_DIRECTIONS}", "nodes": [], "edges": []}
+    depth = max(1, min(depth, GRAPH_MAX_DEPTH))
+    result = graph.traverse(ci, direction, depth, types)
+    if result is None:
+        return {"error": f"CI '{ci}' has no relationships", "nodes": [], "edges": []}
+    result = {**result, "generation": graph.generation}
+    store = sqlite_cmdb if sqlite_cmdb is not None else local_cmdb
+    if fields and store is not None and (store is sqlite_cmdb or store.hostname_index is not None):
+        # Attach CMDB attributes for CIs that are also inventory rows
+        records = store.get_many([node["ci"] for node in result["nodes"]])
+        columns = [field.lower() for field in fields]
+        result["nodes"] = [
+            {**node, "attributes": {col: records[node["ci"]].get(col) for col in columns}} if node["ci"] in records else node
+            for node in result["nodes"]
+        ]
+    return result
+
+@mcp_server.tool("cmdb.graph.neighbors")
+@tracked
+def graph_neighbors(
+    ci: str,
+    direction: str = "both",
+    depth: int = 1,
+    types: Optional[List[str]] = None,
+    fields: Optional[List[str]] = None
+) -> Dict[str, Any]:
+    """Lists CIs related to `ci` within `depth` hops (e.g. what runs on a host: direction='upstream', depth=1).
+
+    direction is 'downstream' (what the CI depends on / runs on), 'upstream' (what depends on it) or 'both';
+    `types` restricts the relationship types followed and `fields` attaches CMDB columns to each CI.
+    Returns the reached CIs with their hop count and the edges traversed.
+    """
+    logger.info(f"Graph neighbors of '{ci}': direction={direction}, depth={depth}, types={types}")
+    try:
+        return graph_traverse(ci, direction, depth, types, fields)
+    except Exception as e:
+        logger.error(f"Error traversing relationships of '{ci}': {e}", exc_info=True)
+        return {"error": str(e), "nodes": [], "edges": []}
+
+@mcp_server.tool("cmdb.graph.impact")
+@tracked
+def graph_impact(
+    ci: str,
+    depth: int = GRAPH_MAX_DEPTH,
+    types: Optional[List[str]] = None,
+    fields: Optional[List[str]] = None
+) -> Dict[str, Any]:
+    """Lists every CI that directly or transitively depends on `ci`, i.e. what is affected if it fails.
+
+    Returns the affected CIs grouped by hop count ("by_depth"), their total and the dependency edges.
+    """
+    logger.info(f"Graph impact of '{ci}': depth={depth}, types={types}")
+    try:
+        result = graph_traverse(ci, "upstream", depth, types, fields)
+        if "error" in result:
+            return result
+        by_depth: Dict[int, List[str]] = {}
+        for node in result["nodes"]:
+            by_depth.setdefault(node["depth"], []).append(node["ci"])
+        return {**result, "affected": len(result["nodes"]), "by_depth": by_depth}
+    except Exception as e:
+        logger.error(f"Error computing impact of '{ci}': {e}", exc_info=True)
+        return {"error": str(e), "nodes": [], "edges": []}
+
+def graph_metrics() -> Dict[str, Any]:
+    graph = relation_graph
+    if graph is None:
+        return {"loaded": False}
+    return {
+        "loaded": True,
+        "cis": len(graph),
+        "edges": graph.edge_count,
+        "relationship_types": len(graph.types),
+        "generation": graph.generation,
+        "loaded_at": graph.loaded_at,
+        "memoized_traversals": len(graph.cache.entries),
+        "cache_hits": graph.cache.hits,
+        "cache_misses": graph.cache.misses
+    }
+
+def servicenow_metrics() -> Dict[str, Any]:
+    return {
+        **(snow_client.stats if snow_client is not None else {}),
+        "cache_entries": len(snow_cache.entries),
+        "cache_hits": snow_cache.hits,
+        "cache_misses": snow_cache.misses,
+        "sync": servicenow_sync.status
+    }
+
 # --- Metrics Tool (Example) ---
 @mcp_server.tool("cmdb.getMetrics")
+@tracked
 def get_metrics() -> dict:
     """Returns basic operational metrics for the CMDB service."""
-    # TODO: Implement actual metric tracking
+    store = local_cmdb
+    with request_counts_lock:
+        requests = {
+            "requests_processed": sum(request_counts.values()),
+            "errors_encountered": sum(error_counts.values()),
+            "requests_by_tool": dict(request_counts),
+            "errors_by_tool": dict(error_counts)
+        }
+    if sqlite_cmdb is not None:
+        return {
+            "status": "operational",
+            "backend": "sqlite",
+            "local_cmdb_loaded": True,
+            "local_cmdb_rows": len(sqlite_cmdb),
+            "local_cmdb_db_bytes": sqlite_cmdb.size_bytes(),
+            "local_cmdb_generation": sqlite_cmdb.generation,
+            "local_cmdb_loaded_at": sqlite_cmdb.get_meta("csv_loaded_at"),
+            "local_cmdb_reload_error": cmdb_reloader.last_error,
+            "servicenow_client_initialized": snow_client is not None,
+            "servicenow": servicenow_metrics(),
+            "relationship_graph": graph_metrics(),
+            **requests
+        }
     return {
         "status": "operational",
-        "local_cmdb_loaded": local_cmdb_data is not None,
+        "backend": "csv",
+        "local_cmdb_loaded": store is not None,
+        "local_cmdb_rows": len(store) if store is not None else 0,
+        "local_cmdb_memory_bytes": store.memory_bytes() if store is not None else 0,
+        "local_cmdb_indexes": ([HOSTNAME_COLUMN] if store and store.hostname_index is not None else []) + (list(store.indexes) if store else []),
+        "local_cmdb_generation": store.generation if store is not None else 0,
+        "local_cmdb_loaded_at": store.loaded_at if store is not None else None,
+        "local_cmdb_reload_error": cmdb_reloader.last_error,
         "servicenow_client_initialized": snow_client is not None,
-        "requests_processed": 0, # Replace with actual counter
-        "errors_encountered": 0  # Replace with actual counter
+        "servicenow": servicenow_metrics(),
+        "relationship_graph": graph_metrics(),
+        **requests
     }
 
 # --- Server Execution --- 
 if __name__ == "__main__":
     logger.info(f"Starting CMDB MCP Server (12_cmdb_mcp) on port {MCP_PORT}")
 
+    # Pick up edits to the CMDB CSV without restarting (and dropping SSE sessions)
+    if (pd or sqlite_cmdb is not None) and RELOAD_INTERVAL > 0:
+        cmdb_reloader.start()
+
+    # Mirror ServiceNow tables into the SQLite CMDB and keep them current with deltas
+    if SERVICENOW_SYNC_TABLES:
+        if snow_client is None or sqlite_cmdb is None:
+            logger.warning("SERVICENOW_SYNC_TABLES requires a ServiceNow client and CMDB_BACKEND=sqlite. ServiceNow sync disabled.")
+        else:
+            servicenow_sync.start(snow_client)
+
     # Get the Starlette app from FastMCP
     app = mcp_server.sse_app()
 
@@ -262,6 +2130,9 @@ if __name__ == "__main__":
     else:
         logger.info("Health check route already exists.")
 
+    # Bulk exports stream over plain HTTP, outside MCP message size limits
+    app.router.routes.append(Route("/export", export_route))
+
     try:
         host = getattr(mcp_server.settings, 'host', "0.0.0.0")
         log_level_setting = getattr(mcp_server.settings, 'log_level', "info")
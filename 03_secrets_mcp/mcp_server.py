@@ -1,6 +1,11 @@
 import os
+import asyncio
+import fnmatch
+import hashlib
 import logging
-from typing import Optional
+import threading
+from collections import OrderedDict
+from typing import Optional, Dict, Any, List
 import time
 from starlette.routing import Route
 from starlette.responses import JSONResponse
@@ -34,6 +39,18 @@ except ImportError:
     secretmanager = None
     GoogleApiExceptions = None
 
+try:
+    from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+except ImportError:
+    AESGCM = None
+
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+except ImportError:
+    Observer = None
+    FileSystemEventHandler = object
+
 # --- JSON Formatter Class ---
 class JSONFormatter(logging.Formatter):
     def __init__(self, service_name, *args, **kwargs):
@@ -75,6 +92,23 @@ MCP_PORT = int(os.getenv("MCP_PORT", 8003))
 KEEPASS_DB_PATH = os.getenv("KEEPASS_DB_PATH")
 KEEPASS_PASSWORD_SECRET_PATH = os.getenv("KEEPASS_PASSWORD_SECRET_PATH", "/run/secrets/keepass_master_password")
 KEEPASS_KEYFILE_PATH = os.getenv("KEEPASS_KEYFILE_PATH")
+KEEPASS_CHECK_INTERVAL = float(os.getenv("KEEPASS_CHECK_INTERVAL", 2.0)) # Seconds between stat() checks of the KDBX on reads
+KEEPASS_WATCH_ENABLED = os.getenv("KEEPASS_WATCH_ENABLED", "true").lower() == "true"
+KEEPASS_WATCH_DEBOUNCE = float(os.getenv("KEEPASS_WATCH_DEBOUNCE", 1.0))
+KEEPASS_WATCH_POLL_INTERVAL = float(os.getenv("KEEPASS_WATCH_POLL_INTERVAL", 5.0))
+
+# Secret Cache Config (cloud backends)
+SECRETS_CACHE_ENABLED = os.getenv("SECRETS_CACHE_ENABLED", "true").lower() == "true"
+SECRETS_CACHE_TTL = {
+    "azurekv": float(os.getenv("SECRETS_CACHE_TTL_AZUREKV", 60.0)),
+    "gcpsm": float(os.getenv("SECRETS_CACHE_TTL_GCPSM", 60.0))
+}
+SECRETS_CACHE_MAX_ENTRIES = int(os.getenv("SECRETS_CACHE_MAX_ENTRIES", 256)) # Per backend
+SECRETS_CACHE_EXCLUDE = [p.strip() for p in os.getenv("SECRETS_CACHE_EXCLUDE", "").split(",") if p.strip()] # Never cached, e.g. azurekv-root-*
+
+# Batch Retrieval Config
+SECRETS_BATCH_MAX = int(os.getenv("SECRETS_BATCH_MAX", 100)) # Secrets per secrets.getSecrets call
+SECRETS_BATCH_CONCURRENCY = int(os.getenv("SECRETS_BATCH_CONCURRENCY", 8)) # Parallel cloud backend fetches
 
 # Azure Key Vault Config
 AZURE_VAULT_URL = os.getenv("AZURE_VAULT_URL")
@@ -82,13 +116,256 @@ AZURE_VAULT_URL = os.getenv("AZURE_VAULT_URL")
 # Google Secret Manager Config
 GCP_PROJECT_ID = os.getenv("GCP_PROJECT_ID")
 
+# --- KeePass Store ---
+def file_signature(path: str) -> Optional[tuple]:
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+def file_digest(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+class KeePassSnapshot:
+    """One decrypted KDBX with a path -> entry index ("Group/Sub/Title")"""
+    def __init__(self, db, signature: Optional[tuple], digest: str):
+        self.db = db
+        self.signature = signature
+        self.digest = digest
+        self.loaded_at = dt.now().isoformat()
+        self.entries: Dict[str, Any] = {}
+        for entry in db.entries:
+            path = [part for part in (entry.path or []) if part]
+            if path:
+                self.entries.setdefault("/".join(path), entry)
+
+    def find(self, entry_path: str):
+        return self.entries.get(entry_path.strip("/"))
+
+class KeePassStore:
+    """Keeps the KDBX decrypted in memory and reloads it only when the file changes.
+
+    Opening a KDBX runs the key derivation function (Argon2/AES-KDF), which
+    dominates lookup latency, so reads are served from the current snapshot.
+    refresh() compares the file's mtime/size/inode and, if those changed, its
+    SHA-256; the KDF only runs when the content differs. Reads never run
+    refresh() themselves: current() only stat()s the file and hands a change
+    to a background reload, serving the old snapshot until it finishes. A
+    file that fails to open (e.g. mid-write) keeps the previous snapshot
+    serving until it changes again.
+    """
+    def __init__(self, path: str, password: Optional[str], keyfile: Optional[str]):
+        self.path = path
+        self.password = password
+        self.keyfile = keyfile
+        self.lock = threading.Lock()
+        self.snapshot: Optional[KeePassSnapshot] = None
+        self.last_check = 0.0
+        self.reloader: Optional[threading.Thread] = None
+        self.failed_signature = None
+        self.stats = {"reloads": 0, "unchanged_checks": 0, "reload_errors": 0, "last_load_seconds": None, "last_error": None}
+        self.load(file_signature(path))
+
+    def load(self, signature: Optional[tuple]):
+        started = time.perf_counter()
+        digest = file_digest(self.path)
+        db = PyKeePass(self.path, password=self.password, keyfile=self.keyfile)
+        self.snapshot = KeePassSnapshot(db, signature, digest)
+        self.stats["reloads"] += 1
+        self.stats["last_load_seconds"] = round(time.perf_counter() - started, 3)
+        logger.info(f"Loaded KeePass DB {self.path}: {len(self.snapshot.entries)} entries in {self.stats['last_load_seconds']}s")
+
+    def refresh(self, blocking: bool = True) -> bool:
+        """Reload if the KDBX content changed; returns True when a new snapshot was loaded.
+
+        With blocking=False, returns False at once if another reload is running.
+        """
+        if not self.lock.acquire(blocking=blocking):
+            return False
+        try:
+            self.last_check = time.monotonic()
+            signature = file_signature(self.path)
+            snapshot = self.snapshot
+            if signature is None or signature in (snapshot.signature, self.failed_signature):
+                return False
+            try:
+                if file_digest(self.path) == snapshot.digest:
+                    # Touched or rewritten with identical content: skip the KDF
+                    snapshot.signature = signature
+                    self.stats["unchanged_checks"] += 1
+                    return False
+                self.load(signature)
+                self.failed_signature = None
+                self.stats["last_error"] = None
+                return True
+            except Exception as e:
+                # Not retried until the file changes again
+                self.failed_signature = signature
+                self.stats["reload_errors"] += 1
+                self.stats["last_error"] = f"{dt.now().isoformat()}: {e}"
+                logger.error(f"Failed to reload KeePass DB {self.path}, keeping the loaded snapshot: {e}")
+                return False
+        finally:
+            self.lock.release()
+
+    def current(self) -> KeePassSnapshot:
+        # Only a stat() on the read path, so changes are seen even without the watcher;
+        # the digest and KDF run on a reload thread while this snapshot keeps serving
+        now = time.monotonic()
+        if now - self.last_check >= KEEPASS_CHECK_INTERVAL:
+            self.last_check = now
+            signature = file_signature(self.path)
+            snapshot = self.snapshot
+            if (signature is not None and signature not in (snapshot.signature, self.failed_signature)
+                    and not (self.reloader and self.reloader.is_alive())):
+                self.reloader = threading.Thread(target=self.refresh, args=(False,), name="keepass-reload", daemon=True)
+                self.reloader.start()
+        return self.snapshot
+
+class KeePassWatcher(FileSystemEventHandler):
+    """Reloads the KeePass store when the KDBX changes on disk.
+
+    Watches the containing directory (editors replace the file by rename)
+    through watchdog when installed, otherwise polls its signature.
+    """
+    def __init__(self, store: KeePassStore):
+        self.store = store
+        self.last_event = 0.0
+        self.wakeup = threading.Event()
+
+    def start(self):
+        directory = os.path.dirname(os.path.abspath(self.store.path))
+        if Observer is not None:
+            observer = Observer()
+            observer.schedule(self, directory, recursive=False)
+            observer.start()
+            logger.info(f"Watching {self.store.path} for changes (inotify)")
+        else:
+            threading.Thread(target=self.poll, name="keepass-watch-poll", daemon=True).start()
+            logger.info(f"Watching {self.store.path} for changes (polling every {KEEPASS_WATCH_POLL_INTERVAL}s)")
+        threading.Thread(target=self.reload_loop, name="keepass-watch-reload", daemon=True).start()
+
+    def on_any_event(self, event):
+        target = os.path.abspath(self.store.path)
+        if target in (os.path.abspath(event.src_path), os.path.abspath(getattr(event, "dest_path", "") or "")):
+            self.last_event = time.monotonic()
+            self.wakeup.set()
+
+    def poll(self):
+        while True:
+            time.sleep(KEEPASS_WATCH_POLL_INTERVAL)
+            if file_signature(self.store.path) != self.store.snapshot.signature:
+                self.last_event = time.monotonic()
+                self.wakeup.set()
+
+    def reload_loop(self):
+        while True:
+            self.wakeup.wait()
+            # Let the writer finish before decrypting
+            while (quiet_for := time.monotonic() - self.last_event) < KEEPASS_WATCH_DEBOUNCE:
+                time.sleep(KEEPASS_WATCH_DEBOUNCE - quiet_for)
+            self.wakeup.clear()
+            try:
+                self.store.refresh()
+            except Exception as e:
+                logger.error(f"KeePass reload failed: {e}", exc_info=True)
+
+# --- Secret Cache ---
+class SecretCache:
+    """Size-bounded LRU cache of secret values with a TTL, for one backend.
+
+    Values are held AES-GCM encrypted under a key generated at startup and
+    never persisted, so a cached entry is only readable with that key. The
+    zeroing covers the cached ciphertext buffers alone: they are overwritten
+    when an entry expires, is evicted or is invalidated. Plaintext copies made
+    along the way (the encoded value in put(), the decrypted bytes and str in
+    get(), the strings returned to callers) are ordinary Python objects that
+    stay in memory until the garbage collector reuses it.
+    """
+    cipher = AESGCM(AESGCM.generate_key(bit_length=256)) if AESGCM else None
+
+    def __init__(self, backend: str, ttl: float, maxsize: int):
+        self.backend = backend
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.lock = threading.Lock()
+        self.entries: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+    def discard(self, key: tuple) -> bool:
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return False
+        ciphertext = entry[2]
+        ciphertext[:] = bytes(len(ciphertext))
+        return True
+
+    def purge_expired(self):
+        now = time.monotonic()
+        for key in [key for key, entry in self.entries.items() if entry[0] <= now]:
+            self.discard(key)
+
+    def get(self, key: tuple) -> Optional[str]:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                self.purge_expired()
+                self.stats["misses"] += 1
+                return None
+            self.entries.move_to_end(key)
+            self.stats["hits"] += 1
+            expires, nonce, ciphertext = entry
+            return self.cipher.decrypt(nonce, bytes(ciphertext), repr(key).encode()).decode("utf-8")
+
+    def put(self, key: tuple, value: str):
+        nonce = os.urandom(12)
+        ciphertext = bytearray(self.cipher.encrypt(nonce, value.encode("utf-8"), repr(key).encode()))
+        with self.lock:
+            self.discard(key)
+            self.purge_expired()
+            self.entries[key] = (time.monotonic() + self.ttl, nonce, ciphertext)
+            while len(self.entries) > self.maxsize:
+                self.discard(next(iter(self.entries)))
+                self.stats["evictions"] += 1
+
+    def invalidate(self, name: Optional[str] = None) -> int:
+        """Drop every cached version of `name`, or everything"""
+        with self.lock:
+            keys = [key for key in self.entries if name is None or key[0] == name]
+            for key in keys:
+                self.discard(key)
+            self.stats["invalidations"] += len(keys)
+            return len(keys)
+
+    def metrics(self) -> Dict[str, Any]:
+        return {**self.stats, "entries": len(self.entries), "ttl": self.ttl, "max_entries": self.maxsize}
+
+secret_caches: Dict[str, SecretCache] = {}
+if SECRETS_CACHE_ENABLED and AESGCM is None:
+    logger.warning("cryptography library not installed. Secret cache disabled.")
+elif SECRETS_CACHE_ENABLED:
+    secret_caches = {backend: SecretCache(backend, ttl, SECRETS_CACHE_MAX_ENTRIES)
+                     for backend, ttl in SECRETS_CACHE_TTL.items() if ttl > 0}
+
+def cache_for(backend: str, secret_name: str) -> Optional[SecretCache]:
+    """The backend's cache, unless the secret opted out through SECRETS_CACHE_EXCLUDE"""
+    logical_name = f"{backend}-{secret_name}"
+    if any(fnmatch.fnmatchcase(logical_name, pattern) for pattern in SECRETS_CACHE_EXCLUDE):
+        return None
+    return secret_caches.get(backend)
+
 # --- Backend Client Initialization --- 
-kp = None
+keepass_store: Optional[KeePassStore] = None
 azure_kv_client = None
 gcp_sm_client = None
 
 def initialize_backends():
-    global kp, azure_kv_client, gcp_sm_client
+    global keepass_store, azure_kv_client, gcp_sm_client
     logger.info("Initializing secret backends...")
 
     # --- Initialize KeePass --- 
@@ -111,12 +388,11 @@ def initialize_backends():
 
                 if keepass_password or keyfile_exists:
                     try:
-                        kp = PyKeePass(KEEPASS_DB_PATH, password=keepass_password, keyfile=KEEPASS_KEYFILE_PATH)
-                        kp.reload()
+                        keepass_store = KeePassStore(KEEPASS_DB_PATH, keepass_password, KEEPASS_KEYFILE_PATH)
                         logger.info(f"KeePass backend initialized successfully for DB: {KEEPASS_DB_PATH}")
                     except Exception as e:
                         logger.error(f"Failed to unlock or load KeePass DB: {e}", exc_info=False)
-                        kp = None
+                        keepass_store = None
                 else:
                     logger.error("KeePass DB path specified but no password secret found/readable or keyfile provided/found.")
             except Exception as e:
@@ -172,28 +448,26 @@ def get_secret(secretName: str, version: Optional[str] = None) -> Optional[str]:
         logger.warning(f"No backend convention matched for secret: '{secretName}'. Try specific tool if available.")
         return None
 
+def keepass_field(entry, field: str) -> Optional[str]:
+    """A standard (password, username, notes, url) or custom field of an entry; KeyError if it has no such field"""
+    if field.lower() in ('password', 'username', 'notes', 'url'):
+        return getattr(entry, field.lower())
+    if entry.custom_properties and field in entry.custom_properties:
+        return entry.custom_properties[field]
+    raise KeyError(field)
+
 @mcp_server.tool("secrets.keepass.getEntry")
 def get_keepass_entry(entryPath: str, field: str = 'password') -> Optional[str]:
     logger.info(f"Received request for KeePass entry: '{entryPath}', field: '{field}'")
-    if not kp:
+    if not keepass_store:
         logger.error("KeePass backend not initialized or failed to unlock.")
         return None
     try:
-        kp.reload()
-        entry = kp.find_entries(path=entryPath, first=True)
+        entry = keepass_store.current().find(entryPath)
         if entry:
-            value = None
-            if field.lower() == 'password':
-                value = entry.password
-            elif field.lower() == 'username':
-                value = entry.username
-            elif field.lower() == 'notes':
-                 value = entry.notes
-            elif field.lower() == 'url':
-                 value = entry.url
-            elif entry.custom_properties and field in entry.custom_properties:
-                value = entry.custom_properties[field]
-            else:
+            try:
+                value = keepass_field(entry, field)
+            except KeyError:
                 logger.warning(f"Field '{field}' not found for KeePass entry: '{entryPath}'")
                 return None
             if value is not None:
@@ -209,6 +483,24 @@ def get_keepass_entry(entryPath: str, field: str = 'password') -> Optional[str]:
         logger.error(f"Error retrieving KeePass entry '{entryPath}', field '{field}': {e}", exc_info=True)
         return None
 
+def fetch_azurekv_secret(secretName: str) -> Optional[str]:
+    """Read-through cached Azure Key Vault lookup; None if the secret does not exist, raises on backend errors"""
+    cache = cache_for("azurekv", secretName)
+    if cache is not None:
+        cached = cache.get((secretName,))
+        if cached is not None:
+            logger.info(f"Served Azure Key Vault secret '{secretName}' from cache")
+            return cached
+    try:
+        retrieved_secret = azure_kv_client.get_secret(secretName)
+    except AzureResourceNotFoundError:
+        logger.warning(f"Azure Key Vault secret not found: '{secretName}'")
+        return None
+    logger.info(f"Successfully retrieved Azure Key Vault secret: '{secretName}'")
+    if cache is not None and retrieved_secret.value is not None:
+        cache.put((secretName,), retrieved_secret.value)
+    return retrieved_secret.value
+
 @mcp_server.tool("secrets.azurekv.getSecret")
 def get_azurekv_secret(secretName: str) -> Optional[str]:
     logger.info(f"Received request for Azure Key Vault secret: '{secretName}'")
@@ -216,16 +508,31 @@ def get_azurekv_secret(secretName: str) -> Optional[str]:
          logger.error("Azure Key Vault backend not initialized.")
          return None
     try:
-        retrieved_secret = azure_kv_client.get_secret(secretName)
-        logger.info(f"Successfully retrieved Azure Key Vault secret: '{secretName}'")
-        return retrieved_secret.value
-    except AzureResourceNotFoundError:
-        logger.warning(f"Azure Key Vault secret not found: '{secretName}'")
-        return None
+        return fetch_azurekv_secret(secretName)
     except Exception as e:
         logger.error(f"Error retrieving Azure Key Vault secret '{secretName}': {e}", exc_info=True)
         return None
 
+def fetch_gcpsm_secret(secretName: str, project: str, version: str) -> Optional[str]:
+    """Read-through cached Google Secret Manager lookup; None if the secret does not exist, raises on backend errors"""
+    name = gcp_sm_client.secret_version_path(project, secretName, version)
+    cache = cache_for("gcpsm", secretName)
+    if cache is not None:
+        cached = cache.get((secretName, project, version))
+        if cached is not None:
+            logger.info(f"Served Google Secret Manager secret '{secretName}' version '{version}' from cache")
+            return cached
+    try:
+        response = gcp_sm_client.access_secret_version(request={"name": name})
+    except GoogleApiExceptions.NotFound:
+        logger.warning(f"Google Secret Manager secret not found: '{name}'")
+        return None
+    payload = response.payload.data.decode("UTF-8")
+    logger.info(f"Successfully retrieved Google Secret Manager secret: '{secretName}' version '{version}'")
+    if cache is not None:
+        cache.put((secretName, project, version), payload)
+    return payload
+
 @mcp_server.tool("secrets.gcpsm.getSecret")
 def get_gcpsm_secret(secretName: str, projectId: Optional[str] = None, version: str = 'latest') -> Optional[str]:
     logger.info(f"Received request for Google Secret Manager secret: '{secretName}' (Project: {projectId or GCP_PROJECT_ID or 'Default'}, Version: {version})")
@@ -236,28 +543,111 @@ def get_gcpsm_secret(secretName: str, projectId: Optional[str] = None, version:
     if not project:
          logger.error("GCP Project ID not configured for Google Secret Manager.")
          return None
-    name = gcp_sm_client.secret_version_path(project, secretName, version)
     try:
-        response = gcp_sm_client.access_secret_version(request={"name": name})
-        payload = response.payload.data.decode("UTF-8")
-        logger.info(f"Successfully retrieved Google Secret Manager secret: '{secretName}' version '{version}'")
-        return payload
-    except GoogleApiExceptions.NotFound:
-        logger.warning(f"Google Secret Manager secret not found: '{name}'")
-        return None
+        return fetch_gcpsm_secret(secretName, project, version)
     except Exception as e:
-        logger.error(f"Error retrieving Google Secret Manager secret '{name}': {e}", exc_info=True)
+        logger.error(f"Error retrieving Google Secret Manager secret '{secretName}' version '{version}': {e}", exc_info=True)
         return None
 
+@mcp_server.tool("secrets.getSecrets")
+async def get_secrets(secretNames: List[str]) -> dict:
+    """Retrieves several secrets by logical name (keepass-, azurekv-, gcpsm- prefixes) in one call.
+
+    KeePass entries are resolved from a single snapshot of the database; cloud secrets are fetched
+    concurrently, at most SECRETS_BATCH_CONCURRENCY at a time. Returns {"secrets": {name: value}} for
+    the secrets found and {"errors": {name: reason}} for each one that could not be retrieved.
+    """
+    names = list(dict.fromkeys(secretNames))
+    logger.info(f"Received batch request for {len(names)} secrets: {names}")
+    if len(names) > SECRETS_BATCH_MAX:
+        return {"error": f"At most {SECRETS_BATCH_MAX} secrets per call", "secrets": {}, "errors": {}}
+    secrets: Dict[str, str] = {}
+    errors: Dict[str, str] = {}
+
+    keepass_names = [name for name in names if name.startswith("keepass-")]
+    if keepass_names:
+        snapshot = keepass_store.current() if keepass_store else None
+        for name in keepass_names:
+            entry_path = name.split('-', 1)[1].replace('-', '/')
+            entry = snapshot.find(entry_path) if snapshot else None
+            if snapshot is None:
+                errors[name] = "KeePass backend not available"
+            elif entry is None:
+                errors[name] = f"KeePass entry not found at path: '{entry_path}'"
+            elif entry.password is None:
+                errors[name] = "KeePass entry has no password"
+            else:
+                secrets[name] = entry.password
+
+    semaphore = asyncio.Semaphore(SECRETS_BATCH_CONCURRENCY)
+    async def fetch(name: str):
+        backend, _, secret_name = name.partition("-")
+        if backend == "azurekv" and not azure_kv_client:
+            errors[name] = "Azure Key Vault backend not available"
+            return
+        if backend == "gcpsm" and not (gcp_sm_client and GCP_PROJECT_ID):
+            errors[name] = "Google Secret Manager backend not available"
+            return
+        async with semaphore:
+            try:
+                if backend == "azurekv":
+                    value = await asyncio.to_thread(fetch_azurekv_secret, secret_name)
+                else:
+                    value = await asyncio.to_thread(fetch_gcpsm_secret, secret_name, GCP_PROJECT_ID, 'latest')
+            except Exception as e:
+                logger.error(f"Error retrieving secret '{name}' in batch: {e}", exc_info=True)
+                errors[name] = f"Backend error: {e}"
+                return
+        if value is None:
+            errors[name] = "Secret not found"
+        else:
+            secrets[name] = value
+
+    cloud_names = [name for name in names if name.startswith(("azurekv-", "gcpsm-"))]
+    await asyncio.gather(*(fetch(name) for name in cloud_names))
+    for name in names:
+        if name not in secrets and name not in errors:
+            errors[name] = "No backend convention matched (expected a keepass-, azurekv- or gcpsm- prefix)"
+    logger.info(f"Batch request resolved {len(secrets)} of {len(names)} secrets; errors for: {sorted(errors)}")
+    return {
+        "requested": len(names),
+        "secrets": {name: secrets[name] for name in names if name in secrets},
+        "errors": {name: errors[name] for name in names if name in errors}
+    }
+
+@mcp_server.tool("secrets.cache.invalidate")
+def invalidate_secret_cache(secretName: Optional[str] = None) -> dict:
+    """Drops cached secret values: one secret by logical name (e.g. 'azurekv-db-password', all versions),
+    every secret of a backend ('azurekv' or 'gcpsm'), or everything when no name is given."""
+    logger.info(f"Received request to invalidate secret cache: '{secretName or 'all'}'")
+    if secretName is None:
+        invalidated = sum(cache.invalidate() for cache in secret_caches.values())
+    elif secretName in secret_caches:
+        invalidated = secret_caches[secretName].invalidate()
+    else:
+        backend, _, name = secretName.partition("-")
+        if backend not in secret_caches or not name:
+            return {"error": f"No cache for '{secretName}'; expected a name prefixed with one of {list(secret_caches)}"}
+        invalidated = secret_caches[backend].invalidate(name)
+    return {"invalidated": invalidated}
+
+def keepass_metrics() -> Dict[str, Any]:
+    if keepass_store is None:
+        return {}
+    snapshot = keepass_store.snapshot
+    return {**keepass_store.stats, "entries": len(snapshot.entries), "loaded_at": snapshot.loaded_at}
+
 @mcp_server.tool("secrets.getMetrics")
 def get_metrics() -> dict:
     return {
         "status": "operational",
         "initialized_backends": {
-            "keepass": kp is not None,
+            "keepass": keepass_store is not None,
             "azure_kv": azure_kv_client is not None,
             "gcp_sm": gcp_sm_client is not None
         },
+        "keepass": keepass_metrics(),
+        "cache": {backend: cache.metrics() for backend, cache in secret_caches.items()},
         "requests_processed": 0, 
         "errors_encountered": 0
     }
@@ -265,6 +655,10 @@ def get_metrics() -> dict:
 # --- Server Execution --- 
 if __name__ == "__main__":
     logger.info(f"Starting Secrets MCP Server (13_secrets_mcp) on port {MCP_PORT}")
+
+    # Reload the KeePass DB in the background when the file changes
+    if keepass_store is not None and KEEPASS_WATCH_ENABLED:
+        KeePassWatcher(keepass_store).start()
     
     # Get the Starlette app from FastMCP
     app = mcp_server.sse_app()
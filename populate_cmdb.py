@@ -3,6 +3,7 @@
 Populate CMDB with services from ports.md
 """
 import csv
+import os
 import re
 from pathlib import Path
 
@@ -83,12 +84,15 @@ def update_cmdb_csv(services):
     # Write updated CSV
     all_entries = existing_entries + new_entries
     
-    with open(cmdb_path, 'w', newline='') as f:
+    # Write to a temp file and rename so the CMDB service never reloads a partial file
+    tmp_path = cmdb_path.with_name(cmdb_path.name + '.tmp')
+    with open(tmp_path, 'w', newline='') as f:
         fieldnames = ['hostname', 'ip_address', 'os_type', 'os_version', 
                      'services', 'path', 'user', 'ssh_access_notes']
         writer = csv.DictWriter(f, fieldnames=fieldnames)
         writer.writeheader()
         writer.writerows(all_entries)
+    os.replace(tmp_path, cmdb_path)
     
     return len(new_entries), len(all_entries)
 
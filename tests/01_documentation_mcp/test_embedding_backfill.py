@@ -0,0 +1,89 @@
+import asyncio
+import atexit
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from tests.server_loader import load_server
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class FakeModel:
+    """Stands in for SentenceTransformer; loading blocks until the test releases it"""
+    release = threading.Event()
+    loads = 0
+
+    def __init__(self, name):
+        FakeModel.loads += 1
+        self.release.wait(10)
+
+    def encode(self, texts, batch_size=32, normalize_embeddings=False):
+        return np.ones((len(texts), 4)) / 2
+
+
+@unittest.skipIf(np is None, "numpy not installed")
+class TestEmbeddingBackfill(unittest.TestCase):
+    """Writes never load the embedding model; their documents are embedded once it is ready"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.TemporaryDirectory()
+        os.makedirs(os.path.join(cls.tmp.name, "docs"))
+        cls.server = load_server(
+            "01_documentation_mcp", "docs_mcp_server_backfill",
+            DOCS_ROOT=os.path.join(cls.tmp.name, "docs"),
+            INDEX_PATH=os.path.join(cls.tmp.name, "index"),
+            VERSIONS_ROOT=os.path.join(cls.tmp.name, "versions"),
+            REQUIRE_APPROVAL="false",
+            DOCS_WATCH_ENABLED="false"
+        )
+        atexit.unregister(cls.server.save_catalog_on_exit)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp.cleanup()
+
+    def setUp(self):
+        patches = [
+            mock.patch.object(self.server, "np", np),
+            mock.patch.object(self.server, "SentenceTransformer", FakeModel),
+            mock.patch.object(self.server, "embedding_model", None)
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        FakeModel.release.clear()
+        FakeModel.loads = 0
+
+    def create(self, title, content):
+        return asyncio.run(self.server.create_document(title, content, "guides", ["backfill"]))
+
+    def test_documents_written_while_loading_are_backfilled(self):
+        loader = self.server.start_embedding_model_load()
+        self.create("Early write", "first paragraph\n\nsecond paragraph")
+        self.assertIsNone(self.server.embedding_model)
+        self.assertEqual(len(self.server.embedding_backlog), 1)
+        doc_id = next(iter(self.server.embedding_backlog))
+        self.assertNotIn(doc_id, self.server.embedding_store.docs)
+
+        FakeModel.release.set()
+        loader.join()
+        # The backfill is queued on the single writer thread; wait for it to drain
+        self.server.write_pool.executor.submit(lambda: None).result()
+        self.assertEqual(FakeModel.loads, 1)
+        self.assertEqual(self.server.embedding_backlog, set())
+        self.assertIn(doc_id, self.server.embedding_store.docs)
+
+        self.create("Late write", "embedded right away")
+        self.assertEqual(self.server.embedding_backlog, set())
+        self.assertEqual(FakeModel.loads, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
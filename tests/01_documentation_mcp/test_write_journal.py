@@ -0,0 +1,81 @@
+import asyncio
+import atexit
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from tests.server_loader import load_server
+
+
+class TestWriteJournal(unittest.TestCase):
+    """Writes journaled by a batch that failed are replayed, not lost"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.TemporaryDirectory()
+        os.makedirs(os.path.join(cls.tmp.name, "docs"))
+        cls.server = load_server(
+            "01_documentation_mcp", "docs_mcp_server_journal",
+            DOCS_ROOT=os.path.join(cls.tmp.name, "docs"),
+            INDEX_PATH=os.path.join(cls.tmp.name, "index"),
+            VERSIONS_ROOT=os.path.join(cls.tmp.name, "versions"),
+            REQUIRE_APPROVAL="false",
+            DOCS_WATCH_ENABLED="false"
+        )
+        atexit.unregister(cls.server.save_catalog_on_exit)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp.cleanup()
+
+    def setUp(self):
+        self.journal = self.server.write_journal
+        self.journal.clear()
+
+    def create(self, title, content):
+        return asyncio.run(self.server.create_document(title, content, "guides", ["journal"]))
+
+    def search(self, word):
+        return asyncio.run(self.server.search_docs(word))["total"]
+
+    def test_failed_batch_is_replayed_by_the_next_one(self):
+        with mock.patch.object(self.server, "index_documents", side_effect=RuntimeError("index down")):
+            self.assertIn("error", self.create("Failed write", "quokkaword body"))
+        pending = self.journal.pending()
+        self.assertEqual(len(pending), 1)
+        self.assertTrue(pending[0]["path"].endswith("_failed_write.md"), pending[0]["path"])
+
+        self.assertNotIn("error", self.create("Next write", "wombatword body"))
+        self.assertEqual(self.journal.pending(), [])
+        self.assertEqual(self.search("quokkaword"), 1)
+        self.assertEqual(self.search("wombatword"), 1)
+
+    def test_entries_stay_journaled_while_replay_fails(self):
+        with mock.patch.object(self.server, "index_documents", side_effect=RuntimeError("index down")):
+            self.create("First failure", "one")
+            self.create("Second failure", "two")
+        self.assertEqual(len(self.journal.pending()), 2)
+        self.assertEqual(len({entry["entry"] for entry in self.journal.pending()}), 2)
+
+        self.assertEqual(self.server.replay_write_journal(), 2)
+        self.assertEqual(self.journal.pending(), [])
+        self.assertEqual(self.search("first failure"), 1)
+
+    def test_unloadable_document_reports_an_error(self):
+        load_document = self.server.load_document
+        with mock.patch.object(self.server, "load_document", lambda path: None if "broken" in str(path) else load_document(path)):
+            result = self.create("Broken doc", "unloadable")
+        self.assertIn("could not be loaded", result["error"])
+        self.assertEqual(self.journal.pending(), [])
+
+    def test_discard_keeps_other_entries(self):
+        self.journal.append([{"entry": "a", "path": "x"}, {"entry": "b", "path": "y"}, {"entry": "c", "path": "z"}])
+        self.journal.discard({"a", "c"})
+        self.assertEqual(self.journal.pending(), [{"entry": "b", "path": "y"}])
+        self.journal.discard({"b"})
+        self.assertEqual(self.journal.pending(), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,155 @@
+import asyncio
+import csv
+import os
+import random
+import tempfile
+import unittest
+from unittest import mock
+
+from tests.server_loader import load_server
+
+FIELDS = ["hostname", "ip_address", "os_type", "services", "cpu", "mem", "owner", "bytes"]
+
+QUERIES = [
+    [{"field": "os_type", "op": "eq", "value": "linux"}],
+    [{"field": "services", "op": "eq", "value": "nginx"}],
+    [{"field": "services", "op": "in", "value": ["redis", "kafka"]}],
+    [{"field": "hostname", "op": "prefix", "value": "web-"}],
+    [{"field": "ip_address", "op": "contains", "value": ".1."}],
+    [{"field": "cpu", "op": "eq", "value": "16"}],
+    [{"field": "cpu", "op": "range", "value": {"gte": 8, "lt": 32}}],
+    [{"field": "owner", "op": "in", "value": ["alice", "BOB"]}],
+    [{"field": "os_type", "op": "eq", "value": "Windows"}, {"not": {"field": "services", "op": "eq", "value": "iis"}}],
+    [{"any": [{"field": "hostname", "op": "prefix", "value": "db-"}, {"field": "services", "op": "eq", "value": "postgres"}]}],
+    [{"field": "bytes", "op": "range", "value": {"gt": 1000}}],
+]
+
+SORTS = [None, ["hostname"], ["-cpu", "hostname"], ["owner", "-hostname"], ["mem", "hostname"], ["-bytes", "hostname"]]
+
+
+def write_cmdb(path: str, rows: int = 400):
+    rng = random.Random(41)
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(FIELDS)
+        for i in range(rows):
+            writer.writerow([
+                f"{rng.choice(['web', 'db', 'Cache', 'app'])}-{i:04d}",
+                f"10.{rng.randrange(4)}.{rng.randrange(12)}.{i % 250}",
+                rng.choice(["Linux", "linux", "Windows", ""]),
+                ",".join(rng.sample(["nginx", "redis", "postgres", "kafka", "iis"], rng.randrange(3))),
+                rng.choice(["2", "4", "8", "16", "64", ""]),
+                rng.choice(["3.5", "16", "128", ""]),
+                rng.choice(["alice", "Bob", "carol", ""]),
+                # An integral column with gaps and one value beyond int64 stays float64
+                "1e20" if i == 0 else rng.choice(["512", "4096", ""]),
+            ])
+
+
+class TestBackendParity(unittest.TestCase):
+    """The CSV (in-memory) and SQLite backends answer the same tools identically"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.TemporaryDirectory()
+        path = os.path.join(cls.tmp.name, "cmdb.csv")
+        write_cmdb(path)
+        env = {"LOCAL_CMDB_PATH": path, "CMDB_RELOAD_INTERVAL": "0", "CMDB_INDEXED_COLUMNS": "os_type,services,owner"}
+        cls.csv = load_server("02_cmdb_mcp", "cmdb_mcp_server_parity_csv", CMDB_BACKEND="csv", **env)
+        cls.sqlite = load_server(
+            "02_cmdb_mcp", "cmdb_mcp_server_parity_sqlite", CMDB_BACKEND="sqlite",
+            CMDB_SQLITE_PATH=os.path.join(cls.tmp.name, "cmdb.sqlite"), **env
+        )
+        assert cls.csv.local_cmdb is not None and cls.sqlite.sqlite_cmdb is not None
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp.cleanup()
+
+    def assertSame(self, name, *args, **kwargs):
+        expected = getattr(self.csv, name)(*args, **kwargs)
+        actual = getattr(self.sqlite, name)(*args, **kwargs)
+        self.assertEqual(actual, expected, f"{name}{args}{kwargs}")
+        return expected
+
+    def test_query(self):
+        for filters in QUERIES:
+            for sort in SORTS:
+                with self.subTest(filters=filters, sort=sort):
+                    expected = self.csv.query_cmdb(filters, sort=sort, limit=1000)
+                    actual = self.sqlite.query_cmdb(filters, sort=sort, limit=1000)
+                    self.assertNotIn("error", expected)
+                    self.assertGreater(expected["total"], 0)
+                    self.assertEqual(actual["total"], expected["total"])
+                    if sort:
+                        self.assertEqual(actual["results"], expected["results"])
+                    else:
+                        key = lambda record: record["hostname"]
+                        self.assertEqual(sorted(actual["results"], key=key), sorted(expected["results"], key=key))
+
+    def test_numeric_range_skips_text_values(self):
+        # SQLite stores each value by its own type, while pandas reads the column as text;
+        # either way text values must not match a numeric bound
+        path = os.path.join(self.tmp.name, "mixed.csv")
+        with open(path, "w") as f:
+            f.write("hostname,disk\n" + "".join(f"h{i},{value}\n" for i, value in enumerate(["250", "1000", "unknown", "", "tbd", "4000"])))
+        sqlite_cmdb = self.sqlite.SqliteCmdb(os.path.join(self.tmp.name, "mixed.sqlite"), 0)
+        sqlite_cmdb.import_csv(path)
+        with mock.patch.object(self.csv, "local_cmdb", self.csv.CmdbStore(self.csv.pd.read_csv(path))), \
+                mock.patch.object(self.sqlite, "sqlite_cmdb", sqlite_cmdb):
+            for bounds, hostnames in (({"lt": 500}, ["h0"]), ({"gte": 500, "lte": 2000}, ["h1"]), ({"gt": 0}, ["h0", "h1", "h5"])):
+                with self.subTest(bounds=bounds):
+                    filters = [{"field": "disk", "op": "range", "value": bounds}]
+                    for server in (self.csv, self.sqlite):
+                        result = server.query_cmdb(filters, sort=["hostname"], fields=["hostname"])
+                        self.assertEqual([row["hostname"] for row in result["results"]], hostnames)
+
+    def test_query_projection_and_paging(self):
+        for offset in (0, 7, 395):
+            with self.subTest(offset=offset):
+                args = (QUERIES[3], ["-cpu", "hostname"], ["hostname", "cpu"], 10, offset)
+                expected, actual = self.csv.query_cmdb(*args), self.sqlite.query_cmdb(*args)
+                # The plan and generation describe each backend's own execution
+                for key in ("total", "count", "next_offset", "results"):
+                    self.assertEqual(actual[key], expected[key])
+
+    def test_query_errors(self):
+        for filters in ([{"field": "nope", "op": "eq", "value": "x"}], [{"field": "cpu", "op": "between", "value": 1}]):
+            with self.subTest(filters=filters):
+                self.assertIn("error", self.csv.query_cmdb(filters))
+                self.assertIn("error", self.sqlite.query_cmdb(filters))
+
+    def test_find(self):
+        for field, value, regex in [("ip_address", "10.1.", False), ("ip_address", r"^10\.1\.1\d?\.", True),
+                                    ("hostname", "CACHE-", False), ("services", "redis", False), ("hostname", "zzz", False)]:
+            with self.subTest(field=field, value=value, regex=regex):
+                self.assertSame("find_local_servers", field, value, limit=1000, regex=regex)
+        self.assertSame("find_local_servers", "ip_address", "10.2", limit=5, offset=3)
+
+    def test_find_errors_are_counted(self):
+        for server in (self.csv, self.sqlite):
+            for field, value, regex in [("nope", "x", False), ("hostname", "(", True)]:
+                with self.subTest(server=server.__name__, field=field, regex=regex):
+                    errors = server.get_metrics()["errors_by_tool"].get("find_local_servers", 0)
+                    self.assertIn("error", server.find_local_servers(field, value, regex=regex))
+                    self.assertEqual(server.get_metrics()["errors_by_tool"]["find_local_servers"], errors + 1)
+            self.assertEqual(server.find_local_servers("hostname", "zzz"), [])
+
+    def test_metrics_report_load_time(self):
+        for server in (self.csv, self.sqlite):
+            with self.subTest(server=server.__name__):
+                self.assertIsNotNone(server.get_metrics()["local_cmdb_loaded_at"])
+
+    def test_lookups(self):
+        for hostname in ("web-0000", "CACHE-0002", "app-0399", "missing"):
+            self.assertSame("get_local_server_info", hostname)
+        names = [f"{prefix}-{i:04d}" for i in range(0, 400, 9) for prefix in ("web", "db")]
+        expected = asyncio.run(self.csv.get_local_servers_info(names))
+        actual = asyncio.run(self.sqlite.get_local_servers_info(names))
+        self.assertGreater(expected["found"], 0)
+        for key in ("found", "servers", "missing"):
+            self.assertEqual(actual[key], expected[key])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+import asyncio
+import os
+import tempfile
+import unittest
+
+from tests.server_loader import load_server
+from tests.servicenow_stub import ServiceNowStub
+
+RECORDS = [
+    {"sys_id": f"{i:032x}", "name": f"srv{i:04d}", "os": "Linux", "sys_updated_on": f"2026-01-01 00:{i // 60 % 60:02d}:{i % 60:02d}"}
+    for i in range(1234)
+]
+
+
+class TestServiceNowClient(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.server = load_server(
+            "02_cmdb_mcp", "cmdb_mcp_server_servicenow",
+            LOCAL_CMDB_PATH=os.path.join(cls.tmp.name, "cmdb.csv"),
+            CMDB_RELOAD_INTERVAL="0",
+            SERVICENOW_CONCURRENCY="3",
+            SERVICENOW_MAX_RETRIES="2"
+        )
+        cls.stub = ServiceNowStub({"cmdb_ci_server": RECORDS}).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.stub.stop()
+        cls.tmp.cleanup()
+
+    def setUp(self):
+        self.stub.requests.clear()
+        self.stub.throttle.clear()
+        self.client = self.server.ServiceNowClient(self.stub.url, "user", "password")
+        self.server.snow_client = self.client
+        self.server.snow_cache.clear()
+        self.server.snow_cache.hits = 0
+
+    def run_async(self, coro):
+        async def run():
+            try:
+                return await coro
+            finally:
+                await self.client.close()
+        return asyncio.run(run())
+
+    def collect(self, *args, **kwargs):
+        async def pages():
+            return [page async for page in self.client.iter_pages(*args, **kwargs)]
+        return self.run_async(pages())
+
+    def test_iter_pages_yields_every_record_in_order(self):
+        pages = self.collect("cmdb_ci_server", page_size=100)
+        self.assertEqual([len(page) for page in pages], [100] * 12 + [34])
+        self.assertEqual([record["sys_id"] for page in pages for record in page], [r["sys_id"] for r in RECORDS])
+        offsets = sorted(int(params["sysparm_offset"]) for _, params in self.stub.requests)
+        self.assertEqual(offsets, list(range(0, 1234, 100)))
+        self.assertTrue(all(params["sysparm_query"].endswith("ORDERBYsys_id") for _, params in self.stub.requests))
+
+    def test_iter_pages_honors_max_records_query_and_fields(self):
+        pages = self.collect("cmdb_ci_server", "sys_updated_on>=2026-01-01 00:15:00", ["sys_id", "name"], max_records=250, page_size=100)
+        records = [record for page in pages for record in page]
+        self.assertEqual(len(records), 250)
+        self.assertEqual(records[0], {"sys_id": RECORDS[900]["sys_id"], "name": "srv0900"})
+        self.assertEqual(self.stub.requests[-1][1]["sysparm_limit"], "50")
+
+    def test_rate_limited_pages_are_retried(self):
+        self.stub.throttle.update({0, 300, 700})
+        pages = self.collect("cmdb_ci_server", page_size=100)
+        self.assertEqual(sum(len(page) for page in pages), len(RECORDS))
+        self.assertEqual(self.client.stats["retries"], 3)
+        self.assertEqual(self.client.stats["errors"], 0)
+        self.assertEqual(len(self.stub.requests), 13 + 3)
+
+    def test_unknown_table_raises(self):
+        with self.assertRaises(self.server.ServiceNowError) as raised:
+            self.collect("cmdb_ci_missing")
+        self.assertEqual(raised.exception.status, 404)
+
+    def test_stopping_early_cancels_pending_pages(self):
+        async def first_page():
+            pages = self.client.iter_pages("cmdb_ci_server", page_size=100)
+            async for page in pages:
+                break
+            await pages.aclose()
+            return [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        self.assertEqual(self.run_async(first_page()), [])
+
+    def test_get_ci_is_cached(self):
+        first = self.run_async(self.server.get_servicenow_ci(name="srv0042", table="cmdb_ci_server"))
+        second = self.run_async(self.server.get_servicenow_ci(name="srv0042", table="cmdb_ci_server"))
+        self.assertEqual(first["sys_id"], RECORDS[42]["sys_id"])
+        self.assertEqual(second, first)
+        self.assertEqual(len(self.stub.requests), 1)
+        self.assertEqual(self.server.snow_cache.hits, 1)
+
+    def test_get_ci_by_sys_id(self):
+        record = self.run_async(self.server.get_servicenow_ci(sys_id=RECORDS[7]["sys_id"], table="cmdb_ci_server"))
+        self.assertEqual(record["name"], "srv0007")
+        self.assertEqual(self.stub.requests[0][0], f"/api/now/table/cmdb_ci_server/{RECORDS[7]['sys_id']}")
+        self.assertIsNone(self.run_async(self.server.get_servicenow_ci(sys_id="f" * 32, table="cmdb_ci_server")))
+
+    def test_get_ci_rejects_query_injection(self):
+        result = self.run_async(self.server.get_servicenow_ci(name="srv0001^ORname!=x", table="cmdb_ci_server"))
+        self.assertIn("error", result)
+        result = self.run_async(self.server.get_servicenow_ci(sys_id="abc^name=x", table="cmdb_ci_server"))
+        self.assertIn("error", result)
+        self.assertEqual(self.stub.requests, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+import asyncio
+import copy
+import os
+import tempfile
+import unittest
+from datetime import datetime
+
+from tests.server_loader import load_server
+from tests.servicenow_stub import ServiceNowStub
+
+RECORDS = [
+    {"sys_id": f"{i:032x}", "name": f"srv{i:03d}", "os": "Linux", "sys_updated_on": f"2026-01-01 10:{i // 60:02d}:{i % 60:02d}"}
+    for i in range(250)
+]
+
+
+class TestServiceNowSync(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.server = load_server(
+            "02_cmdb_mcp", "cmdb_mcp_server_servicenow_sync",
+            LOCAL_CMDB_PATH=os.path.join(cls.tmp.name, "cmdb.csv"),
+            CMDB_BACKEND="sqlite",
+            CMDB_SQLITE_PATH=os.path.join(cls.tmp.name, "init.sqlite"),
+            CMDB_RELOAD_INTERVAL="0",
+            SERVICENOW_SYNC_TABLES="cmdb_ci_server",
+            SERVICENOW_SYNC_OVERLAP="0",
+            SERVICENOW_PAGE_SIZE="100"
+        )
+        cls.stub = ServiceNowStub({}).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.stub.stop()
+        cls.tmp.cleanup()
+
+    def setUp(self):
+        self.records = copy.deepcopy(RECORDS)
+        self.stub.tables["cmdb_ci_server"] = self.records
+        self.stub.requests.clear()
+        self.server.SERVICENOW_TIMEZONE = ""
+        self.server.sqlite_cmdb = self.server.SqliteCmdb(os.path.join(self.tmp.name, f"{self.id()}.sqlite"), 0)
+        self.sync = self.server.ServiceNowSync(["cmdb_ci_server"], 60.0)
+        self.sync.client = self.server.ServiceNowClient(self.stub.url, "user", "password")
+
+    def run_sync(self):
+        async def run():
+            try:
+                await self.sync.sync_table("cmdb_ci_server")
+            finally:
+                await self.sync.client.close()
+        asyncio.run(run())
+        return self.sync.status["cmdb_ci_server"]
+
+    def test_full_then_delta_sync(self):
+        status = self.run_sync()
+        self.assertEqual((status["mode"], status["upserted"]), ("full", 250))
+        self.assertEqual(status["watermark"], "2026-01-01 10:04:09")
+        self.assertEqual(len(self.server.sqlite_cmdb), 250)
+
+        self.records[3].update(os="Windows", sys_updated_on="2026-01-01 11:00:00")
+        self.stub.requests.clear()
+        status = self.run_sync()
+        self.assertEqual((status["mode"], status["changed"]), ("delta", 1))
+        self.assertEqual(status["watermark"], "2026-01-01 11:00:00")
+        self.assertEqual(self.server.sqlite_cmdb.get("srv003")["os"], "Windows")
+        query = self.stub.requests[0][1]["sysparm_query"]
+        self.assertTrue(query.startswith("sys_updated_on>=javascript:new GlideDateTime('2026-01-01 10:04:09')"), query)
+
+    def test_full_sync_deletes_only_servicenow_rows(self):
+        cmdb = self.server.sqlite_cmdb
+        path = os.path.join(self.tmp.name, "merged.csv")
+        with open(path, "w") as f:
+            f.write("hostname,rack\nsrv001,r1\ncsvonly,r2\n")
+        cmdb.import_csv(path, replace=True)
+        self.run_sync()
+        self.assertEqual(cmdb.get("srv001")["rack"], "r1")
+        self.assertEqual(cmdb.get("srv001")["snow_table"], "cmdb_ci_server")
+
+        del self.records[1:3]
+        cmdb.set_meta("snow_full_sync:cmdb_ci_server", "0")
+        status = self.run_sync()
+        self.assertEqual((status["mode"], status["deleted"]), ("full", 1))
+        self.assertIsNone(cmdb.get("srv002"))
+        kept = cmdb.get("srv001")
+        self.assertEqual(kept["rack"], "r1")
+        self.assertIsNone(kept["snow_table"])
+        self.assertIsNone(kept["sys_id"])
+        self.assertEqual(cmdb.get("csvonly")["rack"], "r2")
+        self.assertEqual(len(cmdb), 250)
+        self.assertIsNone(self.sync.lookup("cmdb_ci_server", None, "srv001"))
+
+    def test_delta_query_in_user_time_zone(self):
+        self.assertEqual(self.server.snow_time_value(datetime(2026, 1, 1, 10, 0, 0)), "javascript:new GlideDateTime('2026-01-01 10:00:00')")
+        self.server.SERVICENOW_TIMEZONE = "America/New_York"
+        self.assertEqual(self.server.snow_time_value(datetime(2026, 1, 1, 10, 0, 0)), "2026-01-01 05:00:00")
+        self.assertEqual(self.server.snow_time_value(datetime(2026, 7, 1, 10, 0, 0)), "2026-07-01 06:00:00")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import os
+import random
+import tempfile
+import unittest
+
+from tests.server_loader import load_server
+
+try:
+    import pandas as pd
+except ImportError:
+    pd = None
+
+ALPHABET = "abcAB.-_19éÜ"
+
+
+@unittest.skipIf(pd is None, "pandas not installed")
+class TestTrigramIndex(unittest.TestCase):
+    """Trigram index lookups match a plain substring scan of the column"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.server = load_server("02_cmdb_mcp", "cmdb_mcp_server_trigram", LOCAL_CMDB_PATH=os.path.join(cls.tmp.name, "cmdb.csv"), CMDB_RELOAD_INTERVAL="0")
+        rng = random.Random(38)
+        values = ["".join(rng.choice(ALPHABET) for _ in range(rng.choice([0, 1, 2, 3, 5, 8, 13, 40]))) for _ in range(3000)]
+        # Repeated values share posting entries; missing values never match
+        values += values[:500] + [None] * 50
+        rng.shuffle(values)
+        cls.series = pd.Series(values, dtype=object)
+        cls.needles = ["", "a", "Ab", "abc", "ABC", "b.-", "éü", "1a9", "zzz", ".-_1"] + [
+            value[start:start + size] for value in rng.sample([v for v in values if v and len(v) > 6], 40)
+            for start, size in ((1, 3), (2, 5))
+        ]
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp.cleanup()
+
+    def scan(self, needle):
+        return self.series.astype(str).str.lower().str.contains(needle.lower(), regex=False).to_numpy().nonzero()[0].tolist()
+
+    def assertMatchesScan(self, index):
+        for needle in self.needles:
+            with self.subTest(needle=needle):
+                self.assertEqual(index.search(needle).tolist(), self.scan(needle))
+
+    def test_search_matches_scan(self):
+        self.assertMatchesScan(self.server.TrigramIndex(self.series))
+
+    def test_search_matches_scan_across_chunks(self):
+        default = self.server.TRIGRAM_CHUNK_BYTES
+        self.server.TRIGRAM_CHUNK_BYTES = 64
+        try:
+            index = self.server.TrigramIndex(self.series)
+        finally:
+            self.server.TRIGRAM_CHUNK_BYTES = default
+        self.assertMatchesScan(index)
+
+    def test_estimate_bounds_matches(self):
+        index = self.server.TrigramIndex(self.series)
+        for needle in self.needles:
+            with self.subTest(needle=needle):
+                distinct = {self.series[row].lower() for row in self.scan(needle) if self.series[row] is not None}
+                self.assertGreaterEqual(index.estimate(needle), len(distinct))
+
+    def test_store_contains_uses_index(self):
+        frame = pd.DataFrame({"hostname": [f"h{i}" for i in range(len(self.series))], "ip_address": self.series})
+        store = self.server.CmdbStore(frame)
+        self.assertIn("ip_address", store.trigrams)
+        for needle in self.needles:
+            with self.subTest(needle=needle):
+                self.assertEqual(store.contains("ip_address", needle).tolist(), self.scan(needle))
+
+    def test_empty_column(self):
+        index = self.server.TrigramIndex(pd.Series(["", "ab", None], dtype=object))
+        self.assertEqual(index.search("abc").tolist(), [])
+        self.assertEqual(index.search("b").tolist(), [1])
+
+
+if __name__ == '__main__':
+    unittest.main()
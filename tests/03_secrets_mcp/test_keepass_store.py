@@ -0,0 +1,92 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from tests.server_loader import load_server
+
+try:
+    from pykeepass import create_database, PyKeePass
+except ImportError:
+    create_database = None
+
+
+@unittest.skipIf(create_database is None, "pykeepass not installed")
+class TestKeePassStore(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.server = load_server("03_secrets_mcp", "secrets_mcp_server_keepass", KEEPASS_DB_PATH="", SECRETS_CACHE_ENABLED="false")
+        cls.server.KEEPASS_CHECK_INTERVAL = 0
+        cls.template = os.path.join(cls.tmp.name, "template.kdbx")
+        db = create_database(cls.template, password="pw")
+        group = db.add_group(db.add_group(db.root_group, "Infra"), "DB")
+        for i in range(20):
+            db.add_entry(group, f"pg{i}", f"user{i}", f"pass{i}")
+        db.save()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp.cleanup()
+
+    def setUp(self):
+        self.path = os.path.join(self.tmp.name, f"{self._testMethodName}.kdbx")
+        shutil.copy(self.template, self.path)
+        self.store = self.server.KeePassStore(self.path, "pw", None)
+
+    def change_password(self, title: str, password: str):
+        db = PyKeePass(self.path, password="pw")
+        db.find_entries(title=title, first=True).password = password
+        db.save()
+
+    def settle(self):
+        if self.store.reloader is not None:
+            self.store.reloader.join()
+
+    def test_lookup_by_path(self):
+        snapshot = self.store.current()
+        self.assertEqual(snapshot.find("Infra/DB/pg3").password, "pass3")
+        self.assertEqual(snapshot.find("/Infra/DB/pg3/").username, "user3")
+        self.assertIsNone(snapshot.find("Infra/DB/missing"))
+        self.assertIsNone(self.store.reloader)
+
+    def test_changed_file_reloads_in_background(self):
+        before = self.store.current()
+        self.change_password("pg3", "rotated")
+        # The read returns the loaded snapshot and leaves decrypting to the reload thread
+        self.assertIs(self.store.current(), before)
+        self.assertIsNotNone(self.store.reloader)
+        self.settle()
+        self.assertEqual(self.store.current().find("Infra/DB/pg3").password, "rotated")
+        self.assertEqual(self.store.stats["reloads"], 2)
+
+    def test_touched_file_skips_the_kdf(self):
+        os.utime(self.path, ns=(1, 1))
+        snapshot = self.store.current()
+        self.settle()
+        self.assertIs(self.store.current(), snapshot)
+        self.assertEqual(self.store.stats["reloads"], 1)
+        self.assertEqual(self.store.stats["unchanged_checks"], 1)
+
+    def test_unreadable_file_keeps_serving(self):
+        with open(self.path, "wb") as f:
+            f.write(b"not a kdbx")
+        self.store.current()
+        self.settle()
+        self.assertEqual(self.store.current().find("Infra/DB/pg1").password, "pass1")
+        self.assertEqual(self.store.stats["reload_errors"], 1)
+        # The failed version is not retried until the file changes again
+        reloader = self.store.reloader
+        self.store.current()
+        self.assertIs(self.store.reloader, reloader)
+
+    def test_reload_does_not_wait_for_another(self):
+        self.change_password("pg3", "rotated")
+        with self.store.lock:
+            self.assertFalse(self.store.refresh(blocking=False))
+        self.assertTrue(self.store.refresh())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import time
+import unittest
+
+from tests.server_loader import load_server
+
+server = load_server("03_secrets_mcp", "secrets_mcp_server_cache", KEEPASS_DB_PATH="", SECRETS_CACHE_EXCLUDE="azurekv-root-*")
+
+
+@unittest.skipIf(server.AESGCM is None, "cryptography not installed")
+class TestSecretCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = server.SecretCache("azurekv", 60.0, 2)
+
+    def test_round_trip_stores_only_ciphertext(self):
+        self.cache.put(("db-password", None), "s3cr3t-value")
+        _, _, ciphertext = self.cache.entries[("db-password", None)]
+        self.assertNotIn(b"s3cr3t-value", bytes(ciphertext))
+        self.assertEqual(self.cache.get(("db-password", None)), "s3cr3t-value")
+        self.assertIsNone(self.cache.get(("db-password", "2")))
+        self.assertEqual((self.cache.stats["hits"], self.cache.stats["misses"]), (1, 1))
+
+    def test_expired_entries_are_zeroed(self):
+        cache = server.SecretCache("gcpsm", 0.05, 10)
+        cache.put(("token", "latest"), "value")
+        ciphertext = cache.entries[("token", "latest")][2]
+        time.sleep(0.1)
+        self.assertIsNone(cache.get(("token", "latest")))
+        self.assertEqual(cache.entries, {})
+        self.assertEqual(ciphertext, bytearray(len(ciphertext)))
+
+    def test_least_recently_used_is_evicted_and_zeroed(self):
+        self.cache.put(("a", None), "1")
+        self.cache.put(("b", None), "2")
+        evicted = self.cache.entries[("b", None)][2]
+        self.cache.get(("a", None))
+        self.cache.put(("c", None), "3")
+        self.assertEqual(list(self.cache.entries), [("a", None), ("c", None)])
+        self.assertEqual(evicted, bytearray(len(evicted)))
+        self.assertEqual(self.cache.stats["evictions"], 1)
+
+    def test_invalidate_drops_every_version(self):
+        self.cache.put(("a", "1"), "old")
+        self.cache.put(("a", "2"), "new")
+        buffers = [entry[2] for entry in self.cache.entries.values()]
+        self.assertEqual(self.cache.invalidate("a"), 2)
+        self.assertEqual(self.cache.entries, {})
+        self.assertTrue(all(buffer == bytearray(len(buffer)) for buffer in buffers))
+
+    def test_entries_are_bound_to_their_key(self):
+        self.cache.put(("a", None), "value")
+        self.cache.entries[("b", None)] = self.cache.entries[("a", None)]
+        with self.assertRaises(Exception):
+            self.cache.get(("b", None))
+
+    def test_excluded_secrets_bypass_the_cache(self):
+        self.assertIsNone(server.cache_for("azurekv", "root-admin"))
+        self.assertIs(server.cache_for("azurekv", "app-db"), server.secret_caches["azurekv"])
+
+
+if __name__ == '__main__':
+    unittest.main()
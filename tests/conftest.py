@@ -0,0 +1,12 @@
+"""pytest setup shared by the service test directories.
+
+The service directories (02_cmdb_mcp, ...) start with a digit, so pytest
+imports their test modules as top-level modules; putting the repository root
+on sys.path lets them import the shared helpers as tests.*.
+"""
+import os
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
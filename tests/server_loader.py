@@ -0,0 +1,23 @@
+"""Loads a service's mcp_server.py as a fresh module with its own configuration.
+
+Services read their settings from the environment at import time, so each
+test module loads its own copy under a distinct name.
+"""
+import importlib.util
+import logging
+import os
+from unittest import mock
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_server(service: str, name: str, **env: str):
+    """Import <service>/mcp_server.py (e.g. service="02_cmdb_mcp") as module `name` with `env` set"""
+    path = os.path.join(REPO_ROOT, service, "mcp_server.py")
+    with mock.patch.dict(os.environ, env):
+        spec = importlib.util.spec_from_file_location(name, path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    # Services install a JSON handler on the root logger at INFO
+    logging.getLogger().setLevel(logging.CRITICAL)
+    return module
@@ -0,0 +1,89 @@
+"""Minimal ServiceNow Table API stub for exercising the CMDB service's client.
+
+Serves /api/now/table/<table> (sysparm_offset/sysparm_limit paging, X-Total-Count,
+'^'-separated field=value and sys_updated_on>= conditions (literal or
+`javascript:new GlideDateTime('<UTC time>')`), sysparm_fields) and
+/api/now/table/<table>/<sys_id>. Offsets listed in `throttle` answer 429 with
+Retry-After: 0 once before succeeding.
+"""
+import json
+import re
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+GLIDE_DATE_TIME_RE = re.compile(r"^javascript:new GlideDateTime\('([^']*)'\)$")
+
+
+class ServiceNowStub:
+    def __init__(self, tables):
+        self.tables = tables
+        self.throttle = set()
+        self.requests = []
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self.handler())
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def respond(self, path: str, params: dict) -> tuple:
+        parts = path.strip("/").split("/")
+        if parts[:3] != ["api", "now", "table"] or len(parts) not in (4, 5) or parts[3] not in self.tables:
+            return 404, {"error": {"message": "Invalid table"}}, {}
+        records = self.tables[parts[3]]
+        if len(parts) == 5:
+            found = [record for record in records if record["sys_id"] == parts[4]]
+            return (200, {"result": found[0]}, {}) if found else (404, {"error": {"message": "No Record found"}}, {})
+        offset = int(params.get("sysparm_offset", 0))
+        with self.lock:
+            if offset in self.throttle:
+                self.throttle.discard(offset)
+                return 429, {"error": {"message": "Rate limit exceeded"}}, {"Retry-After": "0"}
+        for condition in params.get("sysparm_query", "").split("^"):
+            if condition.startswith("sys_updated_on>="):
+                since = GLIDE_DATE_TIME_RE.sub(r"\1", condition[len("sys_updated_on>="):])
+                records = [record for record in records if record["sys_updated_on"] >= since]
+            elif "=" in condition and not condition.startswith("ORDERBY"):
+                field, value = condition.split("=", 1)
+                records = [record for record in records if str(record.get(field)) == value]
+        page = records[offset:offset + int(params.get("sysparm_limit", 10000))]
+        if "sysparm_fields" in params:
+            fields = params["sysparm_fields"].split(",")
+            page = [{field: record.get(field) for field in fields} for record in page]
+        return 200, {"result": page}, {"X-Total-Count": str(len(records))}
+
+    def handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                params = {key: values[0] for key, values in parse_qs(url.query).items()}
+                with stub.lock:
+                    stub.requests.append((url.path, params))
+                status, payload, headers = stub.respond(url.path, params)
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler